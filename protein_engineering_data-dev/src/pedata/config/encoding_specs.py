@@ -7,6 +7,8 @@ The encodings are specified as a list `encodings` containing `EncodingSpec` or `
     - `provides` (List): The names of the columns that the encoding will provide
     - `requires` (List): The names of the columns that the encoding requires
     - `func`: A function that takes a dataset and returns a dictionary of columns that the encoding provides
+    - `cpu_bound` (bool): Whether the encoding is a pure CPU computation, which `add_encodings` can run on shards
+      of the dataset in parallel worker processes (default: False)
 
 SklEncodingSpec objects are slightly different and contain the following attributes:
     - `provides` (str): The name of the column that the encoding will provide
@@ -20,37 +22,82 @@ Encodings are applied in a specific order based on their dependencies.
 `provided_encodings` is a list of all the encodings that are provided by the package.
 
 >>> print(provided_encodings) # doctest: +ELLIPSIS +NORMALIZE_WHITESPACE
-['atm_count', 'bnd_count', 'atm_adj', 'atm_bnd_incid', 'atm_retprob100', 
-'aa_unirep_1900', 'aa_unirep_final', 'aa_seq', 'aa_len', 'aa_1gram', 
-'aa_ankh_base', 'aa_esm2_t6_8M', 'aa_1hot', 'dna_len', 'dna_1hot']
+['atm_count', 'bnd_count', 'atm_adj', 'atm_bnd_incid', 'atm_adj_idcs', 'atm_adj_vals',
+'atm_bnd_incid_idcs', 'atm_bnd_incid_vals', 'atm_retprob100', 
+'aa_unirep_1900', 'aa_unirep_final', 'aa_seq', 'aa_ankh_avg', 'aa_esm2_avg', 'aa_1hot', 'aa_1gram', 
+'dna_1hot', 'aa_len', 'aa_ankh_base', 'aa_esm2_t6_8M', 'aa_tokens', 'dna_len', 'dna_tokens']
 """
 
-from typing import Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Union
 from sklearn.base import TransformerMixin
 from functools import partial
 import datasets as ds
+import numpy as np
+import pyarrow as pa
 from ..encoding import (
     EncodingSpec,
     SklEncodingSpec,
     NGramFeat,
-    Ankh,
+    AnkhBatched,
     ESM,
     SeqStrOneHot,
     SeqStrLen,
+    SeqStrTokens,
     unirep,
     translate_dna_to_aa_seq,
     return_prob_feat,
 )
 from ..encoding import transforms_graph as tg
-from ..encoding.util import find_function_order
+from ..encoding.transform import token_counts, tokens_to_one_hot
+from ..encoding.cache import EmbeddingCache, package_version
+from ..encoding.embeddings import mean_embeddings
+from ..encoding.util import (
+    concatenate_encodings,
+    dependency_levels,
+    find_function_order,
+    submit_shards,
+)
 from .alphabets import padded_dna_alphabet, padded_aa_alphabet, aa_alphabet
+from .paths import PE_EMBEDDING_CACHE_DIR
 
+# the embedding models are loaded once and shared between per-residue and pooled encodings
+_ankh = AnkhBatched(cache_dir=PE_EMBEDDING_CACHE_DIR)
+_esm = ESM(cache_dir=PE_EMBEDDING_CACHE_DIR)
 
 encodings: list[EncodingSpec] = [
     # EncodingSpec(["list", "of", "provided", "encodings"], ["list_of","required_encodings"], function_taking_dataset_and_returning_dict),
-    EncodingSpec(["atm_count", "bnd_count"], ["bnd_idcs"], tg.bnd_count_atm_count),
-    EncodingSpec(["atm_adj"], ["atm_count", "bnd_count"], tg.atm_adj),
-    EncodingSpec(["atm_bnd_incid"], ["atm_count", "bnd_count"], tg.atm_bnd_incid),
+    EncodingSpec(
+        ["atm_count", "bnd_count"],
+        ["bnd_idcs"],
+        tg.bnd_count_atm_count,
+        cpu_bound=True,
+    ),
+    EncodingSpec(
+        ["atm_adj"],
+        ["bnd_idcs", "atm_count", "bnd_count"],
+        tg.atm_adj,
+        cpu_bound=True,
+    ),
+    EncodingSpec(
+        ["atm_bnd_incid"],
+        ["bnd_idcs", "atm_count", "bnd_count"],
+        tg.atm_bnd_incid,
+        cpu_bound=True,
+    ),
+    # sparse variants storing the nonzero matrix entries, for graphs too large for dense matrices
+    EncodingSpec(
+        ["atm_adj_idcs", "atm_adj_vals"],
+        ["bnd_idcs", "atm_count", "bnd_count"],
+        tg.atm_adj_sparse,
+        cpu_bound=True,
+    ),
+    EncodingSpec(
+        ["atm_bnd_incid_idcs", "atm_bnd_incid_vals"],
+        ["bnd_idcs", "atm_count", "bnd_count"],
+        tg.atm_bnd_incid_sparse,
+        cpu_bound=True,
+    ),
     EncodingSpec(
         ["atm_retprob100"],  # shape: (atm_count, atm_count)
         ["atm_adj"],  # shape: (2, atm_count)
@@ -58,51 +105,403 @@ encodings: list[EncodingSpec] = [
             return_prob_feat,
             100,
         ),
+        cpu_bound=True,
+    ),
+    # chosen when the sparse adjacency matrices are available or required instead of the dense ones
+    EncodingSpec(
+        ["atm_retprob100"],
+        ["atm_adj_idcs", "atm_adj_vals", "atm_count"],
+        partial(tg.return_prob_feat_sparse, 100),
+        cpu_bound=True,
+    ),
+    EncodingSpec(
+        ["aa_unirep_1900", "aa_unirep_final"],
+        ["aa_seq"],
+        partial(
+            unirep,
+            cache=EmbeddingCache(
+                PE_EMBEDDING_CACHE_DIR, "jax_unirep", package_version("jax-unirep")
+            ),
+        ),
     ),
-    EncodingSpec(["aa_unirep_1900", "aa_unirep_final"], ["aa_seq"], unirep),
-    EncodingSpec(["aa_seq"], ["dna_seq"], translate_dna_to_aa_seq),
+    EncodingSpec(["aa_seq"], ["dna_seq"], translate_dna_to_aa_seq, cpu_bound=True),
+    # averaged over the tokens of each sequence without the padding, like the pooled encodings below
     EncodingSpec(
         ["aa_ankh_avg"],
-        ["aa_ankh_base"],
+        ["aa_ankh_base", "aa_seq"],
         lambda df: {
-            "aa_ankh_avg": df.with_format("numpy")["aa_ankh_base"].mean(axis=1).tolist()
+            "aa_ankh_avg": mean_embeddings(
+                df.with_format("numpy")["aa_ankh_base"],
+                [len(seq) + 1 for seq in df["aa_seq"]],  # end of sequence token
+            )
         },
     ),
     EncodingSpec(
         ["aa_esm2_avg"],
-        ["aa_esm2_t6_8M"],
+        ["aa_esm2_t6_8M", "aa_seq"],
+        lambda df: {
+            "aa_esm2_avg": mean_embeddings(
+                df.with_format("numpy")["aa_esm2_t6_8M"],
+                [len(seq) + 2 for seq in df["aa_seq"]],  # CLS and EOS tokens
+            )
+        },
+    ),
+    # per-position encodings are derived from the tokens when these are available or required as well
+    EncodingSpec(
+        ["aa_1hot"],
+        ["aa_tokens"],
+        lambda df: {
+            "aa_1hot": tokens_to_one_hot(
+                df.with_format("numpy")["aa_tokens"], len(padded_aa_alphabet)
+            )
+        },
+        cpu_bound=True,
+    ),
+    EncodingSpec(
+        ["aa_1gram"],
+        ["aa_tokens"],
+        lambda df: {
+            "aa_1gram": token_counts(
+                df.with_format("numpy")["aa_tokens"], len(padded_aa_alphabet)
+            )
+        },
+        cpu_bound=True,
+    ),
+    EncodingSpec(
+        ["dna_1hot"],
+        ["dna_tokens"],
         lambda df: {
-            "aa_esm2_avg": df.with_format("numpy")["aa_esm2_t6_8M"].mean(axis=1).tolist()
+            "dna_1hot": tokens_to_one_hot(
+                df.with_format("numpy")["dna_tokens"], len(padded_dna_alphabet)
+            )
         },
+        cpu_bound=True,
     ),
     # Deprecated API below, only allows a single provided and single required encoding
     # SklEncodingSpec("provided", "required", sklearn.TransformerMixin),
     # This is not too much of an issue
-    SklEncodingSpec("aa_len", "aa_seq", SeqStrLen()),  # aa_len shape: (1,)
-    SklEncodingSpec("aa_1gram", "aa_seq", NGramFeat(1, aa_alphabet)),
-    SklEncodingSpec("aa_ankh_base", "aa_seq", Ankh()),
-    SklEncodingSpec("aa_esm2_t6_8M", "aa_seq", ESM()),
-    SklEncodingSpec("aa_1hot", "aa_seq", SeqStrOneHot(padded_aa_alphabet)),
-    SklEncodingSpec("dna_len", "dna_seq", SeqStrLen()),
-    SklEncodingSpec("dna_1hot", "dna_seq", SeqStrOneHot(padded_dna_alphabet)),
+    SklEncodingSpec(
+        "aa_len", "aa_seq", SeqStrLen(), cpu_bound=True
+    ),  # aa_len shape: (1,)
+    SklEncodingSpec("aa_1gram", "aa_seq", NGramFeat(1, aa_alphabet), cpu_bound=True),
+    SklEncodingSpec("aa_ankh_base", "aa_seq", _ankh),
+    SklEncodingSpec("aa_esm2_t6_8M", "aa_seq", _esm),
+    # pooled embeddings are computed from the sequence directly when the per-residue embeddings are not needed,
+    # otherwise they are averaged from the per-residue embeddings (see `find_function_order`)
+    SklEncodingSpec("aa_ankh_avg", "aa_seq", _ankh.with_pooling("mean")),
+    SklEncodingSpec("aa_esm2_avg", "aa_seq", _esm.with_pooling("mean")),
+    SklEncodingSpec(
+        "aa_1hot", "aa_seq", SeqStrOneHot(padded_aa_alphabet), cpu_bound=True
+    ),
+    SklEncodingSpec(
+        "aa_tokens", "aa_seq", SeqStrTokens(padded_aa_alphabet), cpu_bound=True
+    ),  # aa_tokens shape: (max_length,), uint8, 0 is padding
+    SklEncodingSpec("dna_len", "dna_seq", SeqStrLen(), cpu_bound=True),
+    SklEncodingSpec(
+        "dna_1hot", "dna_seq", SeqStrOneHot(padded_dna_alphabet), cpu_bound=True
+    ),
+    SklEncodingSpec(
+        "dna_tokens", "dna_seq", SeqStrTokens(padded_dna_alphabet), cpu_bound=True
+    ),
 ]
 
 
-provided_encodings = [p for e in encodings for p in e.provides]
+provided_encodings = list(dict.fromkeys(p for e in encodings for p in e.provides))
+
+# Arrow tensor features for per-row arrays with 2 to 5 dimensions
+array_features = {2: ds.Array2D, 3: ds.Array3D, 4: ds.Array4D, 5: ds.Array5D}
+
+
+def array_feature(values: np.ndarray) -> Union[ds.features.features.FeatureType, None]:
+    """Arrow feature type to store an array of encodings, holding the encoding of one row per entry of the first axis.
+
+    Matrices and tensors are stored as Arrow tensor columns (`Array2D` to `Array5D`), vectors as sequences of numbers.
+    The first per-row dimension is left variable (e.g. sequence length), such that datasets encoded
+    separately, e.g. train and test splits padded to different lengths, keep the same feature types.
+
+    Args:
+        values (np.ndarray): Encodings of shape (num_rows, ...).
+
+    Returns:
+        Union[ds.features.features.FeatureType, None]: The feature type, or None if Arrow should infer the type, e.g. for lists of differently shaped arrays.
+
+    Example:
+        >>> array_feature(np.zeros((10, 7, 320), dtype=np.float32))
+        Array2D(shape=(None, 320), dtype='float32', id=None)
+        >>> print(array_feature([np.zeros((3, 3)), np.zeros((2, 2))]))
+        None
+    """
+    if (
+        not isinstance(values, np.ndarray)
+        or values.dtype.kind not in "biuf"
+        or not 2 <= values.ndim <= 6
+    ):
+        return None
+    if values.ndim == 2:
+        return ds.Sequence(ds.Value(str(values.dtype)))
+    return array_features[values.ndim - 1](
+        shape=(None,) + values.shape[2:], dtype=str(values.dtype)
+    )
+
+
+def ragged_array_column(values: Any) -> Union[pa.Array, None]:
+    """Nested Arrow list column holding a list of differently shaped numpy arrays, one per row.
+
+    The arrays are concatenated into one flat buffer and wrapped in one list level per dimension, built from the
+    array shapes, instead of letting Arrow infer the type from Python objects element by element.
+
+    Args:
+        values (Any): Encodings, one per row.
+
+    Returns:
+        Union[pa.Array, None]: The column, or None if `values` is not a list of numeric arrays of the same type and number of dimensions.
+
+    Example:
+        >>> column = ragged_array_column([np.ones((2, 2), dtype=np.float32), np.zeros((1, 3), dtype=np.float32)])
+        >>> column.type
+        ListType(list<item: list<item: float>>)
+        >>> column.to_pylist()[1]
+        [[0.0, 0.0, 0.0]]
+    """
+    if (
+        not isinstance(values, list)
+        or len(values) == 0
+        or not all(isinstance(v, np.ndarray) for v in values)
+    ):
+        return None
+    ndim, dtype = values[0].ndim, values[0].dtype
+    if (
+        ndim == 0
+        or dtype.kind not in "biuf"
+        or any(v.ndim != ndim or v.dtype != dtype for v in values)
+    ):
+        return None
+
+    shapes = np.array([v.shape for v in values], dtype=np.int64)
+    column = pa.array(np.concatenate([v.ravel() for v in values]))
+    for axis in reversed(range(ndim)):
+        # every array holds prod(shape[:axis]) lists of length shape[axis] at this level
+        lengths = np.repeat(shapes[:, axis], np.prod(shapes[:, :axis], axis=1))
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        if offsets[-1] > np.iinfo(np.int32).max:
+            return None
+        column = pa.ListArray.from_arrays(pa.array(offsets.astype(np.int32)), column)
+    return column
+
+
+def add_array_column(dataset: ds.Dataset, name: str, values) -> ds.Dataset:
+    """Add a column to a dataset, writing numpy arrays directly to typed Arrow columns.
+
+    Args:
+        dataset (ds.Dataset): The dataset.
+        name (str): Name of the new column.
+        values: Values of the new column, one per row.
+
+    Returns:
+        ds.Dataset: The dataset with the new column.
+    """
+    feature = array_feature(values)
+    features = None if feature is None else ds.Features({name: feature})
+    ragged = None if feature is not None else ragged_array_column(values)
+    if ragged is not None:
+        values = ragged
+    # `from_dict` converts numpy arrays to Arrow without creating Python objects per element,
+    # `add_column` takes the resulting Arrow array as is
+    column = ds.Dataset.from_dict({name: values}, features=features).data.column(name)
+    return dataset.add_column(name, column)
+
+
+def columns_to_dataset(columns: dict[str, Any]) -> ds.Dataset:
+    """Convert encodings to a dataset, writing numpy arrays directly to typed Arrow columns.
+
+    Args:
+        columns (dict[str, Any]): Values of each column, one per row.
+
+    Returns:
+        ds.Dataset: Dataset with one column per entry of `columns`.
+    """
+    datasets = []
+    for name, values in columns.items():
+        feature = array_feature(values)
+        features = None if feature is None else ds.Features({name: feature})
+        ragged = None if feature is not None else ragged_array_column(values)
+        if ragged is not None:
+            values = ragged
+        datasets.append(ds.Dataset.from_dict({name: values}, features=features))
+    return ds.concatenate_datasets(datasets, axis=1)
+
+
+def join_columns(dataset: ds.Dataset, columns: list[ds.Dataset]) -> ds.Dataset:
+    """Add the columns of several datasets to a dataset in a single step, replacing existing columns of the same name.
+
+    Args:
+        dataset (ds.Dataset): The dataset.
+        columns (list[ds.Dataset]): Datasets with the new columns and as many rows as `dataset`.
+
+    Returns:
+        ds.Dataset: The dataset with the new columns, in the format of `dataset`.
+    """
+    names = [name for c in columns for name in c.column_names]
+    existing = [name for name in names if name in dataset.column_names]
+    joined = ds.concatenate_datasets(
+        [dataset.remove_columns(existing)] + columns, axis=1
+    )
+    # concatenating resets the format
+    fmt = dataset.format
+    format_columns = fmt["columns"]
+    if format_columns is not None:
+        format_columns = [c for c in format_columns if c not in names] + names
+    return joined.with_format(
+        fmt["type"],
+        format_columns,
+        fmt["output_all_columns"],
+        **fmt["format_kwargs"],
+    )
+
+
+def padding_params(
+    enc: EncodingSpec, dataset: ds.Dataset, max_length: Optional[int] = None
+) -> dict[str, int]:
+    """Arguments padding the encodings of all batches of a dataset to the same length.
+
+    Transformers with `max_num_tokens` pad their encodings to the longest sequence of the dataset, not of the batch.
+
+    Args:
+        enc (EncodingSpec): The encoding specification.
+        dataset (ds.Dataset): Dataset with the columns required by `enc`.
+        max_length (Optional[int], optional): Length of the longest sequence, e.g. of a whole file encoded in blocks.
+            Defaults to None (longest sequence of `dataset`).
+
+    Returns:
+        dict[str, int]: `pad_length` for the `map_func` or `transform` of the transformer, empty if it doesn't pad.
+    """
+    if isinstance(enc.func, TransformerMixin) and hasattr(enc.func, "max_num_tokens"):
+        return {"pad_length": enc.func.max_num_tokens(dataset, max_length)}
+    return {}
+
+
+def encode(
+    enc: EncodingSpec, dataset: ds.Dataset, max_length: Optional[int] = None
+) -> ds.Dataset:
+    """Compute the encodings provided by an encoding specification.
+
+    Transformers without `map_func` have to be fitted beforehand.
+
+    Args:
+        enc (EncodingSpec): The encoding specification.
+        dataset (ds.Dataset): Dataset with the columns required by `enc`.
+        max_length (Optional[int], optional): Length of the longest sequence to pad the encodings to,
+            see `padding_params`. Defaults to None (longest sequence of `dataset`).
+
+    Returns:
+        ds.Dataset: Dataset with a column per encoding provided by `enc`.
+    """
+    if isinstance(enc.func, TransformerMixin):
+        padding = padding_params(enc, dataset, max_length)
+        # Apply encoding using the `map_func` if available
+        if hasattr(enc.func, "map_func"):
+            map_func = partial(enc.func.map_func, **padding)
+            # the feature type is determined from the encoding of the first row
+            feature = array_feature(map_func(dataset[:1]))
+            features = None
+            if feature is not None:
+                features = ds.Features({enc.provides[0]: feature})
+            return dataset.map(
+                lambda x: {enc.provides[0]: map_func(x)},
+                writer_batch_size=100,
+                batch_size=100,
+                batched=True,
+                features=features,
+                remove_columns=dataset.column_names,
+            )
+        return columns_to_dataset(
+            {enc.provides[0]: enc.func.transform(dataset, **padding)}
+        )
+    return columns_to_dataset(enc.func(dataset))
+
+
+def submit_encoding_shards(
+    encs: list[EncodingSpec],
+    datasets: list[ds.Dataset],
+    num_proc: int,
+    max_lengths: Optional[list[Optional[int]]] = None,
+) -> list[Callable[[], ds.Dataset]]:
+    """Start computing the encodings provided by encoding specifications on shards of datasets in worker processes.
+
+    All shards are encoded by a single pool of worker processes. Transformers have to be fitted beforehand.
+
+    Args:
+        encs (list[EncodingSpec]): The encoding specifications.
+        datasets (list[ds.Dataset]): Per encoding specification, a dataset with the columns it requires.
+        num_proc (int): Number of worker processes.
+        max_lengths (Optional[list[Optional[int]]], optional): Per encoding specification, the length of the longest
+            sequence to pad the encodings to, see `padding_params`. Defaults to None (longest sequence of each dataset).
+
+    Returns:
+        list[Callable[[], ds.Dataset]]: Per encoding specification, a function waiting for the workers and returning
+            a dataset with a column per encoding it provides.
+    """
+    if max_lengths is None:
+        max_lengths = [None] * len(encs)
+    wait = submit_shards(
+        [
+            (
+                (
+                    partial(
+                        enc.func.transform,
+                        **padding_params(enc, dataset, max_length),
+                    )
+                    if isinstance(enc.func, TransformerMixin)
+                    else enc.func
+                ),
+                dataset.with_format("numpy"),
+            )
+            for enc, dataset, max_length in zip(encs, datasets, max_lengths)
+        ],
+        num_proc,
+    )
+    all_parts = []
+
+    def result(i: int) -> ds.Dataset:
+        if len(all_parts) == 0:
+            all_parts.extend(wait())
+        parts = all_parts[i]
+        if not isinstance(parts[0], dict):
+            parts = [{encs[i].provides[0]: p} for p in parts]
+        return columns_to_dataset(
+            {k: concatenate_encodings([p[k] for p in parts]) for k in parts[0]}
+        )
+
+    return [partial(result, i) for i in range(len(encs))]
 
 
 def add_encodings(
     dataset_dict: Union[ds.DatasetDict, ds.Dataset],
     needed: list[str] | set[str] = [],
+    num_proc: Optional[int] = None,
+    max_lengths: Optional[dict[str, int]] = None,
 ) -> Union[ds.DatasetDict, ds.Dataset]:
     """Add encodings to a single Dataset or Datasets in a dataset dictionary.
 
     This function takes a dataset dictionary or a single dataset and adds the specified encodings to it.
-    Encodings are applied in a specific order based on their dependencies.
+    Encodings are applied in a specific order based on their dependencies. Encodings which do not depend on each other
+    are computed concurrently, model based encodings in threads and CPU bound encodings in worker processes
+    if `num_proc` is given, and their columns are added to the dataset in a single step.
+
+    Without `needed` encodings, all encodings which can be computed from the dataset are added, except the slow
+    embeddings and the sparse graph encodings, e.g. the dense adjacency matrices and the return probabilities
+    for a dataset with a `bnd_idcs` column. To compute the return probabilities only from sparse matrices,
+    for molecules too large for dense matrices, request the sparse adjacency matrices along with them:
+    `add_encodings(dataset, ["atm_adj_idcs", "atm_adj_vals", "atm_retprob100"])` adds no dense matrix.
 
     Args:
         dataset_dict (Union[ds.DatasetDict, ds.Dataset]: Dataset or dataset dictionary to which encodings should be added
         needed (Union[list[str], set[str]], optional): List or set of encodings to be added. Defaults to None.
+        num_proc (Optional[int], optional): Number of worker processes for CPU bound encodings. The dataset is split into
+            contiguous shards, which are encoded in parallel and merged in order. Defaults to None (single process).
+        max_lengths (Optional[dict[str, int]], optional): Length of the longest sequence per sequence column, e.g. of a
+            whole file encoded in blocks. Padded encodings of a column, e.g. one-hot encodings and per-residue
+            embeddings, are padded to this length. Defaults to None (longest sequence of the dataset).
 
     Returns:
         Union[ds.DatasetDict, ds.Dataset]: Dataset or dataset dictionary with new encodings added
@@ -129,19 +528,23 @@ def add_encodings(
     """
 
     # do not include by default because they are very long to be computed
-    #   "aa_ankh_base", "aa_esm2_t6_8M", "aa_esm2_avg", "aa_ankh_avg", "aa_unirep_1900", "atm_retprob100"
+    #   "aa_ankh_base", "aa_esm2_t6_8M", "aa_esm2_avg", "aa_ankh_avg", "aa_unirep_1900"
+    # the sparse graph encodings duplicate the dense ones, they are only added if needed explicitly
     # FIXME: add this above in the encoding list as fast_compute = False
     none_default_encodings = [
         "aa_ankh_base",
         "aa_ankh_avg",
         "aa_esm2_avg",
         "aa_esm2_t6_8M",
-        "atm_retprob100",
+        "atm_adj_idcs",
+        "atm_adj_vals",
+        "atm_bnd_incid_idcs",
+        "atm_bnd_incid_vals",
     ]
     # If `dataset_dict` is a dictionary, iterate over each dataset and recursively call `add_encodings`
     if isinstance(dataset_dict, ds.DatasetDict):
         for name, dataset in dataset_dict.items():
-            dataset_dict[name] = add_encodings(dataset, needed)
+            dataset_dict[name] = add_encodings(dataset, needed, num_proc, max_lengths)
 
         return dataset_dict
 
@@ -166,41 +569,55 @@ def add_encodings(
             satisfy_all=require_all,
         )
 
-        # Apply the encoding functions and add the resulting columns to the dataset
-        for enc in func_order:
-            if isinstance(enc.func, TransformerMixin):
-                if len(enc.provides) != 1:
-                    raise Exception(
-                        "Only single column encodings supported when using the old TransformerMixin interface"
-                    )
-
-                # Apply encoding using the `map_func` if available
-                if hasattr(enc.func, "map_func"):
-                    dataset = dataset.map(
-                        lambda x: {enc.provides[0]: enc.func.map_func(x)},
-                        writer_batch_size=100,
-                        batch_size=100,
-                        batched=True,
-                    )
-                else:
-                    # Fit and transform the dataset using the encoding function
-                    enc.func.fit(dataset)
-                    val = enc.func.transform(dataset)
-                    dataset = dataset.add_column(enc.provides[0], val)
-
-            else:
-                val = enc.func(dataset)
-
+        # Compute the encodings level by level of the dependency graph, the encodings of a level are independent
+        for level in dependency_levels(func_order, list(dataset.features.keys())):
+            for enc in level:
+                if isinstance(enc.func, TransformerMixin):
+                    if len(enc.provides) != 1:
+                        raise Exception(
+                            "Only single column encodings supported when using the old TransformerMixin interface"
+                        )
+                    if not hasattr(enc.func, "map_func"):
+                        enc.func.fit(dataset)
+
+            # CPU bound encodings are sharded over a single pool of worker processes, which is forked before
+            # the threads of this level are started, the pool of the previous level has been shut down
+            inputs = [dataset.select_columns(enc.requires) for enc in level]
+            # padded encodings require a single sequence column
+            level_max_lengths = [
+                (max_lengths or {}).get(enc.requires[0]) for enc in level
+            ]
+            results = [None] * len(level)
+            sharded = [
+                i
+                for i, enc in enumerate(level)
+                if num_proc is not None and num_proc > 1 and enc.cpu_bound
+            ]
+            if len(sharded) > 0:
+                submitted = submit_encoding_shards(
+                    [level[i] for i in sharded],
+                    [inputs[i] for i in sharded],
+                    num_proc,
+                    [level_max_lengths[i] for i in sharded],
+                )
+                for i, result in zip(sharded, submitted):
+                    results[i] = result
+            # all other encodings, e.g. models, run concurrently in threads
+            with ThreadPoolExecutor(len(level)) as executor:
+                for i, enc in enumerate(level):
+                    if results[i] is None:
+                        results[i] = executor.submit(
+                            encode, enc, inputs[i], level_max_lengths[i]
+                        ).result
+                columns = [result() for result in results]
+
+            for enc, encoded in zip(level, columns):
                 for prov in enc.provides:
-                    if prov not in val:
+                    if prov not in encoded.column_names:
                         assert f"Encoding {enc} did not provide {prov} unlike specified"
 
-                for k in val:
-                    # if the column already exists - it might happen when multiple encodings are returned together (e.g. unirep)
-                    if k in list(dataset.features.keys()):
-                        dataset = dataset.remove_columns(k)  # TODO: write a test for this
-                    # adds the column
-                    dataset = dataset.add_column(k, val[k])
+            # if a column already exists, it is replaced
+            dataset = join_columns(dataset, columns)
 
     else:
         raise TypeError("Invalid input type. Expected Dataset or a dataset dictionary.")
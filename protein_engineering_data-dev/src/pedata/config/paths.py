@@ -20,6 +20,12 @@ PE_RESULTS_DIR = Path(
 PE_CHECKPOINTS_DIR = Path(
     os.path.expanduser(os.getenv("PE_CHECKPOINTS_DIR", PE_BASE_DIR / "checkpoints"))
 )
+# on-disk cache of language model embeddings, see `pedata.encoding.cache`
+PE_EMBEDDING_CACHE_DIR = Path(
+    os.path.expanduser(
+        os.getenv("PE_EMBEDDING_CACHE_DIR", PE_BASE_DIR / "embedding_cache")
+    )
+)
 
 
 def get_filename(filename: str):
@@ -6,3 +6,12 @@ Mut = namedtuple("Mut", "pos src targ")
 
 # Mutation with no targ
 Mut_with_no_targ = namedtuple("Mut", "pos src")
+
+# Columnar mutations of many variants: one entry per mutation in variant_idx, pos, src and targ,
+# row indices of the variants without mutations in wildtype_idx and of those with invalid mutations in invalid_idx
+ParsedMutations = namedtuple(
+    "ParsedMutations", "variant_idx pos src targ wildtype_idx invalid_idx"
+)
+
+# Mutation codes of variants without mutations, i.e. the parent sequence
+wildtype_codes = ("wildtype (wt)", "wildtype", "", "wt", "-", "none")
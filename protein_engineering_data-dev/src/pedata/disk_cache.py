@@ -1,21 +1,27 @@
 import os
 from re import T
+import shutil
 import sys
+import tempfile
 from pathlib import Path
-from typing import List, Tuple, Union
+from typing import Iterable, Iterator, List, Tuple, Union
 
 import datasets as ds
 import jax.numpy as np
 import numpy as onp
 import pandas as pd
+import pyarrow as pa
+from datasets.arrow_writer import ArrowWriter
 
 
 from pedata.integrity import check_dataset
 from pedata.config import alphabets, paths, add_encodings
+from pedata.constants import Mut, wildtype_codes
 from pedata.mutation.mutation import Mutation
 
 from pedata.exazyme_datasets import dataset_base_processing
 import fsspec
+from fsspec.implementations.local import LocalFileSystem
 
 
 def get_missing_values(df: pd.DataFrame, feature: str) -> List[bool]:
@@ -32,6 +38,52 @@ def get_missing_values(df: pd.DataFrame, feature: str) -> List[bool]:
     return df.loc[:, feature].isna() | df.loc[:, feature].isnull()
 
 
+def mutate_parent(
+    mutation_codes: Iterable[str], parent: str, offset: int | None = None
+) -> Tuple[List[str], int | None]:
+    """Apply mutation codes (e.g. "T8M_P3G") to a parent sequence
+
+    Args:
+        mutation_codes: mutation code of each variant, wildtype codes (e.g. "wildtype") denote the parent itself
+        parent: parent sequence
+        offset: offset of the mutation positions in relation to the parent sequence. Defaults to None (estimated).
+
+    Returns:
+        Tuple[List[str], int | None]: the mutated sequences and the offset used, None if there were no mutations
+
+    Raises:
+        ValueError: If the offset can't be estimated with 100% certainty.
+
+    Example:
+        >>> mutate_parent(["wildtype", "T8M", "P3G_C10A"], "GMPKSEFTHC")
+        (['GMPKSEFTHC', 'GMPKSEFMHC', 'GMGKSEFTHA'], 0)
+    """
+    mutation_codes = list(mutation_codes)
+    parsed = Mutation.parse_mutation_column(mutation_codes)
+    if len(parsed.pos) == 0:
+        return [parent] * len(mutation_codes), offset
+
+    if offset is None:
+        mutations = [
+            Mut(int(p), chr(s), chr(t))
+            for p, s, t in zip(parsed.pos, parsed.src, parsed.targ)
+        ]
+        estimation = Mutation.estimate_offset(mutations, parent)
+        if estimation["matching_ratio"][0] != 1.0:
+            raise ValueError("Couldn't estimate an offset with 100% certainty.")
+        offset = int(estimation["offset"][0])
+
+    mutated = Mutation.apply_mutations_batched(
+        parent,
+        parsed.variant_idx,
+        parsed.pos,
+        parsed.targ,
+        num_variants=len(mutation_codes),
+        offset=offset,
+    )
+    return mutated, offset
+
+
 def fill_missing_sequences(df: pd.DataFrame, feature: str) -> pd.DataFrame:
     """Fill missing values in the `feature` column
 
@@ -98,6 +150,7 @@ def preprocess_data(
     needed_encodings: list[str] | set[str] = [],
     add_index: bool = True,
     add_splits: bool = True,
+    chunk_size: int | None = None,
 ) -> ds.Dataset:
     """Transforms a data file (CSV or Excel) into a Hugging Face dataset and computes all available features.
 
@@ -105,6 +158,11 @@ def preprocess_data(
         filename (Union[str, Path]): File name of the source CSV or Excel file.
         save_to_path (str, optional): Path to save the Hugging Face dataset. Defaults to None (not saved).
         filesystem (fsspec.AbstractFileSystem, optional): File system to use for saving. Defaults to None (local filesystem).
+        needed_encodings (list[str] | set[str], optional): Encodings to add to the dataset. Defaults to [] (all available encodings).
+        add_index (bool, optional): Whether to add an index column. Defaults to True.
+        add_splits (bool, optional): Whether to add the split columns. Defaults to True.
+        chunk_size (int, optional): Number of rows to process at once. If given, the file is streamed in blocks of rows
+            with bounded memory, see `preprocess_data_chunked`. Defaults to None (the whole file is loaded into memory).
 
     Returns:
         ds.Dataset: The dataset with all precomputed features.
@@ -126,6 +184,17 @@ def preprocess_data(
         The CSV file is then passed to the preprocess_data() function and is preprocessed to compute more features, and return a new HuggingFace dataset.
     """
 
+    if chunk_size is not None:
+        return preprocess_data_chunked(
+            filename,
+            chunk_size,
+            save_to_path=save_to_path,
+            filesystem=filesystem,
+            needed_encodings=needed_encodings,
+            add_index=add_index,
+            add_splits=add_splits,
+        )
+
     filename = str(filename).lower()
 
     # Check file format
@@ -164,12 +233,172 @@ def preprocess_data(
 
     # Save the data to a specified path, if provided
     if save_to_path is not None:
-        dataset.save_to_disk(save_to_path, storage_options=filesystem.storage_options)
+        dataset.save_to_disk(save_to_path, storage_options=storage_options(filesystem))
 
     # Return the processed dataset
     return dataset
 
 
+def preprocess_data_chunked(
+    filename: Union[str, Path],
+    chunk_size: int,
+    save_to_path: str | None = None,
+    filesystem: fsspec.AbstractFileSystem | None = None,
+    needed_encodings: list[str] | set[str] = [],
+    add_index: bool = True,
+    add_splits: bool = True,
+    shard_dir: str | None = None,
+) -> ds.Dataset:
+    """Transforms a data file (CSV or Excel) into a Hugging Face dataset block by block, with bounded memory.
+
+    The file is read in blocks of `chunk_size` rows. Each block is validated, its missing sequences are reconstructed
+    from the mutation codes and its encodings are computed, before it is written to an Arrow shard in `shard_dir`.
+    The returned dataset memory-maps these shards, so files which don't fit in memory,
+    e.g. deep mutational scans with tens of millions of variants, can be processed.
+
+    Args:
+        filename (Union[str, Path]): File name of the source CSV or Excel file.
+        chunk_size (int): Number of rows per block.
+        save_to_path (str, optional): Path to save the Hugging Face dataset. Defaults to None (not saved).
+        filesystem (fsspec.AbstractFileSystem, optional): File system to use for saving. Defaults to None (local filesystem).
+        needed_encodings (list[str] | set[str], optional): Encodings to add to the dataset. Defaults to [] (all available encodings).
+        add_index (bool, optional): Whether to add an index column. Defaults to True.
+        add_splits (bool, optional): Whether to add the split columns. Defaults to True.
+        shard_dir (str, optional): Directory for the Arrow shards. Defaults to None (a new temporary directory,
+            which is removed again if the dataset is saved to the local file system).
+
+    Returns:
+        ds.Dataset: The dataset with all precomputed features.
+
+    Raises:
+        ValueError: If `chunk_size` is not positive, the file has no rows, there is no unique parent sequence to fill in
+            missing sequences or the columns of a block can't be cast to the types of the first block.
+        TypeError: If the file is neither a CSV nor an Excel file.
+
+    Example:
+        >>> import pandas as pd
+        >>> data = pd.DataFrame({"aa_mut": ["T8M", "wildtype", "P3G"],"aa_seq": [None, "GMPKSEFTHC", None],"target foo": [1, 2, 3]})
+        >>> data.to_csv("test_data.csv", index=False)
+        >>> dataset = preprocess_data_chunked("test_data.csv", 2, needed_encodings=["aa_len"], add_splits=False)
+        >>> dataset["aa_seq"]
+        ['GMPKSEFMHC', 'GMPKSEFTHC', 'GMGKSEFTHC']
+
+    Note:
+        Before the blocks are processed, the sequence and mutation columns are read once to find the parent sequence
+        and the longest sequence. Encodings padded to the longest sequence, e.g. one-hot encodings, are padded to
+        the longest sequence of the file in every block, those of the translations of DNA sequences to a third of its
+        length. The sequence type is detected from the columns of the first block.
+        Legacy `.xls` files can't be streamed and are loaded into memory before being processed block by block.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+
+    remove_shards = shard_dir is None
+    if shard_dir is None:
+        shard_dir = tempfile.mkdtemp(prefix="pedata_")
+    os.makedirs(shard_dir, exist_ok=True)
+
+    seq_column, mut_column, parent, offset = None, None, None, None
+    max_lengths = None
+    raw_features = None
+    shard_files = []
+    for block in read_data_blocks(filename, chunk_size):
+        # Perform dataset integrity check of the block
+        check_dataset(ds.Dataset.from_pandas(block, preserve_index=False))
+
+        if raw_features is None:
+            # the sequence type is detected from the columns of the first block
+            seq_column = next(
+                (c for c in ("aa_seq", "dna_seq") if c in block.columns), None
+            )
+            mut_column = {"aa_seq": "aa_mut", "dna_seq": "dna_mut"}.get(seq_column)
+            if seq_column is not None:
+                # the wildtype row may be in any block, and the longest sequence as well
+                columns = [c for c in (seq_column, mut_column) if c in block.columns]
+                parent, longest = scan_sequences(
+                    read_data_blocks(filename, chunk_size, usecols=columns),
+                    seq_column,
+                    mut_column,
+                )
+                max_lengths = {seq_column: len(longest)}
+                if seq_column == "dna_seq":
+                    # translations of DNA sequences are at most a third as long
+                    max_lengths["aa_seq"] = len(longest) // 3
+
+        # Fill missing sequences with the mutated parent sequence
+        if seq_column is not None:
+            missing_values = get_missing_values(block, seq_column)
+            if missing_values.sum() > 0:
+                # a block without any sequence is read as a float column
+                block[seq_column] = block[seq_column].astype(object)
+                block.loc[missing_values, seq_column], offset = mutate_parent(
+                    block.loc[missing_values, mut_column], parent, offset
+                )
+                # the string type of a column read with sequences
+                block[seq_column] = block[seq_column].infer_objects()
+
+        dataset = ds.Dataset.from_pandas(block, preserve_index=False)
+        if raw_features is None:
+            raw_features = dataset.features
+        elif dataset.features != raw_features:
+            try:
+                dataset = dataset.cast(raw_features)
+            except (TypeError, ValueError, pa.ArrowInvalid) as e:
+                raise ValueError(
+                    f"The columns of rows {len(shard_files) * chunk_size} to {len(shard_files) * chunk_size + len(block) - 1} "
+                    f"can't be cast to the types of the first block: {e}"
+                ) from e
+
+        # Add encodings to the block and write it to a shard.
+        # Encodings padded to the longest sequence are padded to the longest sequence of the file in every block.
+        dataset = dataset_base_processing(
+            dataset,
+            needed_encodings=needed_encodings,
+            add_index=False,
+            add_splits=False,
+            max_lengths=max_lengths,
+        )
+        shard_file = os.path.join(shard_dir, f"shard-{len(shard_files):05d}.arrow")
+        with ArrowWriter(path=shard_file, features=dataset.features) as writer:
+            writer.write_table(dataset.with_format(None).data.table)
+            writer.finalize()
+        shard_files.append(shard_file)
+
+    if len(shard_files) == 0:
+        raise ValueError(f"No rows found in {filename}")
+
+    # memory-map all shards, the encodings were added to the blocks already
+    dataset = dataset_base_processing(
+        ds.concatenate_datasets([ds.Dataset.from_file(f) for f in shard_files]),
+        needed_encodings=needed_encodings,
+        add_index=add_index,
+        add_splits=add_splits,
+    )
+
+    # Save the data to a specified path, if provided
+    if save_to_path is not None:
+        dataset.save_to_disk(save_to_path, storage_options=storage_options(filesystem))
+        if remove_shards and (
+            filesystem is None or isinstance(filesystem, LocalFileSystem)
+        ):
+            dataset = ds.load_from_disk(save_to_path)
+            shutil.rmtree(shard_dir)
+
+    return dataset
+
+
+def storage_options(filesystem: fsspec.AbstractFileSystem | None) -> dict | None:
+    """Storage options to save a dataset to a file system
+
+    Args:
+        filesystem: file system, None for the local file system
+
+    Returns:
+        dict | None: the storage options of `filesystem`, None for the local file system
+    """
+    return None if filesystem is None else filesystem.storage_options
+
+
 def load_similarity(
     alphabet_type: str,
     similarity_name: Union[str, List[str]],
@@ -329,7 +558,19 @@ def read_csv_ignore_case(file_path: str) -> pd.DataFrame:
     Returns:
         pd.DataFrame: the dataframe
     """
-    directory, file_name = os.path.split(file_path)
+    return pd.read_csv(find_file_ignore_case(file_path))
+
+
+def find_file_ignore_case(file_path: str) -> str:
+    """Finds a file with a case-insensitive match of its name
+    Args:
+        file_path: path to the file
+    Returns:
+        str: path of the first matching file
+    Raises:
+        FileNotFoundError: If no file matches.
+    """
+    directory, file_name = os.path.split(str(file_path))
     if len(directory) == 0:
         directory = os.getcwd()
     # List all files in the directory
@@ -344,7 +585,104 @@ def read_csv_ignore_case(file_path: str) -> pd.DataFrame:
         raise FileNotFoundError(f"No file found matching: {file_name}")
 
     # Use the first matching file (in case there are multiple matches)
-    matching_file_path = os.path.join(directory, matching_files[0])
+    return os.path.join(directory, matching_files[0])
+
+
+def read_data_blocks(
+    filename: Union[str, Path], chunk_size: int, usecols: list[str] | None = None
+) -> Iterator[pd.DataFrame]:
+    """Reads a CSV or Excel file in blocks of rows
+    Args:
+        filename: path to the file, matched case-insensitively
+        chunk_size: number of rows per block
+        usecols: columns to read. Defaults to None (all columns).
+    Returns:
+        Iterator[pd.DataFrame]: the blocks of rows
+    Raises:
+        TypeError: If the file is neither a CSV nor an Excel file.
+    """
+    name = str(filename).lower()
+    if name.endswith("csv"):
+        return pd.read_csv(
+            find_file_ignore_case(filename), chunksize=chunk_size, usecols=usecols
+        )
+    elif name.endswith("xlsx"):
+        return read_excel_blocks(find_file_ignore_case(filename), chunk_size, usecols)
+    elif name.endswith("xls"):
+        # the legacy format can only be read as a whole
+        df = pd.read_excel(find_file_ignore_case(filename), 0, usecols=usecols)
+        return (
+            df.iloc[start : start + chunk_size].reset_index(drop=True)
+            for start in range(0, len(df), chunk_size)
+        )
+    else:
+        raise TypeError("Invalid input: input either a csv or an excel file")
 
-    # Use pd.read_csv with the found file path
-    return pd.read_csv(matching_file_path)
+
+def read_excel_blocks(
+    file_path: str, chunk_size: int, usecols: list[str] | None = None
+) -> Iterator[pd.DataFrame]:
+    """Streams the rows of the first sheet of an Excel (xlsx) file in blocks
+    Args:
+        file_path: path to the file
+        chunk_size: number of rows per block
+        usecols: columns to read. Defaults to None (all columns).
+    Returns:
+        Iterator[pd.DataFrame]: the blocks of rows, using the first row as header
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows, []))
+        block = []
+        for row in rows:
+            block.append(row)
+            if len(block) == chunk_size:
+                yield pd.DataFrame(block, columns=header)[usecols or header]
+                block = []
+        if len(block) > 0:
+            yield pd.DataFrame(block, columns=header)[usecols or header]
+    finally:
+        workbook.close()
+
+
+def scan_sequences(
+    blocks: Iterable[pd.DataFrame], seq_column: str, mut_column: str
+) -> Tuple[str | None, str]:
+    """Finds the parent sequence, contained in the unique row whose mutation code denotes the wildtype, and the longest sequence
+    Args:
+        blocks: blocks of rows containing the sequence column and, if sequences are missing, the mutation column
+        seq_column: name of the sequence column
+        mut_column: name of the mutation column
+    Returns:
+        Tuple[str | None, str]: the parent sequence, None if no sequence is missing or there is no mutation column,
+            and the longest sequence, including the missing ones, which are mutated parent sequences of the same length
+    Raises:
+        ValueError: If sequences are missing and there is not exactly one wildtype row with a sequence.
+    """
+    parents, longest, any_missing, any_mutations = [], "", False, False
+    for block in blocks:
+        missing = get_missing_values(block, seq_column)
+        any_missing = any_missing or missing.any()
+        sequences = block.loc[~missing, seq_column].astype(str)
+        if len(sequences) > 0:
+            longest = max(longest, sequences.loc[sequences.str.len().idxmax()], key=len)
+        if mut_column in block.columns:
+            any_mutations = True
+            is_wildtype = (
+                block[mut_column]
+                .astype(str)
+                .str.strip()
+                .str.lower()
+                .isin(wildtype_codes)
+            )
+            parents.extend(block.loc[is_wildtype & ~missing, seq_column])
+    if not any_missing or not any_mutations:
+        return None, longest
+    if len(parents) != 1:
+        raise ValueError(
+            f"Data contains {len(parents)} instead of exactly one 'wildtype' entry with a sequence in the '{mut_column}' column."
+        )
+    return parents[0], max(longest, parents[0], key=len)
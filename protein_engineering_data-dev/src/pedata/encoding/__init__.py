@@ -1,18 +1,26 @@
 from .base import EncodingSpec, SklEncodingSpec
+from .cache import EmbeddingCache
 from .transform import (
     FixedSingleColumnTransform,
     NGramFeat,
     SeqStrOneHot,
     SeqStrLen,
+    SeqStrTokens,
     Unirep1900,
     unirep,
+    translate_dna,
     translate_dna_to_aa_seq,
 )
 
 from .transforms_graph import (
     adj_list_to_adjmatr,
     adj_list_to_incidence,
+    adj_lists_to_adjmatrs,
+    adj_lists_to_incidences,
+    return_probabilities,
+    sparse_return_probabilities,
     return_prob_feat,
+    return_prob_feat_sparse,
 )
 
 from .embeddings import (
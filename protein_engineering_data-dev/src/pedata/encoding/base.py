@@ -14,6 +14,7 @@ class EncodingSpec(object):
     func: Union[
         TransformerMixin, Callable
     ]  # transformer/function to be applied to source file
+    cpu_bound: bool = False  # pure CPU encoder which can run in worker processes
 
     def __post_init__(self):
         """Post init function – ensures that provides and requires are lists"""
@@ -0,0 +1,359 @@
+"""Content-addressed on-disk cache for sequence embeddings.
+
+Embeddings computed by protein language models (ESM, Ankh, UniRep) only depend on the model,
+its version and the exact input sequence. `EmbeddingCache` stores them on disk under a key derived from
+these three values, so that re-encoding a dataset only runs the model on sequences that were never seen before.
+
+Layout on disk:
+    <cache_dir>/<model_name>/<model_version>/
+        shard-<id>.npy        embeddings of all sequences written together, concatenated along the first axis
+        shard-<id>.index.npy  structured array (key, offset, rows) locating each sequence in the shard
+
+Every embedding is stored as a 2D array of shape (rows, dim), e.g. (sequence length, embedding dimension)
+for per-residue embeddings. Shards are memory-mapped when read, so looking up embeddings does not load
+the whole cache into memory. At most `max_open_shards` shards are mapped at once, and once more than `max_shards`
+shards were written, the smallest ones are merged into one, so the number of files stays bounded.
+
+Example:
+    >>> import tempfile
+    >>> import numpy as np
+    >>> cache = EmbeddingCache(tempfile.mkdtemp(), "toy_model", "1.0")
+    >>> cache.put_many(["MKV", "MKVL"], [np.ones((3, 2)), np.zeros((4, 2))])
+    >>> len(cache)
+    2
+    >>> cache.get("MKV").shape
+    (3, 2)
+    >>> print(cache.get("MKVA"))
+    None
+"""
+
+import hashlib
+import os
+import uuid
+from collections import OrderedDict
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Sequence, Union
+
+import numpy as np
+
+# structured dtype of the shard index files
+_INDEX_DTYPE = np.dtype([("key", "S64"), ("offset", "<i8"), ("rows", "<i8")])
+
+
+def package_version(package_name: str) -> str:
+    """Get the installed version of a package, used to version cached embeddings.
+
+    Args:
+        package_name (str): Name of the distribution, e.g. "fair-esm".
+
+    Returns:
+        str: The installed version or "unknown" if the package metadata is not available.
+    """
+    try:
+        return metadata.version(package_name)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class EmbeddingCache(object):
+    """On-disk cache mapping (model name, model version, sequence) to an embedding."""
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        model_name: str,
+        model_version: str,
+        dtype: Union[str, np.dtype] = np.float32,
+        max_shards: int = 256,
+        max_open_shards: int = 64,
+    ) -> None:
+        """Constructor for EmbeddingCache.
+
+        Args:
+            cache_dir (Union[str, Path]): Root directory of the cache. Created on first write.
+            model_name (str): Name of the model computing the embeddings.
+            model_version (str): Version of the model. Embeddings of different versions are never mixed.
+            dtype (Union[str, np.dtype], optional): Storage type of the embeddings, float16 halves the disk usage. Defaults to np.float32.
+            max_shards (int, optional): Number of shards above which writing merges the smallest shards. Defaults to 256.
+            max_open_shards (int, optional): Maximum number of memory-mapped shards, each holding a file descriptor. Defaults to 64.
+
+        Raises:
+            ValueError: If `dtype` is neither float16 nor float32.
+        """
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.dtype(np.float16), np.dtype(np.float32)):
+            raise ValueError(
+                f"Embeddings can be cached as float16 or float32, got {self.dtype}"
+            )
+        self.model_name = model_name
+        self.model_version = model_version
+        self.max_shards = max_shards
+        self.max_open_shards = max_open_shards
+        self.path = Path(os.path.expanduser(cache_dir)) / model_name / model_version
+        self._index = {}  # key -> (shard name, offset, rows)
+        self._shards = {}  # shard name -> number of rows
+        self._open = (
+            OrderedDict()
+        )  # shard name -> memory-mapped array, least recently used first
+        self.refresh()
+
+    def __getstate__(self) -> dict:
+        """Pickle without index and memory-mapped shards, which are reloaded from disk when unpickling."""
+        state = self.__dict__.copy()
+        state["_index"] = {}
+        state["_shards"] = {}
+        state["_open"] = OrderedDict()
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore a pickled cache and reload its index from disk."""
+        self.__dict__.update(state)
+        self.refresh()
+
+    def key(self, sequence: str) -> str:
+        """Content address of a sequence embedding.
+
+        Args:
+            sequence (str): The sequence.
+
+        Returns:
+            str: Hex SHA-256 digest of model name, model version and sequence.
+        """
+        return hashlib.sha256(
+            "\0".join([self.model_name, self.model_version, str(sequence)]).encode()
+        ).hexdigest()
+
+    def refresh(self) -> None:
+        """Load the indices of all shards written so far, including by other processes.
+
+        Shards merged away by another process are dropped from the index.
+        """
+        if not self.path.is_dir():
+            return
+        shards = {
+            index_file.name[: -len(".index.npy")]: index_file
+            for index_file in sorted(self.path.glob("shard-*.index.npy"))
+        }
+        if any(shard not in shards for shard in self._shards):
+            self._index, self._shards, self._open = {}, {}, OrderedDict()
+        for shard, index_file in shards.items():
+            if shard in self._shards:
+                continue
+            try:
+                index = np.load(index_file)
+            except FileNotFoundError:  # merged away meanwhile
+                continue
+            self._add_shard(shard, index)
+
+    def _add_shard(self, shard: str, index: np.ndarray) -> None:
+        """Add the entries of a shard index, data is memory-mapped on first access."""
+        self._shards[shard] = int(index["rows"].sum())
+        for key, offset, rows in index:
+            self._index[key.decode()] = (shard, int(offset), int(rows))
+
+    def __len__(self) -> int:
+        """Number of cached sequences."""
+        return len(self._index)
+
+    def __contains__(self, sequence: str) -> bool:
+        """Check if the embedding of a sequence is cached."""
+        return self.key(sequence) in self._index
+
+    def _shard_data(self, shard: str) -> np.ndarray:
+        """Memory-map the data of a shard, unmapping the least recently used shard if too many are mapped."""
+        if shard in self._open:
+            self._open.move_to_end(shard)
+            return self._open[shard]
+        data = np.load(self.path / f"{shard}.npy", mmap_mode="r")
+        self._open[shard] = data
+        while len(self._open) > self.max_open_shards:
+            # the file is closed once no embedding read from it is referenced anymore
+            self._open.popitem(last=False)
+        return data
+
+    def get(self, sequence: str) -> Union[np.ndarray, None]:
+        """Get the cached embedding of a sequence.
+
+        Args:
+            sequence (str): The sequence.
+
+        Returns:
+            Union[np.ndarray, None]: Read-only embedding of shape (rows, dim), or None if it is not cached.
+        """
+        key = self.key(sequence)
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        shard, offset, rows = entry
+        try:
+            data = self._shard_data(shard)
+        except FileNotFoundError:
+            # the shard was merged into another one by another process
+            self.refresh()
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            shard, offset, rows = entry
+            data = self._shard_data(shard)
+        return data[offset : offset + rows]
+
+    def get_many(self, sequences: Sequence[str]) -> list[Union[np.ndarray, None]]:
+        """Get the cached embeddings of several sequences.
+
+        Args:
+            sequences (Sequence[str]): The sequences.
+
+        Returns:
+            list[Union[np.ndarray, None]]: Embedding per sequence, None for sequences which are not cached.
+        """
+        return [self.get(seq) for seq in sequences]
+
+    def put_many(
+        self, sequences: Sequence[str], embeddings: Sequence[np.ndarray]
+    ) -> None:
+        """Write the embeddings of several sequences to a new shard.
+
+        Args:
+            sequences (Sequence[str]): The sequences.
+            embeddings (Sequence[np.ndarray]): Embedding per sequence, either of shape (rows, dim) or (dim,).
+
+        Raises:
+            ValueError: If the number of sequences and embeddings differ or the embedding dimensions are inconsistent.
+        """
+        if len(sequences) != len(embeddings):
+            raise ValueError(
+                f"Got {len(sequences)} sequences but {len(embeddings)} embeddings"
+            )
+        embeddings = [np.asarray(e, dtype=self.dtype) for e in embeddings]
+        embeddings = [e.reshape(1, -1) if e.ndim == 1 else e for e in embeddings]
+        if len(embeddings) == 0:
+            return
+        if len({e.shape[1:] for e in embeddings}) != 1:
+            raise ValueError("All embeddings written together need the same dimension")
+
+        index = np.zeros(len(sequences), dtype=_INDEX_DTYPE)
+        index["key"] = [self.key(seq) for seq in sequences]
+        index["rows"] = [len(e) for e in embeddings]
+        index["offset"] = np.cumsum(index["rows"]) - index["rows"]
+
+        self._write_shard(np.concatenate(embeddings), index)
+        if len(self._shards) > self.max_shards:
+            self.compact(len(self._shards) - self.max_shards // 2 + 1)
+
+    def _write_shard(self, data: np.ndarray, index: np.ndarray) -> None:
+        """Write a new shard and add it to the index.
+
+        The data is written before the index, so readers never see a partially written shard.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        shard = f"shard-{uuid.uuid4().hex}"
+        for name, arr in [(f"{shard}.npy", data), (f"{shard}.index.npy", index)]:
+            tmp_file = self.path / f".{name}.tmp"
+            with open(tmp_file, "wb") as f:
+                np.save(f, arr)
+            os.replace(tmp_file, self.path / name)
+        self._add_shard(shard, index)
+
+    def compact(self, num_shards: Union[int, None] = None) -> None:
+        """Merge the smallest shards into a single one.
+
+        Called by `put_many` once more than `max_shards` shards exist, merging so many shards that `max_shards // 2`
+        remain. Large shards are rarely merged again, so each embedding is only copied a few times.
+
+        Args:
+            num_shards (Union[int, None], optional): Number of shards to merge. Defaults to None (all shards).
+        """
+        self.refresh()
+        shards = sorted(self._shards, key=self._shards.get)[:num_shards]
+        if len(shards) < 2:
+            return
+        merged = {shard: [] for shard in shards}
+        for key, entry in self._index.items():
+            if entry[0] in merged:
+                merged[entry[0]].append((key, entry[1], entry[2]))
+
+        index = np.zeros(sum(len(entries) for entries in merged.values()), _INDEX_DTYPE)
+        index["key"] = [key for entries in merged.values() for key, _, _ in entries]
+        index["rows"] = [rows for entries in merged.values() for _, _, rows in entries]
+        index["offset"] = np.cumsum(index["rows"]) - index["rows"]
+        dim = self._shard_data(shards[0]).shape[1:]
+
+        # rows are copied shard by shard into a memory-mapped file, so merging needs little memory
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path / f".merge-{uuid.uuid4().hex}.npy.tmp"
+        data = np.lib.format.open_memmap(
+            tmp_file,
+            mode="w+",
+            dtype=self.dtype,
+            shape=(int(index["rows"].sum()),) + dim,
+        )
+        start = 0
+        for shard, entries in merged.items():
+            source = self._shard_data(shard)
+            for _, offset, rows in entries:
+                data[start : start + rows] = source[offset : offset + rows]
+                start += rows
+        data.flush()
+        del data
+
+        shard = f"shard-{uuid.uuid4().hex}"
+        os.replace(tmp_file, self.path / f"{shard}.npy")
+        index_file = self.path / f".{shard}.index.npy.tmp"
+        with open(index_file, "wb") as f:
+            np.save(f, index)
+        os.replace(index_file, self.path / f"{shard}.index.npy")
+
+        # the merged shards are removed index first, so readers never find an index without data
+        for old in shards:
+            self._open.pop(old, None)
+            del self._shards[old]
+            for name in (f"{old}.index.npy", f"{old}.npy"):
+                try:
+                    os.remove(self.path / name)
+                except (
+                    FileNotFoundError
+                ):  # removed by another process merging the same shard
+                    pass
+        self._add_shard(shard, index)
+
+
+def embed_with_cache(
+    sequences: Sequence[str],
+    embed_fn: Callable[[list[str]], Sequence[np.ndarray]],
+    cache: Union[EmbeddingCache, None] = None,
+) -> list[np.ndarray]:
+    """Embed sequences, running `embed_fn` only on the unique sequences which are not cached yet.
+
+    Args:
+        sequences (Sequence[str]): The sequences to embed.
+        embed_fn (Callable[[list[str]], Sequence[np.ndarray]]): Function computing one embedding per input sequence.
+        cache (Union[EmbeddingCache, None], optional): Cache to look up and store embeddings. Defaults to None (no caching).
+
+    Returns:
+        list[np.ndarray]: One embedding per input sequence, in the input order.
+
+    Example:
+        >>> import tempfile
+        >>> cache = EmbeddingCache(tempfile.mkdtemp(), "toy_model", "1.0")
+        >>> calls = []
+        >>> def embed(seqs):
+        ...     calls.append(seqs)
+        ...     return [np.full((len(s), 1), len(s)) for s in seqs]
+        >>> _ = embed_with_cache(["MK", "MKV", "MK"], embed, cache)
+        >>> _ = embed_with_cache(["MK", "MKVL"], embed, cache)
+        >>> calls
+        [['MK', 'MKV'], ['MKVL']]
+    """
+    sequences = [str(seq) for seq in sequences]
+    if cache is None:
+        return list(embed_fn(sequences))
+
+    results = cache.get_many(sequences)
+    missing = list(dict.fromkeys(s for s, r in zip(sequences, results) if r is None))
+    if len(missing) > 0:
+        computed = [np.asarray(e, dtype=cache.dtype) for e in embed_fn(missing)]
+        cache.put_many(missing, computed)
+        computed = dict(zip(missing, computed))
+        results = [computed[s] if r is None else r for s, r in zip(sequences, results)]
+    return results
@@ -1,8 +1,191 @@
 from sklearn.base import BaseEstimator, TransformerMixin
+import copy
+import numpy as np
 import torch
 import ankh
 import esm
-from typing import Iterable
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, Sequence, Union
+from .cache import EmbeddingCache, embed_with_cache, package_version
+
+# default number of (padded) tokens the language models process in a single forward pass
+DEFAULT_MAX_TOKENS = 8192
+
+
+def length_bucketed_batches(lengths: list[int], max_tokens: int) -> list[list[int]]:
+    """Group sequences into batches of similar length, each with a bounded number of padded tokens.
+
+    Sequences are sorted by length and batches are filled greedily, such that the batch size times the length
+    of the longest sequence in the batch does not exceed `max_tokens`. Sequences longer than `max_tokens` are
+    put in a batch of their own.
+
+    Args:
+        lengths (list[int]): Number of tokens of each sequence.
+        max_tokens (int): Maximum number of tokens in a batch, including padding.
+
+    Returns:
+        list[list[int]]: Indices of the sequences in each batch.
+
+    Raises:
+        ValueError: If `max_tokens` is not positive.
+
+    Example:
+        >>> length_bucketed_batches([5, 2, 9, 3, 2], max_tokens=9)
+        [[1, 4, 3], [0], [2]]
+    """
+    if max_tokens < 1:
+        raise ValueError(f"max_tokens must be positive, got {max_tokens}")
+
+    batches = []
+    current = []
+    for i in np.argsort(lengths, kind="stable").tolist():
+        # sorted by length, so the current sequence determines the padded length of the batch
+        if len(current) > 0 and (len(current) + 1) * lengths[i] > max_tokens:
+            batches.append(current)
+            current = []
+        current.append(i)
+    if len(current) > 0:
+        batches.append(current)
+    return batches
+
+
+def batched_embed(
+    sequences: list[str],
+    embed_fn: Callable[[list[str]], list[np.ndarray]],
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    num_special_tokens: int = 2,
+) -> list[np.ndarray]:
+    """Embed sequences in length-bucketed batches and restore the original order.
+
+    Sorting by length avoids spending most of the compute on padding when sequence lengths vary,
+    and the token budget bounds the memory needed for a single forward pass.
+
+    Args:
+        sequences (list[str]): The sequences to embed.
+        embed_fn (Callable[[list[str]], list[np.ndarray]]): Function computing one embedding per sequence of a batch.
+        max_tokens (int, optional): Maximum number of tokens in a batch, including padding. Defaults to DEFAULT_MAX_TOKENS.
+        num_special_tokens (int, optional): Number of tokens the tokenizer adds to each sequence. Defaults to 2.
+
+    Returns:
+        list[np.ndarray]: One embedding per sequence, in the input order.
+
+    Example:
+        >>> batched_embed(["MKV", "M", "MK"], lambda b: [len(s) for s in b], max_tokens=8)
+        [3, 1, 2]
+    """
+    lengths = [len(seq) + num_special_tokens for seq in sequences]
+    rval = [None] * len(sequences)
+    for batch in length_bucketed_batches(lengths, max_tokens):
+        for i, emb in zip(batch, embed_fn([sequences[i] for i in batch])):
+            rval[i] = emb
+    return rval
+
+
+def pad_embeddings(
+    embeddings: list[np.ndarray], length: Union[int, None] = None
+) -> np.ndarray:
+    """Stack per-residue embeddings of different length, zero-padding them to the longest one.
+
+    Args:
+        embeddings (list[np.ndarray]): Embeddings of shape (len_i, dim).
+        length (Union[int, None], optional): Length to pad to, at least max_i len_i. Defaults to None (max_i len_i).
+
+    Returns:
+        np.ndarray: Array of shape (len(embeddings), length, dim).
+
+    Raises:
+        ValueError: If an embedding is longer than `length`.
+
+    Example:
+        >>> pad_embeddings([np.ones((1, 2)), np.ones((2, 2))]).tolist()
+        [[[1.0, 1.0], [0.0, 0.0]], [[1.0, 1.0], [1.0, 1.0]]]
+        >>> pad_embeddings([np.ones((1, 2))], length=2).tolist()
+        [[[1.0, 1.0], [0.0, 0.0]]]
+    """
+    max_len = max(len(e) for e in embeddings)
+    if length is not None:
+        if length < max_len:
+            raise ValueError(
+                f"Cannot pad embeddings of length {max_len} to length {length}"
+            )
+        max_len = length
+    rval = np.zeros(
+        (len(embeddings), max_len) + embeddings[0].shape[1:],
+        dtype=np.result_type(*embeddings),
+    )
+    for i, e in enumerate(embeddings):
+        rval[i, : len(e)] = e
+    return rval
+
+
+def mean_embeddings(embeddings: np.ndarray, num_tokens: Sequence[int]) -> np.ndarray:
+    """Average zero-padded per-token embeddings over the tokens of each sequence, ignoring the padding.
+
+    This equals pooling with "mean" (see `pool_hidden_states`), computed from stored per-token embeddings.
+
+    Args:
+        embeddings (np.ndarray): Zero-padded embeddings of shape (num_sequences, max_num_tokens, dim).
+        num_tokens (Sequence[int]): Number of tokens of each sequence, including special tokens.
+
+    Returns:
+        np.ndarray: Array of shape (num_sequences, dim).
+
+    Example:
+        >>> mean_embeddings(np.array([[[1.0], [3.0]], [[2.0], [0.0]]]), [2, 1]).tolist()
+        [[2.0], [2.0]]
+    """
+    num_tokens = np.asarray(num_tokens, dtype=embeddings.dtype)
+    return embeddings.sum(axis=1) / np.maximum(num_tokens, 1)[:, None]
+
+
+# supported ways to pool per-token representations into a single vector per sequence
+POOLINGS = ("mean", "masked_mean", "cls", "max")
+
+
+def pool_hidden_states(
+    hidden: torch.Tensor,
+    attention_mask: torch.Tensor,
+    special_tokens_mask: torch.Tensor,
+    pooling: str,
+) -> torch.Tensor:
+    """Pool per-token representations of a batch into one vector per sequence.
+
+    Args:
+        hidden (torch.Tensor): Representations of shape (batch size, num_tokens, dim).
+        attention_mask (torch.Tensor): Boolean mask of shape (batch size, num_tokens), False for padding.
+        special_tokens_mask (torch.Tensor): Boolean mask of shape (batch size, num_tokens), True for special tokens such as CLS and EOS.
+        pooling (str): One of
+            "mean": mean over all tokens of a sequence, ignoring padding,
+            "masked_mean": mean over the residues of a sequence, ignoring padding and special tokens,
+            "cls": representation of the first token,
+            "max": elementwise maximum over all tokens of a sequence, ignoring padding.
+
+    Returns:
+        torch.Tensor: Pooled representations of shape (batch size, dim).
+
+    Raises:
+        ValueError: If `pooling` is not supported.
+
+    Example:
+        >>> hidden = torch.tensor([[[1.0], [2.0], [6.0]], [[1.0], [4.0], [0.0]]])
+        >>> attention_mask = torch.tensor([[True, True, True], [True, True, False]])
+        >>> special_tokens_mask = torch.tensor([[True, False, False], [True, False, False]])
+        >>> pool_hidden_states(hidden, attention_mask, special_tokens_mask, "masked_mean")
+        tensor([[4.],
+                [4.]])
+    """
+    if pooling not in POOLINGS:
+        raise ValueError(f"Pooling must be one of {POOLINGS}, got {pooling}")
+    if pooling == "cls":
+        return hidden[:, 0]
+    mask = attention_mask
+    if pooling == "masked_mean":
+        mask = attention_mask & ~special_tokens_mask
+    mask = mask.unsqueeze(-1)
+    if pooling == "max":
+        return hidden.masked_fill(~mask, float("-inf")).max(dim=1).values
+    return (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
 
 
 class ESM(BaseEstimator, TransformerMixin):
@@ -10,6 +193,11 @@ class ESM(BaseEstimator, TransformerMixin):
     ESM (Evolutionary Scale Modeling) transformer for sequence transformation using a pre-trained model.
 
     This class provides a transformer interface to apply the ESM model for sequence transformation tasks.
+    If a cache directory is given, embeddings are stored on disk and the model only runs on sequences not seen before.
+    Sequences are processed in length-bucketed batches of at most `max_tokens` tokens.
+    Representations of padding positions are set to zero.
+    With `pooling`, the per-token representations are reduced to one vector per sequence inside the forward pass
+    (see `pool_hidden_states`), so the full per-residue tensor is never materialized.
 
     Example:
         >>> input_sequences = ["ATGC", "GCTA"]
@@ -19,13 +207,51 @@ class ESM(BaseEstimator, TransformerMixin):
         -0.03196815401315689
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        cache_dir: Union[str, Path, None] = None,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        pooling: Union[str, None] = None,
+    ) -> None:
         """
         Initializes the ESM transformer by loading the pre-trained model and its tokenizer.
+
+        Args:
+            cache_dir (Union[str, Path, None], optional): Directory of the embedding cache. Defaults to None (no caching).
+            max_tokens (int, optional): Maximum number of tokens in a batch, including padding. Defaults to DEFAULT_MAX_TOKENS.
+            pooling (Union[str, None], optional): One of `POOLINGS` to return a single vector per sequence. Defaults to None (per-token representations).
         """
 
-        self.model, alphabet = esm.pretrained.esm2_t6_8M_UR50D()
-        self.tokenizer = alphabet.get_batch_converter()
+        self.model, self.alphabet = esm.pretrained.esm2_t6_8M_UR50D()
+        self.tokenizer = self.alphabet.get_batch_converter()
+        self.max_tokens = max_tokens
+        self.cache_dir = cache_dir
+        self._set_pooling(pooling)
+
+    def _set_pooling(self, pooling: Union[str, None]) -> None:
+        """Set the pooling and the embedding cache matching it."""
+        if pooling is not None and pooling not in POOLINGS:
+            raise ValueError(f"Pooling must be one of {POOLINGS}, got {pooling}")
+        self.pooling = pooling
+        self.cache = None
+        if self.cache_dir is not None:
+            version = f"{package_version('fair-esm')}-layer6"
+            if pooling is not None:
+                version += f"-{pooling}"
+            self.cache = EmbeddingCache(self.cache_dir, "esm2_t6_8M_UR50D", version)
+
+    def with_pooling(self, pooling: Union[str, None]) -> "ESM":
+        """Copy of this transformer returning pooled representations, sharing the loaded model.
+
+        Args:
+            pooling (Union[str, None]): One of `POOLINGS`, or None for per-token representations.
+
+        Returns:
+            ESM: The pooled transformer.
+        """
+        rval = copy.copy(self)
+        rval._set_pooling(pooling)
+        return rval
 
     def fit(self, X):
         """
@@ -41,15 +267,19 @@ class ESM(BaseEstimator, TransformerMixin):
 
         return self.model
 
-    def transform(self, X: Iterable[str]) -> list:
+    def transform(
+        self, X: Iterable[str], pad_length: Union[int, None] = None
+    ) -> np.ndarray:
         """
         Transforms the input sequences into their ESM representations.
 
         Args:
             X: Input an iterable object of strings.
+            pad_length (Union[int, None], optional): Number of tokens to pad the representations to. Defaults to None (max_num_tokens).
 
         Returns:
-            Transformed representations of the input sequences as a nested list.
+            Transformed representations of the input sequences as an array of shape (num_sequences, max_num_tokens, dim),
+            or (num_sequences, dim) if pooled.
         """
 
         # Check if X is not an iterable object of strings
@@ -61,20 +291,88 @@ class ESM(BaseEstimator, TransformerMixin):
         ):
             raise ValueError("Input X must be a non-empty list of strings.")
 
+        embeddings = embed_with_cache(
+            X,
+            partial(batched_embed, embed_fn=self._embed, max_tokens=self.max_tokens),
+            self.cache,
+        )
+
+        # Return the transformed representations
+        if self.pooling is not None:
+            return np.stack([e.reshape(-1) for e in embeddings])
+        return pad_embeddings(embeddings, pad_length)
+
+    def max_num_tokens(
+        self, X: Iterable[str], max_length: Union[int, None] = None
+    ) -> int:
+        """Number of tokens of the longest sequence, including the CLS and EOS tokens.
+
+        Args:
+            X: Dataset with an `aa_seq` column.
+            max_length (Union[int, None], optional): Length of the longest sequence, if known,
+                e.g. of a whole file encoded in blocks. Defaults to None (longest sequence of `X`).
+
+        Returns:
+            int: The length `map_func` pads the representations of every batch of `X` to.
+        """
+        if max_length is None:
+            max_length = max(len(seq) for seq in X["aa_seq"])
+        return max_length + 2
+
+    def map_func(
+        self, X: Iterable[str], pad_length: Union[int, None] = None
+    ) -> np.ndarray:
+        """
+        This supports the batch encoding option of config.encoding_specs.add_encodings method.
+        It is a wrapper for the transform method.
+
+        Args:
+            X: Input an iterable object of strings.
+            pad_length (Union[int, None], optional): Number of tokens to pad the representations to,
+                `max_num_tokens` of the whole dataset so that all batches have the same shape. Defaults to None.
+
+        Returns:
+            Transformed representations of the input sequences as an array of shape (num_sequences, pad_length, dim).
+        """
+        return self.transform(X["aa_seq"], pad_length)
+
+    def _embed(self, X: list[str]) -> list[np.ndarray]:
+        """Run the ESM model on a list of sequences.
+
+        Args:
+            X: List of sequences.
+
+        Returns:
+            list[np.ndarray]: Representations of each sequence, including the special tokens but without padding.
+                Vectors of shape (dim,) if pooled.
+        """
         # Convert the input sequences into a format compatible with the ESM model
         sequence = [("", seq) for seq in X]
 
         # Convert the sequence pairs into batch tokens using the tokenizer
         _, _, batch_tokens = self.tokenizer(sequence)
+        attention_mask = batch_tokens != self.alphabet.padding_idx
 
         with torch.no_grad():
             # Execute the pre-trained model with the batch tokens and retrieve representations from the 6th layer
-            model_outputs = self.model(
-                batch_tokens, repr_layers=[6], return_contacts=True
-            )
-
-        # Return the transformed representations
-        return model_outputs["representations"][6].numpy().tolist()
+            model_outputs = self.model(batch_tokens, repr_layers=[6])
+            representations = model_outputs["representations"][6]
+            if self.pooling is not None:
+                special_tokens_mask = (batch_tokens == self.alphabet.cls_idx) | (
+                    batch_tokens == self.alphabet.eos_idx
+                )
+                return list(
+                    pool_hidden_states(
+                        representations,
+                        attention_mask,
+                        special_tokens_mask,
+                        self.pooling,
+                    ).numpy()
+                )
+
+        representations = representations.numpy()
+        lengths = attention_mask.sum(axis=1).tolist()
+        return [r[:n] for r, n in zip(representations, lengths)]
 
 
 class Ankh(BaseEstimator, TransformerMixin):
@@ -83,6 +381,7 @@ class Ankh(BaseEstimator, TransformerMixin):
 
     The Ankh class provides a transformer interface to apply the Ankh model for sequence transformation tasks.
     It utilizes a pre-trained model and tokenizer to convert input sequences into their Ankh representations.
+    If a cache directory is given, embeddings are stored on disk and the model only runs on sequences not seen before.
 
     Usage:
         ankh = Ankh()
@@ -96,12 +395,19 @@ class Ankh(BaseEstimator, TransformerMixin):
         -0.010837498120963573
     """
 
-    def __init__(self) -> None:
+    def __init__(self, cache_dir: Union[str, Path, None] = None) -> None:
         """
         Initializes the Ankh transformer by loading the pre-trained model and its tokenizer.
+
+        Args:
+            cache_dir (Union[str, Path, None], optional): Directory of the embedding cache. Defaults to None (no caching).
         """
 
         self.model, self.tokenizer = ankh.load_base_model()
+        self.cache_dir = cache_dir
+        self.cache = None
+        if cache_dir is not None:
+            self.cache = EmbeddingCache(cache_dir, "ankh_base", package_version("ankh"))
 
     def fit(self, X):
         """
@@ -116,7 +422,7 @@ class Ankh(BaseEstimator, TransformerMixin):
         """
         return self.model
 
-    def transform(self, X: Iterable[str]) -> list:
+    def transform(self, X: Iterable[str]) -> np.ndarray:
         """
         Transforms the input sequences into their Ankh representations.
 
@@ -124,7 +430,7 @@ class Ankh(BaseEstimator, TransformerMixin):
             X: Input an iterable object of strings.
 
         Returns:
-            Transformed representations of the input sequences as a nested list.
+            Transformed representations of the input sequences as an array of shape (num_sequences, max_num_tokens, dim).
         """
 
         # Check if X is not an iterable object of strings
@@ -136,6 +442,20 @@ class Ankh(BaseEstimator, TransformerMixin):
         ):
             raise ValueError("Input X must be a non-empty list of strings.")
 
+        embeddings = embed_with_cache(X, self._embed, self.cache)
+
+        # Return the transformed representations
+        return pad_embeddings(embeddings)
+
+    def _embed(self, X: list[str]) -> list[np.ndarray]:
+        """Run the Ankh model on a list of sequences.
+
+        Args:
+            X: List of sequences.
+
+        Returns:
+            list[np.ndarray]: Representations of each sequence, including the special tokens but without padding.
+        """
         # Convert the input sequences into a format compatible with the Ankh model
         sequence = [list(seq) for seq in X]
 
@@ -154,8 +474,9 @@ class Ankh(BaseEstimator, TransformerMixin):
                 input_ids=outputs["input_ids"], attention_mask=outputs["attention_mask"]
             )
 
-        # Return the transformed representations
-        return embeddings["last_hidden_state"].numpy().tolist()
+        representations = embeddings["last_hidden_state"].numpy()
+        lengths = outputs["attention_mask"].sum(axis=1).tolist()
+        return [r[:n] for r, n in zip(representations, lengths)]
 
 
 class AnkhBatched(BaseEstimator, TransformerMixin):
@@ -168,6 +489,11 @@ class AnkhBatched(BaseEstimator, TransformerMixin):
     The difference between Ankh and AnkhBatched is that AnkhBatched sends a batch of sequences to Ankh model at once.
     It is faster than Ankh but requires more memory.
     Also the outputs are padded to the same length. This avoids the need for manually padding in the downstream tasks.
+    Sequences are sent to the model in length-bucketed batches of at most `max_tokens` tokens, so that little compute
+    is spent on padding and memory use is bounded.
+    If a cache directory is given, embeddings are stored on disk and the model only runs on sequences not seen before.
+    With `pooling`, the per-token representations are reduced to one vector per sequence inside the forward pass
+    (see `pool_hidden_states`), so the full per-residue tensor is never materialized.
 
     Usage:
         ankh = Ankh()
@@ -181,13 +507,51 @@ class AnkhBatched(BaseEstimator, TransformerMixin):
         -0.010837498120963573
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        cache_dir: Union[str, Path, None] = None,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        pooling: Union[str, None] = None,
+    ) -> None:
         """
         Initializes the Ankh transformer by loading the pre-trained model and its tokenizer.
+
+        Args:
+            cache_dir (Union[str, Path, None], optional): Directory of the embedding cache. Defaults to None (no caching).
+            max_tokens (int, optional): Maximum number of tokens in a batch, including padding. Defaults to DEFAULT_MAX_TOKENS.
+            pooling (Union[str, None], optional): One of `POOLINGS` to return a single vector per sequence. Defaults to None (per-token representations).
         """
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model, self.tokenizer = ankh.load_base_model()
         self.model = self.model.to(self.device)
+        self.max_tokens = max_tokens
+        self.cache_dir = cache_dir
+        self._set_pooling(pooling)
+
+    def _set_pooling(self, pooling: Union[str, None]) -> None:
+        """Set the pooling and the embedding cache matching it."""
+        if pooling is not None and pooling not in POOLINGS:
+            raise ValueError(f"Pooling must be one of {POOLINGS}, got {pooling}")
+        self.pooling = pooling
+        self.cache = None
+        if self.cache_dir is not None:
+            version = package_version("ankh")
+            if pooling is not None:
+                version += f"-{pooling}"
+            self.cache = EmbeddingCache(self.cache_dir, "ankh_base", version)
+
+    def with_pooling(self, pooling: Union[str, None]) -> "AnkhBatched":
+        """Copy of this transformer returning pooled representations, sharing the loaded model.
+
+        Args:
+            pooling (Union[str, None]): One of `POOLINGS`, or None for per-token representations.
+
+        Returns:
+            AnkhBatched: The pooled transformer.
+        """
+        rval = copy.copy(self)
+        rval._set_pooling(pooling)
+        return rval
 
     def fit(self, X):
         """
@@ -202,15 +566,19 @@ class AnkhBatched(BaseEstimator, TransformerMixin):
         """
         return self.model
 
-    def transform(self, X: Iterable[str]) -> list:
+    def transform(
+        self, X: Iterable[str], pad_length: Union[int, None] = None
+    ) -> np.ndarray:
         """
         Transforms the input sequences into their Ankh representations.
 
         Args:
             X: Input an iterable object of strings.
+            pad_length (Union[int, None], optional): Number of tokens to pad the representations to. Defaults to None (max_num_tokens).
 
         Returns:
-            Transformed representations of the input sequences as a nested list.
+            Transformed representations of the input sequences as an array of shape (num_sequences, max_num_tokens, dim),
+            or (num_sequences, dim) if pooled.
         """
         # Check if X is not an iterable object of strings
         if (
@@ -220,6 +588,29 @@ class AnkhBatched(BaseEstimator, TransformerMixin):
         ):
             raise ValueError("Input X must be a non-empty list of strings.")
 
+        embeddings = embed_with_cache(
+            X,
+            partial(
+                batched_embed,
+                embed_fn=self._embed,
+                max_tokens=self.max_tokens,
+                num_special_tokens=1,  # end of sequence token
+            ),
+            self.cache,
+        )
+        if self.pooling is not None:
+            return np.stack([e.reshape(-1) for e in embeddings])
+        return pad_embeddings(embeddings, pad_length)
+
+    def _embed(self, X: list[str]) -> list[np.ndarray]:
+        """Run the Ankh model on a list of sequences.
+
+        Args:
+            X: List of sequences.
+
+        Returns:
+            list[np.ndarray]: Representations of each sequence, including the special tokens but without padding.
+        """
         sequence = [list(seq) for seq in X]
         outputs = self.tokenizer.batch_encode_plus(
             sequence,
@@ -233,18 +624,54 @@ class AnkhBatched(BaseEstimator, TransformerMixin):
                 input_ids=outputs["input_ids"].to(self.device),
                 attention_mask=outputs["attention_mask"].to(self.device),
             )
-        output = embeddings["last_hidden_state"].cpu().numpy().tolist()
-        return output
+            if self.pooling is not None:
+                special_tokens_mask = torch.isin(
+                    outputs["input_ids"], torch.tensor(self.tokenizer.all_special_ids)
+                )
+                return list(
+                    pool_hidden_states(
+                        embeddings["last_hidden_state"],
+                        outputs["attention_mask"].bool().to(self.device),
+                        special_tokens_mask.to(self.device),
+                        self.pooling,
+                    )
+                    .cpu()
+                    .numpy()
+                )
+        representations = embeddings["last_hidden_state"].cpu().numpy()
+        lengths = outputs["attention_mask"].sum(axis=1).tolist()
+        return [r[:n] for r, n in zip(representations, lengths)]
+
+    def max_num_tokens(
+        self, X: Iterable[str], max_length: Union[int, None] = None
+    ) -> int:
+        """Number of tokens of the longest sequence, including the EOS token.
+
+        Args:
+            X: Dataset with an `aa_seq` column.
+            max_length (Union[int, None], optional): Length of the longest sequence, if known,
+                e.g. of a whole file encoded in blocks. Defaults to None (longest sequence of `X`).
+
+        Returns:
+            int: The length `map_func` pads the representations of every batch of `X` to.
+        """
+        if max_length is None:
+            max_length = max(len(seq) for seq in X["aa_seq"])
+        return max_length + 1
 
-    def map_func(self, X: Iterable[str]) -> list:
+    def map_func(
+        self, X: Iterable[str], pad_length: Union[int, None] = None
+    ) -> np.ndarray:
         """
         This supports the batch encoding option of config.encoding_specs.add_encodings method.
         It is a wrapper for the transform method.
 
         Args:
             X: Input an iterable object of strings.
+            pad_length (Union[int, None], optional): Number of tokens to pad the representations to,
+                `max_num_tokens` of the whole dataset so that all batches have the same shape. Defaults to None.
 
         Returns:
-            Transformed representations of the input sequences as a nested list.
+            Transformed representations of the input sequences as an array of shape (num_sequences, pad_length, dim).
         """
-        return self.transform(X["aa_seq"])
+        return self.transform(X["aa_seq"], pad_length)
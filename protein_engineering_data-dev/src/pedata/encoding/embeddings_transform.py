@@ -1,7 +1,11 @@
 import itertools
+from typing import Callable, Iterable, Iterator, Optional, Union
+
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from scipy.linalg import fractional_matrix_power
-from sklearn.cluster import KMeans
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.cluster import KMeans, MiniBatchKMeans
 
 
 def linear_kernel(x: np.array, y: np.array) -> np.array:
@@ -57,6 +61,8 @@ def reshape_1hot(one_hot_array: np.ndarray, len_seq: int, len_aa: int) -> np.nda
         This works with `df["aa_1hot"].reshape(len(df), len_seq, len_aa)` because the one hot encoding is padded with zeros.
         Padding can be done when turning a string of a sequence into a numpy array of characters in `seq_strings_to_array`.
         `SeqStrOneHot` uses this when turning sequences into one hot encodings and guarantees the same length. The pad character is there translated to an all-zero "1hot"-encoding.
+        The same array is obtained from the much smaller "aa_tokens" encoding with
+        `tokens_to_one_hot(df["aa_tokens"], len(padded_aa_alphabet), "padded")`, e.g. as input of the k-mer embeddings below.
     """
     if not isinstance(one_hot_array, np.ndarray):
         raise TypeError("one_hot_array should be a numpy array")
@@ -64,6 +70,63 @@ def reshape_1hot(one_hot_array: np.ndarray, len_seq: int, len_aa: int) -> np.nda
     return one_hot_array.reshape(len(one_hot_array), len_seq, len_aa)
 
 
+def _float_embeddings(
+    emb_list: list, kmer_size: int
+) -> Union[np.ndarray, list[np.ndarray]]:
+    """Embeddings as float64 arrays, keeping a padded (N, len_seq, len_aa) tensor as a single array.
+
+    Args:
+        emb_list (list): list of embeddings of shape (len_seq, len_aa), or an array of shape (N, len_seq, len_aa)
+        kmer_size (int): length of the kmer
+
+    Raises:
+        ValueError: If a sequence is shorter than `kmer_size`.
+
+    Returns:
+        Union[np.ndarray, list[np.ndarray]]: The embeddings.
+    """
+    if isinstance(emb_list, np.ndarray) and emb_list.ndim == 3:
+        embs = emb_list.astype(np.float64, copy=False)
+    else:
+        embs = [np.asarray(emb, dtype=np.float64) for emb in emb_list]
+    if min(len(emb) for emb in embs) < kmer_size:
+        raise ValueError(f"All sequences need at least kmer_size={kmer_size} positions")
+    return embs
+
+
+def _kmer_means(
+    embs: Union[np.ndarray, list[np.ndarray]], kmer_size: int
+) -> np.ndarray:
+    """Mean of the k-mers of each sequence, see `kmers_mean_embeddings`.
+
+    Args:
+        embs (Union[np.ndarray, list[np.ndarray]]): float embeddings of shape (len_seq, len_aa), at least `kmer_size` long
+        kmer_size (int): length of the kmer
+
+    Returns:
+        np.ndarray: mean k-mers of shape (num_sequences, kmer_size * len_aa)
+    """
+    k = kmer_size
+    lengths = np.array([len(emb) for emb in embs])
+    d = embs[0].shape[1]
+
+    # Position t of the mean k-mer is the mean of positions t, ..., n - k + t of the sequence,
+    # i.e. a difference of prefix sums over all positions of all sequences
+    prefix_sums = np.zeros((lengths.sum() + 1, d))
+    np.cumsum(
+        embs.reshape(-1, d) if isinstance(embs, np.ndarray) else np.concatenate(embs),
+        axis=0,
+        out=prefix_sums[1:],
+    )
+    starts = np.cumsum(lengths) - lengths
+    num_kmers = lengths - k + 1
+    first = starts[:, None] + np.arange(k)
+    U = (prefix_sums[first + num_kmers[:, None]] - prefix_sums[first]).reshape(
+        len(embs), k * d
+    ) / num_kmers[:, None]
+    return U
+
+
 def kmers_mean_embeddings(emb_list: list, kmer_size: int) -> np.array:
     """
     Compute the mean of kmer embeddings of length k for each sequence
@@ -91,16 +154,7 @@ def kmers_mean_embeddings(emb_list: list, kmer_size: int) -> np.array:
         >>> U_norm.shape
         (21, 2100)
     """
-    k = kmer_size
-    d = emb_list[0].shape[1]
-    U = np.zeros((len(emb_list), k * d))
-    for i in range(0, len(emb_list)):
-        # print(i)
-        n = emb_list[i].shape[0]
-        X = np.zeros((n - k + 1, k * d))
-        for j in range(0, n - k + 1):
-            X[j, :] = emb_list[i][j : j + k, :].reshape(1, -1)
-        U[i, :] = np.mean(X, axis=0)
+    U = _kmer_means(_float_embeddings(emb_list, kmer_size), kmer_size)
     U_norm = U / np.linalg.norm(U, axis=1)[:, None]
     return U, U_norm
 
@@ -142,19 +196,30 @@ def kmer_embeddings_centers(emb_list_train: list, kmer_size: int) -> np.array:
 
 
     """
-    d = emb_list_train[0].shape[1]
-    n_train = len(emb_list_train)
     k = kmer_size
-
-    kmer_list = []
-    for i in range(0, n_train):
-        seq_length = emb_list_train[i].shape[0]
-        X = np.zeros((seq_length - k + 1, k * d))
-        for j in range(0, seq_length - k + 1):
-            X[j, :] = emb_list_train[i][j : j + k, :].reshape(1, -1)
-        kmer_list.append(X)
-
-    U = np.unique(np.array(list(itertools.chain.from_iterable(kmer_list))), axis=0)
+    embs = _float_embeddings(emb_list_train, k)
+    d = embs[0].shape[1]
+
+    # k-mers are views of the embeddings, with a padded (N, len_seq, len_aa) tensor windowed at once
+    if isinstance(embs, np.ndarray):
+        kmer_list = list(
+            sliding_window_view(embs, (k, d), axis=(1, 2))[:, :, 0].reshape(
+                len(embs), -1, k * d
+            )
+        )
+    else:
+        kmer_list = [
+            sliding_window_view(emb, (k, d))[:, 0].reshape(-1, k * d) for emb in embs
+        ]
+
+    # Unique k-mers are found among k-mers of row ids instead of k * len_aa values. The ids are ranks of the
+    # unique rows, so the k-mers are sorted like `np.unique` sorts their values.
+    rows, row_ids = np.unique(np.concatenate(list(embs)), axis=0, return_inverse=True)
+    row_ids = np.split(row_ids.reshape(-1), np.cumsum([len(emb) for emb in embs])[:-1])
+    kmer_ids = np.unique(
+        np.concatenate([sliding_window_view(ids, k) for ids in row_ids]), axis=0
+    )
+    U = rows[kmer_ids].reshape(-1, k * d)
     # l2 norm
     U1 = U / np.linalg.norm(U, axis=1)[:, None]
     return kmer_list, U1
@@ -214,3 +279,209 @@ def rkhs_kmer_embeddings(
             Kn @ kernel_fn(l2_norm_centers, kmer_list_data[i])
         ).mean(axis=1)
     return rkhs_kmer_emb_list
+
+
+def _iter_kmers(emb_list: Iterable[np.ndarray], kmer_size: int) -> Iterator[np.ndarray]:
+    """Iterate over the k-mers of each sequence, without materializing the k-mers of all sequences.
+
+    Args:
+        emb_list (Iterable[np.ndarray]): embeddings of shape (len_seq, len_aa), e.g. an array of shape (N, len_seq, len_aa) or a generator
+        kmer_size (int): length of the kmer
+
+    Raises:
+        ValueError: If a sequence is shorter than `kmer_size`.
+
+    Yields:
+        np.ndarray: view of the k-mers of a sequence, of shape (len_seq - kmer_size + 1, kmer_size * len_aa)
+    """
+    for emb in emb_list:
+        emb = np.asarray(emb, dtype=np.float64)
+        if len(emb) < kmer_size:
+            raise ValueError(
+                f"All sequences need at least kmer_size={kmer_size} positions"
+            )
+        yield sliding_window_view(emb, (kmer_size, emb.shape[1]))[:, 0].reshape(
+            len(emb) - kmer_size + 1, -1
+        )
+
+
+class RKHSKmerEmbedding(BaseEstimator, TransformerMixin):
+    """Scalable RKHS k-mer embedding of sequences, see https://hal.science/hal-01632912/ for more details
+
+    A scalable variant of `rkhs_kmer_embeddings`, which is fitted once and then transforms any number of datasets.
+    Instead of clustering all unique k-mers of the dataset, `fit` clusters a uniform sample of at most `max_kmers`
+    k-mers, drawn by reservoir sampling in a single pass over the sequences, with mini-batch k-means.
+    The inverse square root of the kernel matrix of the centers is computed from a symmetric eigendecomposition
+    with eigenvalues clipped to `eps` times the largest one. `transform` streams the k-mers of all sequences in
+    chunks of `chunk_size` k-mers, so the memory usage does not grow with the number of sequences. With the
+    linear kernel, the mean kernel of the k-mers of a sequence is the kernel of their mean, which is computed
+    from prefix sums without windowing the sequences, see `kmers_mean_embeddings`.
+
+    Sequences can be given as an array of shape (N, len_seq, len_aa), a list of arrays of shape (len_seq, len_aa)
+    or any iterable of such arrays, e.g. a generator reading a large dataset batch by batch.
+    """
+
+    def __init__(
+        self,
+        kernel_fn: Callable[[np.ndarray, np.ndarray], np.ndarray] = linear_kernel,
+        kmer_size: int = 100,
+        nystrom_size: int = 256,
+        max_kmers: int = 10000,
+        batch_size: int = 1024,
+        chunk_size: int = 1024,
+        eps: float = 1e-6,
+        random_state: Optional[int] = 0,
+    ) -> None:
+        """Constructor for RKHSKmerEmbedding
+
+        Args:
+            kernel_fn (Callable[[np.ndarray, np.ndarray], np.ndarray], optional): kernel function. Defaults to linear_kernel.
+            kmer_size (int, optional): length of the kmer. Defaults to 100.
+            nystrom_size (int, optional): number of centers for the k-means clustering. Defaults to 256.
+            max_kmers (int, optional): maximum number of k-mers sampled for the clustering. Defaults to 10000.
+            batch_size (int, optional): batch size of the mini-batch k-means. Defaults to 1024.
+            chunk_size (int, optional): number of k-mers embedded at once. Defaults to 1024.
+            eps (float, optional): eigenvalues of the kernel matrix of the centers are clipped to `eps` times the largest one. Defaults to 1e-6.
+            random_state (Optional[int], optional): seed of the sampling and the clustering. Defaults to 0.
+        """
+        self.kernel_fn = kernel_fn
+        self.kmer_size = kmer_size
+        self.nystrom_size = nystrom_size
+        self.max_kmers = max_kmers
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.eps = eps
+        self.random_state = random_state
+
+    def _sample_kmers(self, emb_list: Iterable[np.ndarray]) -> np.ndarray:
+        """Draw a uniform sample of the k-mers of all sequences in a single pass.
+
+        Every k-mer gets a uniform random key and the k-mers with the `max_kmers` smallest keys are kept.
+        Candidates are buffered and the reservoir is only pruned when the buffer holds twice as many k-mers.
+        The sample is stored as float32, which halves its memory and suffices for the clustering.
+
+        Args:
+            emb_list (Iterable[np.ndarray]): embeddings of shape (len_seq, len_aa)
+
+        Returns:
+            np.ndarray: the unique sampled k-mers of shape (num_kmers, kmer_size * len_aa), sorted like `np.unique`
+        """
+        rng = np.random.default_rng(self.random_state)
+        keys, kmers, buffered, threshold = [], [], 0, np.inf
+
+        def prune(keys, kmers):
+            parts = np.repeat(np.arange(len(keys)), [len(k) for k in keys])
+            rows = np.concatenate([np.arange(len(k)) for k in keys])
+            keys = np.concatenate(keys)
+            keep = np.arange(len(keys))
+            if len(keys) > self.max_kmers:
+                keep = np.argpartition(keys, self.max_kmers - 1)[: self.max_kmers]
+            # only the kept k-mers are copied
+            kmers = np.stack([kmers[p][r] for p, r in zip(parts[keep], rows[keep])])
+            keys = keys[keep]
+            # once the reservoir is full, only k-mers with smaller keys can enter it
+            threshold = keys.max() if len(keys) == self.max_kmers else np.inf
+            return [keys], [kmers], len(keys), threshold
+
+        for windows in _iter_kmers(emb_list, self.kmer_size):
+            u = rng.random(len(windows))
+            accepted = u < threshold
+            keys.append(u[accepted])
+            kmers.append(windows[accepted].astype(np.float32))
+            buffered += accepted.sum()
+            if buffered >= 2 * self.max_kmers:
+                keys, kmers, buffered, threshold = prune(keys, kmers)
+        if len(kmers) == 0:
+            raise ValueError("No sequences to sample k-mers from")
+        return np.unique(prune(keys, kmers)[1][0], axis=0)
+
+    def fit(self, X: Iterable[np.ndarray], y=None) -> "RKHSKmerEmbedding":
+        """Fit the centers and the kernel normalization
+
+        Args:
+            X (Iterable[np.ndarray]): embeddings of shape (len_seq, len_aa)
+            y: ignored
+
+        Returns:
+            RKHSKmerEmbedding: the fitted transformer
+        """
+        kmers = self._sample_kmers(X)
+        norms = np.linalg.norm(kmers, axis=1)
+        # all-zero k-mers, e.g. of padding, have no direction
+        kmers = kmers[norms > 0] / norms[norms > 0, None]
+        kmeans = MiniBatchKMeans(
+            n_clusters=self.nystrom_size,
+            batch_size=self.batch_size,
+            random_state=self.random_state,
+        ).fit(kmers)
+        self.centers_ = (
+            kmeans.cluster_centers_
+            / np.linalg.norm(kmeans.cluster_centers_, axis=1)[:, None]
+        )
+
+        K = self.kernel_fn(self.centers_, self.centers_)
+        eigvals, eigvecs = np.linalg.eigh(0.5 * (K + K.T))
+        eigvals = np.clip(eigvals, self.eps * eigvals.max(), None)
+        self.normalization_ = (eigvecs * eigvals**-0.5) @ eigvecs.T
+        return self
+
+    def transform(self, X: Iterable[np.ndarray]) -> np.ndarray:
+        """Compute the RKHS k-mer embeddings
+
+        Args:
+            X (Iterable[np.ndarray]): embeddings of shape (len_seq, len_aa)
+
+        Returns:
+            np.ndarray: RKHS k-mer embeddings of shape (num_sequences, nystrom_size)
+
+        Example:
+            >>> rng = np.random.default_rng(0)
+            >>> emb_list = np.eye(4)[rng.integers(0, 4, (20, 30))]
+            >>> rkhs = RKHSKmerEmbedding(kmer_size=3, nystrom_size=8).fit(emb_list[:10])
+            >>> rkhs.transform(emb_list[10:]).shape
+            (10, 8)
+        """
+        if self.kernel_fn is linear_kernel:
+            # the mean of a linear kernel over the k-mers is the kernel of the mean k-mer
+            X, means = iter(X), []
+            while len(batch := list(itertools.islice(X, self.chunk_size))) > 0:
+                batch = _float_embeddings(batch, self.kmer_size)
+                means.append(_kmer_means(batch, self.kmer_size))
+            if len(means) == 0:
+                return np.zeros((0, len(self.centers_)))
+            mean_kernel = linear_kernel(np.concatenate(means), self.centers_)
+            return mean_kernel @ self.normalization_.T
+
+        kernel_sums, num_kmers = [], []
+        chunk, owners, buffered = [], [], 0
+
+        def flush():
+            owner = np.concatenate(owners)
+            # owners are sorted, so the kernel values are summed per sequence over contiguous column ranges
+            starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+            sums = np.add.reduceat(
+                self.kernel_fn(self.centers_, np.concatenate(chunk)), starts, axis=1
+            )
+            for i, column in zip(owner[starts], sums.T):
+                if i == len(kernel_sums):
+                    kernel_sums.append(column)
+                else:
+                    kernel_sums[i] = kernel_sums[i] + column
+
+        for i, windows in enumerate(_iter_kmers(X, self.kmer_size)):
+            num_kmers.append(len(windows))
+            for start in range(0, len(windows), self.chunk_size):
+                part = windows[start : start + self.chunk_size]
+                chunk.append(part)
+                owners.append(np.full(len(part), i))
+                buffered += len(part)
+                if buffered >= self.chunk_size:
+                    flush()
+                    chunk, owners, buffered = [], [], 0
+        if buffered > 0:
+            flush()
+        if len(num_kmers) == 0:
+            return np.zeros((0, len(self.centers_)))
+
+        mean_kernel = np.stack(kernel_sums) / np.array(num_kmers)[:, None]
+        return mean_kernel @ self.normalization_.T
@@ -1,8 +1,11 @@
-from typing import Iterable, List, Sequence, Tuple, Union
+import warnings
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 
 import datasets as ds
 import numpy as onp
 import pandas as pd
+import scipy.sparse
 import sklearn
 import sklearn.feature_extraction
 import sklearn.pipeline
@@ -11,8 +14,27 @@ from jax_unirep import get_reps
 from sklearn.base import BaseEstimator, TransformerMixin
 
 from ..config.alphabets import padding_value_enc
+from .cache import EmbeddingCache, embed_with_cache
+from Bio import BiopythonWarning
+from Bio.Data import CodonTable
 from Bio.Seq import Seq
 
+# Index of the unambiguous bases (T/U, C, A, G) in codon arithmetic, other characters are marked with 4
+_BASE_INDEX = onp.full(256, 4, dtype=onp.uint8)
+for _i, _bases in enumerate(["TtUu", "Cc", "Aa", "Gg"]):
+    _BASE_INDEX[onp.frombuffer(_bases.encode("ascii"), dtype=onp.uint8)] = _i
+
+# Amino acid (ASCII code) of each of the 64 codons 16 * b1 + 4 * b2 + b3 of the standard genetic code
+_CODON_TABLE = onp.frombuffer(
+    "".join(
+        CodonTable.standard_dna_table.forward_table.get(a + b + c, "*")
+        for a in "TCAG"
+        for b in "TCAG"
+        for c in "TCAG"
+    ).encode("ascii"),
+    dtype=onp.uint8,
+)
+
 
 def array_to_list_of_arrays(x: onp.ndarray):
     """Convert a 2d array into a list of arrays."""
@@ -51,25 +73,111 @@ def seq_strings_to_array(
     return onp.array(tmp)
 
 
-def unirep(df: Union[ds.Dataset, pd.DataFrame]) -> dict[str, onp.ndarray]:
+def unirep(
+    df: Union[ds.Dataset, pd.DataFrame], cache: EmbeddingCache = None
+) -> dict[str, onp.ndarray]:
     """Add unirep encoding to a dataframe.
 
     Args:
         df (Union[ds.Dataset, pd.DataFrame]) : Data Frame or data set to which encodings should be added
+        cache (EmbeddingCache, optional): Cache for the UniRep representations. Defaults to None (no caching).
 
     Returns:
-        rval (ds.Dataset): DataFrame with new encodings added
+        dict[str, onp.ndarray]: UniRep average and final hidden states, each of shape (num_sequences, 1900)
     """
-    h_avg, h_final, c_final = get_reps(df["aa_seq"])
-    return {"aa_unirep_1900": h_avg.tolist(), "aa_unirep_final": h_final.tolist()}
 
+    def embed(seqs: list[str]) -> onp.ndarray:
+        # stacked as (2, 1900) per sequence, so both representations are cached together
+        h_avg, h_final, c_final = get_reps(seqs)
+        return onp.stack([h_avg, h_final], axis=1)
+
+    reps = onp.stack(embed_with_cache(df["aa_seq"], embed, cache))
+    return {
+        "aa_unirep_1900": onp.ascontiguousarray(reps[:, 0]),
+        "aa_unirep_final": onp.ascontiguousarray(reps[:, 1]),
+    }
+
+
+@lru_cache(maxsize=2**16)
+def _translate_codon(codon: bytes) -> str:
+    """Translate a single, possibly ambiguous codon with Biopython."""
+    return str(Seq(codon.decode("ascii")).translate())
+
+
+def translate_dna(sequences: Sequence[str]) -> list[str]:
+    """Translate DNA or RNA sequences to amino acid sequences with the standard genetic code.
+
+    The codons of all sequences are translated at once: the bases of each codon are mapped to their index in TCAG
+    and the codon index 16 * b1 + 4 * b2 + b3 is looked up in a table of the 64 codons, with stop codons
+    translated to '*'. Codons with ambiguous bases or gaps are rare and translated by Biopython, which resolves e.g.
+    'CTN' to 'L' and 'NNN' to 'X'. Like in Biopython, a trailing partial codon is ignored with a warning.
 
-def translate_dna_to_aa_seq(dataset: ds.Dataset) -> ds.Dataset:
+    Args:
+        sequences (Sequence[str]): DNA or RNA sequences, upper or lower case.
+
+    Returns:
+        list[str]: The amino acid sequence of each input sequence, stop codons included.
+
+    Raises:
+        ValueError: If a sequence is missing.
+        CodonTable.TranslationError: If a codon contains characters which are no nucleotides.
+
+    Example:
+        >>> translate_dna(["GATCTG", "ATGNNNTAA", "aug"])
+        ['DL', 'MX*', 'M']
+    """
+    if any(seq is None for seq in sequences):
+        raise ValueError("Missing DNA sequences can not be translated")
+    lengths = onp.array([len(seq) for seq in sequences], dtype=onp.int64)
+    if (lengths % 3 != 0).any():
+        warnings.warn(
+            "Partial codon, len(sequence) not a multiple of three. "
+            "The trailing bases are not translated.",
+            BiopythonWarning,
+        )
+
+    # Position of the first base of every codon in the concatenated sequences
+    num_codons = lengths // 3
+    codon_offsets = onp.concatenate([[0], onp.cumsum(num_codons)])
+    seq_starts = onp.cumsum(lengths) - lengths
+    first_base = onp.repeat(
+        seq_starts - 3 * codon_offsets[:-1], num_codons
+    ) + 3 * onp.arange(codon_offsets[-1])
+
+    codes = onp.frombuffer(
+        "".join(sequences).encode("ascii", errors="replace"), dtype=onp.uint8
+    )
+    bases = _BASE_INDEX[codes]
+    b1, b2, b3 = bases[first_base], bases[first_base + 1], bases[first_base + 2]
+    # The bases 0-3 never set the bit of the marker 4
+    ambiguous = (b1 | b2 | b3) >= 4
+    codon_idx = (b1.astype(onp.intp) << 4) | (b2 << 2) | b3
+    amino_acids = _CODON_TABLE[onp.where(ambiguous, 0, codon_idx)]
+
+    # Each distinct ambiguous codon is translated once
+    if ambiguous.any():
+        codons = codes[first_base[ambiguous, None] + onp.arange(3)]
+        unique_codons, inverse = onp.unique(codons, axis=0, return_inverse=True)
+        translated = [_translate_codon(codon.tobytes()) for codon in unique_codons]
+        amino_acids[ambiguous] = onp.frombuffer(
+            "".join(translated).encode("ascii"), dtype=onp.uint8
+        )[inverse.reshape(-1)]
+
+    amino_acids = amino_acids.tobytes().decode("ascii")
+    return [
+        amino_acids[start:end]
+        for start, end in zip(codon_offsets[:-1].tolist(), codon_offsets[1:].tolist())
+    ]
+
+
+def translate_dna_to_aa_seq(
+    dataset: ds.Dataset, num_proc: Optional[int] = None, batch_size: int = 1000
+) -> ds.Dataset:
     """Translate DNA sequences to amino acid sequences.
 
     This function takes a Hugging Face dataset containing DNA sequences and translates them into
-    amino acid sequences using the Biopython library. It creates a new column 'aa_seq' in the dataset
-    which contains the translated amino acid sequences.
+    amino acid sequences with `translate_dna`, removing stop codons at both ends. It creates a new column
+    'aa_seq' in the dataset which contains the translated amino acid sequences.
 
     Applying translate_dna_to_aa_seq(dataset) will modify the dataset by adding a new column 'aa_seq'
     which contains the translated amino acid sequences. Here's an example of the input dataset and
@@ -96,6 +204,8 @@ def translate_dna_to_aa_seq(dataset: ds.Dataset) -> ds.Dataset:
 
     Args:
         dataset (datasets.Dataset): Hugging Face dataset with DNA sequences.
+        num_proc (Optional[int], optional): Number of processes translating batches of the dataset. Defaults to None (no multiprocessing).
+        batch_size (int, optional): Number of sequences translated at once. Defaults to 1000.
 
     Returns:
         datasets.Dataset: Dataset with amino acid sequences added.
@@ -115,11 +225,16 @@ def translate_dna_to_aa_seq(dataset: ds.Dataset) -> ds.Dataset:
                 f"Invalid input! Expected a valid huggingface dataset but got a {type(dataset)}"
             )
 
-        # Use dataset.map() to apply the translation to each example in the dataset
+        # Use a batched dataset.map() to translate the sequences of each batch at once
         encoded_dataset = dataset.map(
-            lambda example: {
-                "aa_seq": str(Seq(example["dna_seq"]).translate()).strip("*")
-            }
+            lambda dna_seqs: {
+                "aa_seq": [aa_seq.strip("*") for aa_seq in translate_dna(dna_seqs)]
+            },
+            input_columns="dna_seq",
+            batched=True,
+            batch_size=batch_size,
+            num_proc=num_proc,
+            remove_columns=dataset.column_names,
         )
 
     else:
@@ -145,6 +260,13 @@ class FixedSingleColumnTransform(TransformerMixin):
         self.inner_transformer = inner_transformer
         if hasattr(self.inner_transformer, "map_func"):
             self.map_func = self.inner_transformer.map_func
+        if hasattr(self.inner_transformer, "max_num_tokens"):
+            # transformers with `map_func` take the whole dataset, the others only the column
+            self.max_num_tokens = (
+                self.inner_transformer.max_num_tokens
+                if hasattr(self.inner_transformer, "map_func")
+                else self.column_max_num_tokens
+            )
 
     def drop_non_column(
         self, X: Union[pd.DataFrame, ds.Dataset]
@@ -178,18 +300,37 @@ class FixedSingleColumnTransform(TransformerMixin):
         self.inner_transformer.fit(self.drop_non_column(X), **fit_params)
         return self.__class__
 
+    def column_max_num_tokens(
+        self, X: Union[pd.DataFrame, ds.Dataset], max_length: Optional[int] = None
+    ) -> int:
+        """Number of tokens the inner transformer pads the encodings of the column to.
+
+        Args:
+            X (Union[pd.DataFrame, ds.Dataset]): The dataframe or dataset to transform.
+            max_length (Optional[int], optional): Length of the longest sequence. Defaults to None (longest sequence of the column).
+
+        Returns:
+            int: The length to pass as `pad_length` to `transform`.
+        """
+        return self.inner_transformer.max_num_tokens(
+            self.drop_non_column(X), max_length
+        )
+
     def transform(
-        self, X: Union[pd.DataFrame, ds.Dataset]
+        self, X: Union[pd.DataFrame, ds.Dataset], **transform_params
     ) -> Union[pd.DataFrame, ds.Dataset]:
         """Transform the dataframe or dataset.
 
         Args:
             X (Union[pd.DataFrame, ds.Dataset]): The dataframe or dataset to transform.
+            **transform_params: Further arguments of the inner transformer, e.g. `pad_length`.
 
         Returns:
             Union[pd.DataFrame, ds.Dataset]: The transformed dataframe or dataset.
         """
-        return self.inner_transformer.transform(self.drop_non_column(X))
+        return self.inner_transformer.transform(
+            self.drop_non_column(X), **transform_params
+        )
 
 
 class SeqStrLen(sklearn.preprocessing.FunctionTransformer):
@@ -286,22 +427,267 @@ class GuaranteeShapeTransformer(BaseEstimator, TransformerMixin):
         return self.wrapped.transform(X.reshape(-1, 1)).reshape(X.shape[0], -1)
 
 
-class SeqStrOneHot(BaseEstimator, TransformerMixin):
-    """Class for one hot encoding of sequence data"""
+def byte_lookup_table(alphabet: Sequence[str]) -> onp.ndarray:
+    """Lookup table mapping each byte to the index of the corresponding letter in an alphabet.
+
+    Args:
+        alphabet (Sequence[str]): Alphabet of at most 255 distinct ASCII characters.
+
+    Returns:
+        onp.ndarray: Array of 256 entries, holding the index of each letter and -1 for bytes not in the alphabet.
+
+    Raises:
+        ValueError: If the alphabet is too large or contains entries which are not single ASCII characters.
+
+    Example:
+        >>> lut = byte_lookup_table(["A", "C", "G", "T"])
+        >>> lut[onp.frombuffer(b"GATTACA", dtype=onp.uint8)]
+        array([2, 0, 3, 3, 0, 1, 0], dtype=int16)
+    """
+    if len(alphabet) > 255:
+        raise ValueError(f"Alphabets have at most 255 letters, got {len(alphabet)}")
+    lut = onp.full(256, -1, dtype=onp.int16)
+    for i, letter in enumerate(alphabet):
+        if len(letter) != 1 or ord(letter) > 127:
+            raise ValueError(f"Letters must be single ASCII characters, got {letter!r}")
+        lut[ord(letter)] = i
+    return lut
+
+
+def seq_strings_to_indices(
+    seq_strings: Sequence[str],
+    alphabet: Sequence[str],
+    pad_char: str = padding_value_enc,
+    length: Optional[int] = None,
+) -> onp.ndarray:
+    """Convert strings to the indices of their characters in an alphabet, padded to the length of the longest string.
+
+    All strings are converted at once using a 256-entry lookup table on their bytes.
+
+    Args:
+        seq_strings (Sequence[str]): The sequences.
+        alphabet (Sequence[str]): Alphabet of at most 255 distinct ASCII characters.
+        pad_char (str): Padding character, only needed in the alphabet if the strings differ in length. Defaults to `padding_value_enc`.
+        length (Optional[int]): Length to pad the strings to, e.g. of the longest string of a whole dataset encoded in batches.
+            Defaults to None (length of the longest string).
+
+    Returns:
+        onp.ndarray: Array of shape (num_sequences, max_length) and type uint8.
+
+    Raises:
+        ValueError: If a sequence contains characters which are not in the alphabet, the padding character is needed but not in the alphabet
+            or a sequence is longer than `length`.
+
+    Example:
+        >>> seq_strings_to_indices(["GAT", "TA"], [" ", "A", "C", "G", "T"])
+        array([[3, 1, 4],
+               [4, 1, 0]], dtype=uint8)
+    """
+    seq_strings = [str(seq) for seq in seq_strings]
+    lut = byte_lookup_table(alphabet)
+    lengths = onp.fromiter(
+        map(len, seq_strings), dtype=onp.int64, count=len(seq_strings)
+    )
+    try:
+        codes = onp.frombuffer("".join(seq_strings).encode("ascii"), dtype=onp.uint8)
+    except UnicodeEncodeError:
+        raise ValueError("Sequences contain characters which are not in the alphabet")
+    indices = lut[codes]
+    if (indices < 0).any():
+        unknown = sorted({chr(c) for c in codes[indices < 0]})
+        raise ValueError(f"Sequences contain characters {unknown} not in the alphabet")
+
+    max_length = int(lengths.max(initial=0))
+    if length is not None:
+        if max_length > length:
+            raise ValueError(
+                f"Sequences of length {max_length} can't be padded to length {length}"
+            )
+        max_length = length
+    pad_index = lut[ord(pad_char)] if len(pad_char) == 1 and ord(pad_char) < 256 else -1
+    if (lengths < max_length).any() and pad_index < 0:
+        raise ValueError(f"Padding character {pad_char!r} is not in the alphabet")
+
+    rval = onp.full((len(seq_strings), max_length), max(pad_index, 0), dtype=onp.uint8)
+    # boolean indexing enumerates positions in row-major order, i.e. in the order of the concatenated strings
+    rval[onp.arange(max_length) < lengths[:, None]] = indices
+    return rval
+
+
+def tokens_to_one_hot(
+    tokens: onp.ndarray, alphabet_size: int, output: str = "flat"
+) -> Union[onp.ndarray, scipy.sparse.csr_matrix]:
+    """One hot encode tokens, i.e. indices into an alphabet. Token 0, usually the padding character, is encoded as all zeros.
+
+    Args:
+        tokens (onp.ndarray): Tokens of shape (num_sequences, max_length), e.g. from `seq_strings_to_indices`.
+        alphabet_size (int): Size of the alphabet, including the letter of token 0.
+        output (str): Format of the encoding, see `SeqStrOneHot`. Defaults to "flat".
+
+    Returns:
+        Union[onp.ndarray, scipy.sparse.csr_matrix]: One hot encoding of type int8.
+
+    Example:
+        >>> tokens_to_one_hot(onp.array([[2, 1], [1, 0]]), 3, "padded")
+        array([[[0, 1],
+                [1, 0]],
+        <BLANKLINE>
+               [[1, 0],
+                [0, 0]]], dtype=int8)
+    """
+    tokens = onp.asarray(tokens)
+    num_sequences, max_length = tokens.shape
+    num_letters = alphabet_size - 1
+    # positions of ones in the flattened (max_length * num_letters) encoding of each sequence
+    rows, positions = onp.nonzero(tokens)
+    columns = positions * num_letters + tokens[rows, positions].astype(onp.int64) - 1
+
+    if output == "sparse":
+        indptr = onp.zeros(num_sequences + 1, dtype=onp.int64)
+        onp.cumsum(onp.bincount(rows, minlength=num_sequences), out=indptr[1:])
+        return scipy.sparse.csr_matrix(
+            (onp.ones(len(columns), dtype=onp.int8), columns, indptr),
+            shape=(num_sequences, max_length * num_letters),
+        )
+
+    rval = onp.zeros((num_sequences, max_length * num_letters), dtype=onp.int8)
+    rval[rows, columns] = 1
+    if output == "padded":
+        return rval.reshape(num_sequences, max_length, num_letters)
+    return rval
+
+
+def token_counts(tokens: onp.ndarray, alphabet_size: int) -> onp.ndarray:
+    """Count the tokens of each sequence, ignoring token 0, usually the padding character.
+
+    This equals the 1-gram counts of `NGramFeat` with the alphabet without its first letter as vocabulary.
+
+    Args:
+        tokens (onp.ndarray): Tokens of shape (num_sequences, max_length), e.g. from `seq_strings_to_indices`.
+        alphabet_size (int): Size of the alphabet, including the letter of token 0.
+
+    Returns:
+        onp.ndarray: Counts of shape (num_sequences, alphabet_size - 1).
+
+    Example:
+        >>> token_counts(onp.array([[2, 1, 2], [1, 0, 0]]), 3)
+        array([[1, 2],
+               [1, 0]])
+    """
+    tokens = onp.asarray(tokens)
+    offsets = onp.arange(len(tokens))[:, None] * alphabet_size
+    counts = onp.bincount(
+        (offsets + tokens).ravel(), minlength=len(tokens) * alphabet_size
+    )
+    return counts.reshape(len(tokens), alphabet_size)[:, 1:]
+
+
+class SeqStrTokens(BaseEstimator, TransformerMixin):
+    """Class for encoding sequences as tokens, i.e. the indices of their letters in an alphabet
+
+    Sequences are padded to the length of the longest sequence with the index of the padding character,
+    which is 0 for the padded alphabets. `tokens != 0` is the mask of the sequence positions.
+
+    Example:
+        >>> SeqStrTokens([" ", "A", "C", "G", "T"]).fit_transform(["GAT", "TA"])
+        array([[3, 1, 4],
+               [4, 1, 0]], dtype=uint8)
+    """
 
     def __init__(self, alphabet: List[str] = None) -> None:
+        """Constructor for SeqStrTokens transformer
+
+        Args:
+            alphabet (List[str]): List of the used alphabet, at most 255 letters
+        """
+        super().__init__()
+
+        assert alphabet is not None
+        self.alphabet = alphabet
+
+    def fit(self, X, y=None) -> "SeqStrTokens":
+        """Fit the SeqStrTokens transformer
+
+        Args:
+            X: Sequences to be fitted
+            y (optional): Variable of interest. Defaults to None.
+
+        Returns:
+            SeqStrTokens: The fitted SeqStrTokens transformer
+
+        Raises:
+            ValueError: If the sequences contain characters which are not in the alphabet.
+        """
+        # the alphabet is fixed, fitting only validates the sequences
+        seq_strings_to_indices(X, self.alphabet)
+        return self
+
+    def max_num_tokens(self, X, max_length: Optional[int] = None) -> int:
+        """Number of tokens of the longest sequence, one per letter.
+
+        Args:
+            X: Sequences to be transformed
+            max_length (Optional[int], optional): Length of the longest sequence, if known. Defaults to None (longest sequence of X).
+
+        Returns:
+            int: The length to pass as `pad_length` to `transform`.
+        """
+        return max_length if max_length is not None else max(map(len, X), default=0)
+
+    def transform(self, X, y=None, pad_length: Optional[int] = None) -> onp.ndarray:
+        """Transform sequences to tokens
+
+        Args:
+            X: Sequences to be transformed
+            y (optional): Variable of interest. Defaults to None.
+            pad_length (Optional[int], optional): Number of tokens to pad the sequences to. Defaults to None (longest sequence of X).
+
+        Returns:
+            onp.ndarray: Tokens of shape (num_sequences, max_length) and type uint8
+
+        Raises:
+            ValueError: If the sequences contain characters which are not in the alphabet or are longer than `pad_length`.
+        """
+        return seq_strings_to_indices(X, self.alphabet, length=pad_length)
+
+
+class SeqStrOneHot(BaseEstimator, TransformerMixin):
+    """Class for one hot encoding of sequence data
+
+    Sequences are converted to indices into the alphabet with a byte lookup table and the ones are scattered
+    into a preallocated array. The first letter of the alphabet, usually the padding character,
+    is encoded as all zeros, so sequences are zero-padded to the length of the longest sequence.
+
+    Example:
+        >>> enc = SeqStrOneHot([" ", "A", "C", "G", "T"]).fit(["GAT", "TA"])
+        >>> enc.transform(["GAT", "TA"])
+        array([[0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0, 1],
+               [0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0]], dtype=int8)
+        >>> enc.set_params(output="padded").transform(["GAT", "TA"]).shape
+        (2, 3, 4)
+        >>> enc.set_params(output="sparse").transform(["GAT", "TA"]).indices
+        array([ 2,  4, 11,  3,  4], dtype=int32)
+    """
+
+    outputs = ("flat", "padded", "sparse")
+
+    def __init__(self, alphabet: List[str] = None, output: str = "flat") -> None:
         """Constructor for SeqStrOneHot transformer
         Args:
             alphabet (List[str]): List of the used alphabet
-            zero_pad (bool): If the one hot encoding should be zero-padded to achieve same length. Defaults to True.
+            output (str): Format of the encoding, one of
+                "flat": array of shape (num_sequences, max_length * (len(alphabet) - 1)),
+                "padded": array of shape (num_sequences, max_length, len(alphabet) - 1),
+                "sparse": scipy CSR matrix of shape (num_sequences, max_length * (len(alphabet) - 1)), which only stores the indices of the ones.
+                Defaults to "flat".
         """
         super().__init__()
 
         assert alphabet is not None
+        if output not in self.outputs:
+            raise ValueError(f"Output must be one of {self.outputs}, got {output}")
         self.alphabet = alphabet
-        self.inner1hot = sklearn.preprocessing.OneHotEncoder(
-            categories=[self.alphabet], drop="first"
-        )
+        self.output = output
 
     def fit(self, X, y=None) -> "SeqStrOneHot":
         """Functions for fitting a new dataframe/dataset with the SeqStrOneHot encoder
@@ -313,29 +699,43 @@ class SeqStrOneHot(BaseEstimator, TransformerMixin):
         Return:
             SeqStrOneHot: The fitted SeqStrOneHot transformer
 
+        Raises:
+            ValueError: If the sequences contain characters which are not in the alphabet.
         """
-        self.inner1hot.fit(
-            seq_strings_to_array(X, True, padding_value_enc).reshape(-1, 1)
-        )
+        # the alphabet is fixed, fitting only validates the sequences
+        seq_strings_to_indices(X, self.alphabet)
         return self
 
-    def transform(self, X, y=None):
+    def max_num_tokens(self, X, max_length: Optional[int] = None) -> int:
+        """Number of positions of the longest sequence, one per letter.
+
+        Args:
+            X (pd.DataFrame): Data to be transformed
+            max_length (Optional[int], optional): Length of the longest sequence, if known. Defaults to None (longest sequence of X).
+
+        Returns:
+            int: The length to pass as `pad_length` to `transform`.
+        """
+        return max_length if max_length is not None else max(map(len, X), default=0)
+
+    def transform(self, X, y=None, pad_length: Optional[int] = None):
         """Function for transforming a new dataframe/dataset with the SeqStrOneHot encoder
 
         Args:
             X (pd.DataFrame): Data to be fitted
             y (pd.Series): variable of interest (default is None)
+            pad_length (Optional[int], optional): Number of positions to pad the sequences to. Defaults to None (longest sequence of X).
 
         Returns:
-            One hot encoded dataframe of X
+            Union[onp.ndarray, scipy.sparse.csr_matrix]: One hot encoding of X of type int8, see `output` for the shape.
+
+        Raises:
+            ValueError: If the sequences contain characters which are not in the alphabet or are longer than `pad_length`.
         """
-        return array_to_list_of_arrays(
-            self.inner1hot.transform(
-                seq_strings_to_array(X, True, padding_value_enc).reshape(-1, 1)
-            )
-            .reshape(len(X), -1)
-            .astype(onp.int8)
-            .toarray()
+        return tokens_to_one_hot(
+            seq_strings_to_indices(X, self.alphabet, length=pad_length),
+            len(self.alphabet),
+            self.output,
         )
 
 
@@ -379,7 +779,7 @@ class NGramFeat(BaseEstimator, TransformerMixin):
         """
         return self.cv.fit(X, y)
 
-    def transform(self, X, y=None) -> list[onp.ndarray]:
+    def transform(self, X, y=None) -> onp.ndarray:
         """Transform the data using the NGramFeat transformer
 
         Args:
@@ -387,6 +787,6 @@ class NGramFeat(BaseEstimator, TransformerMixin):
             y (optional): Variable of interest. Defaults to None.
 
         Returns:
-            list[onp.ndarray]: The transformed data
+            onp.ndarray: The transformed data of shape (num_sequences, vocabulary size)
         """
-        return array_to_list_of_arrays(self.cv.transform(X).toarray())
+        return self.cv.transform(X).toarray()
@@ -1,9 +1,10 @@
-from typing import Optional, Union, Iterable
+from typing import Optional, Sequence, Union, Iterable
 
 import jax.numpy as jnp
 import numpy as np
 import datasets as ds
 import pandas as pd
+import scipy.sparse
 
 
 def get_num_nodes_edges(adjacency_lists: list[jnp.ndarray]) -> tuple:
@@ -51,12 +52,12 @@ def get_num_nodes_edges(adjacency_lists: list[jnp.ndarray]) -> tuple:
             )
 
         # Get number of nodes and edges for each graph
-        num_nodes.append(len(jnp.unique(jnp.array(adj_list))))
+        num_nodes.append(len(np.unique(np.asarray(adj_list))))
         num_edges.append(len(adj_list[0]))
 
     # Convert lists to NumPy arrays
-    num_nodes = jnp.array(num_nodes, dtype=np.int32)
-    num_edges = jnp.array(num_edges, dtype=np.int32)
+    num_nodes = np.array(num_nodes, dtype=np.int32)
+    num_edges = np.array(num_edges, dtype=np.int32)
 
     # Find maximum number of edges
     max_edges = num_edges.max()
@@ -275,6 +276,259 @@ def adj_list_to_incidence(
     return rval
 
 
+def _concat_edges(
+    adjacency_lists: Sequence[np.ndarray],
+    num_edges: Optional[Sequence[int]] = None,
+    fill_values: Union[int, float, Sequence[np.ndarray]] = 1,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Concatenate the edges of several graphs.
+
+    Args:
+        adjacency_lists (Sequence[np.ndarray]): Adjacency list of each graph, of shape (2, num_edges).
+        num_edges (Optional[Sequence[int]], optional): Number of edges of each graph. Additional entries in the adjacency lists are assumed to be padding and ignored. Defaults to None (all entries).
+        fill_values (Union[int, float, Sequence[np.ndarray]], optional): A value for all edges or a vector of values for the edges of each graph. Defaults to 1.
+
+    Raises:
+        ValueError: If an adjacency list does not have the shape (2, num_edges).
+        ValueError: If a vector of `fill_values` does not have one value per edge.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Number of edges of each graph and
+            graph, index within its graph, source node, destination node and value of each edge.
+    """
+    adjacency_lists = [np.asarray(adj) for adj in adjacency_lists]
+    for adj in adjacency_lists:
+        if adj.ndim != 2 or adj.shape[0] != 2:
+            raise ValueError(
+                f"Expected adjacency list to be of shape (2, num_edges), but got {adj.shape}"
+            )
+    if num_edges is None:
+        num_edges = [adj.shape[1] for adj in adjacency_lists]
+    num_edges = np.asarray(num_edges, dtype=np.int64).reshape(-1)
+
+    edges = np.concatenate(
+        [np.zeros((2, 0), dtype=np.int64)]
+        + [adj[:, :n].astype(np.int64) for adj, n in zip(adjacency_lists, num_edges)],
+        axis=1,
+    )
+    graph = np.repeat(np.arange(len(adjacency_lists)), num_edges)
+    edge_idx = np.arange(len(graph)) - np.repeat(
+        np.cumsum(num_edges) - num_edges, num_edges
+    )
+
+    if isinstance(fill_values, (int, float)):
+        values = np.full(len(graph), fill_values, dtype=np.float32)
+    else:
+        for v, n in zip(fill_values, num_edges):
+            if len(v) != n:
+                raise ValueError(
+                    f"Expected fill_values to have length {n}, but got {len(v)}"
+                )
+        values = np.concatenate(
+            [np.zeros(0, dtype=np.float32)] + [np.asarray(v) for v in fill_values]
+        ).astype(np.float32)
+    return num_edges, graph, edge_idx, edges[0], edges[1], values
+
+
+def _scatter_matrices(
+    shapes: np.ndarray,
+    graph: np.ndarray,
+    row: np.ndarray,
+    col: np.ndarray,
+    values: np.ndarray,
+    pad_value: Union[int, float],
+    output: str,
+) -> Union[np.ndarray, list[np.ndarray], scipy.sparse.spmatrix]:
+    """Scatter the entries of the matrices of all graphs at once.
+
+    The matrices are laid out one after another in a single buffer. Entries outside of their matrix are dropped and
+    of several entries at the same position, the last one is kept, like in a JAX scatter.
+
+    Args:
+        shapes (np.ndarray): Shape of the matrix of each graph, of shape (num_graphs, 2).
+        graph (np.ndarray): Graph of each entry.
+        row (np.ndarray): Row of each entry.
+        col (np.ndarray): Column of each entry.
+        values (np.ndarray): Value of each entry.
+        pad_value (Union[int, float]): Value of the positions without entry.
+        output (str): "padded" for an array of shape (num_graphs, rows, columns), which requires all shapes to be equal,
+            "list" for a list of arrays, "coo" or "csr" for a sparse block diagonal matrix of all graphs.
+
+    Returns:
+        Union[np.ndarray, list[np.ndarray], scipy.sparse.spmatrix]: The matrices in the format given by `output`.
+    """
+    keep = (row >= 0) & (col >= 0) & (row < shapes[graph, 0]) & (col < shapes[graph, 1])
+    graph, row, col, values = graph[keep], row[keep], col[keep], values[keep]
+
+    if output in ("coo", "csr"):
+        if pad_value != 0:
+            raise ValueError("Sparse matrices can only be padded with 0")
+        row_offsets = np.cumsum(shapes[:, 0]) - shapes[:, 0]
+        col_offsets = np.cumsum(shapes[:, 1]) - shapes[:, 1]
+        row, col = row + row_offsets[graph], col + col_offsets[graph]
+        # Keep the last of duplicate entries instead of summing them up
+        _, last = np.unique((row * shapes[:, 1].sum() + col)[::-1], return_index=True)
+        last = len(row) - 1 - last
+        matrix = scipy.sparse.coo_matrix(
+            (values[last], (row[last], col[last])), shape=tuple(shapes.sum(axis=0))
+        )
+        return matrix.tocsr() if output == "csr" else matrix
+    if output not in ("padded", "list"):
+        raise ValueError(
+            f"Expected output to be 'padded', 'list', 'coo' or 'csr', but got {output}"
+        )
+
+    sizes = shapes[:, 0] * shapes[:, 1]
+    offsets = np.cumsum(sizes) - sizes
+    flat = np.full(sizes.sum(), pad_value, dtype=np.float32)
+    flat[offsets[graph] + row * shapes[graph, 1] + col] = values
+    if output == "padded":
+        return flat.reshape(
+            (len(shapes),) + tuple(shapes[0]) if len(shapes) else (0, 0, 0)
+        )
+    return [
+        flat[start : start + size].reshape(shape)
+        for start, size, shape in zip(offsets, sizes, shapes.tolist())
+    ]
+
+
+def adj_lists_to_adjmatrs(
+    adjacency_lists: Sequence[np.ndarray],
+    num_nodes: Sequence[int],
+    num_edges: Optional[Sequence[int]] = None,
+    fill_values: Union[int, float, Sequence[np.ndarray]] = 1,
+    pad_num_nodes: Optional[int] = None,
+    pad_value: Union[int, float] = 0,
+    directed: bool = False,
+    output: str = "padded",
+) -> Union[np.ndarray, list[np.ndarray], scipy.sparse.spmatrix]:
+    """Convert the adjacency lists of many graphs to adjacency matrices at once.
+
+    The edges of all graphs are concatenated and scattered into the matrices in a single vectorized operation,
+    instead of setting one edge of one graph at a time like `adj_list_to_adjmatr`.
+
+    Args:
+        adjacency_lists (Sequence[np.ndarray]): Adjacency list of each graph, where the first row contains the source nodes and the second row contains the destination nodes.
+        num_nodes (Sequence[int]): Number of nodes of each graph.
+        num_edges (Optional[Sequence[int]], optional): Number of edges of each graph. Additional entries in the adjacency lists are assumed to be padding and ignored. Defaults to None (all entries).
+        fill_values (Union[int, float, Sequence[np.ndarray]], optional): A value for all edges or a vector of values for the edges of each graph. Defaults to 1.
+        pad_num_nodes (Optional[int], optional): Size to pad all adjacency matrices to. Defaults to None, which means the largest number of nodes for "padded" output and no padding otherwise.
+        pad_value (Union[int, float], optional): Value of the matrix entries without edge. Defaults to 0.
+        directed (bool, optional): Whether the graphs are directed. Defaults to False.
+        output (str, optional): "padded" for an array of shape (num_graphs, pad_num_nodes, pad_num_nodes),
+            "list" for a list of arrays of shape (num_nodes, num_nodes), "coo" or "csr" for a sparse block diagonal
+            matrix of all graphs. Defaults to "padded".
+
+    Raises:
+        ValueError: If an adjacency list does not have the shape (2, num_edges).
+        ValueError: If a vector of `fill_values` does not have one value per edge.
+        ValueError: If `output` is unknown or a sparse output is padded with a value other than 0.
+
+    Returns:
+        Union[np.ndarray, list[np.ndarray], scipy.sparse.spmatrix]: The float32 adjacency matrices in the format given by `output`.
+
+    Example:
+        >>> adjacency_lists = [np.array([[0, 1], [1, 2]]), np.array([[0], [1]])]
+        >>> adj_lists_to_adjmatrs(adjacency_lists, [3, 2])
+        array([[[0., 1., 0.],
+                [1., 0., 1.],
+                [0., 1., 0.]],
+        <BLANKLINE>
+               [[0., 1., 0.],
+                [1., 0., 0.],
+                [0., 0., 0.]]], dtype=float32)
+        >>> adj_lists_to_adjmatrs(adjacency_lists, [3, 2], output="csr").shape
+        (5, 5)
+    """
+    num_nodes = np.asarray(num_nodes, dtype=np.int64).reshape(-1)
+    _, graph, _, src, dest, values = _concat_edges(
+        adjacency_lists, num_edges, fill_values
+    )
+    if pad_num_nodes is None and output == "padded":
+        pad_num_nodes = num_nodes.max(initial=0)
+    size = (
+        num_nodes if pad_num_nodes is None else np.full_like(num_nodes, pad_num_nodes)
+    )
+    shapes = np.stack([size, size], axis=1)
+
+    if not directed:
+        # The reverse of each edge directly follows the edge, like in `adj_list_to_adjmatr`
+        graph = np.repeat(graph, 2)
+        src, dest = np.stack([src, dest], 1).ravel(), np.stack([dest, src], 1).ravel()
+        values = np.repeat(values, 2)
+    return _scatter_matrices(shapes, graph, src, dest, values, pad_value, output)
+
+
+def adj_lists_to_incidences(
+    adjacency_lists: Sequence[np.ndarray],
+    num_nodes: Sequence[int],
+    num_edges: Optional[Sequence[int]] = None,
+    fill_values: Union[int, float, Sequence[np.ndarray]] = 1,
+    pad_num_nodes: Optional[int] = None,
+    pad_num_edges: Optional[int] = None,
+    pad_value: Union[int, float] = 0,
+    directed: bool = False,
+    output: str = "padded",
+) -> Union[np.ndarray, list[np.ndarray], scipy.sparse.spmatrix]:
+    """Convert the adjacency lists of many graphs to incidence matrices at once, see `adj_lists_to_adjmatrs`.
+
+    Args:
+        adjacency_lists (Sequence[np.ndarray]): Adjacency list of each graph, where the first row contains the source nodes and the second row contains the destination nodes.
+        num_nodes (Sequence[int]): Number of nodes of each graph.
+        num_edges (Optional[Sequence[int]], optional): Number of edges of each graph. Additional entries in the adjacency lists are assumed to be padding and ignored. Defaults to None (all entries).
+        fill_values (Union[int, float, Sequence[np.ndarray]], optional): A value for all edges or a vector of values for the edges of each graph. Defaults to 1.
+        pad_num_nodes (Optional[int], optional): Size to pad the node dimension to. Defaults to None, which means the largest number of nodes for "padded" output and no padding otherwise.
+        pad_num_edges (Optional[int], optional): Size to pad the edge dimension to. Defaults to None, which means the largest number of edges for "padded" output and no padding otherwise.
+        pad_value (Union[int, float], optional): Value of the matrix entries without incidence. Defaults to 0.
+        directed (bool, optional): Whether the graphs are directed. If True, `-fill_values` are used for the source nodes. Defaults to False.
+        output (str, optional): "padded" for an array of shape (num_graphs, pad_num_nodes, pad_num_edges),
+            "list" for a list of arrays of shape (num_nodes, num_edges), "coo" or "csr" for a sparse block diagonal
+            matrix of all graphs. Defaults to "padded".
+
+    Raises:
+        ValueError: If an adjacency list does not have the shape (2, num_edges).
+        ValueError: If a vector of `fill_values` does not have one value per edge.
+        ValueError: If `output` is unknown or a sparse output is padded with a value other than 0.
+
+    Returns:
+        Union[np.ndarray, list[np.ndarray], scipy.sparse.spmatrix]: The float32 incidence matrices in the format given by `output`.
+
+    Example:
+        >>> adjacency_lists = [np.array([[0, 1], [1, 2]]), np.array([[0], [1]])]
+        >>> adj_lists_to_incidences(adjacency_lists, [3, 2], directed=True, output="list")[1]
+        array([[-1.],
+               [ 1.]], dtype=float32)
+    """
+    num_nodes = np.asarray(num_nodes, dtype=np.int64).reshape(-1)
+    num_edges, graph, edge_idx, src, dest, values = _concat_edges(
+        adjacency_lists, num_edges, fill_values
+    )
+    if output == "padded":
+        pad_num_nodes = (
+            num_nodes.max(initial=0) if pad_num_nodes is None else pad_num_nodes
+        )
+        pad_num_edges = (
+            num_edges.max(initial=0) if pad_num_edges is None else pad_num_edges
+        )
+    rows = (
+        num_nodes if pad_num_nodes is None else np.full_like(num_nodes, pad_num_nodes)
+    )
+    cols = (
+        num_edges if pad_num_edges is None else np.full_like(num_edges, pad_num_edges)
+    )
+
+    # The source node is set after the destination node, which matters for self loops
+    return _scatter_matrices(
+        np.stack([rows, cols], axis=1),
+        np.concatenate([graph, graph]),
+        np.concatenate([dest, src]),
+        np.concatenate([edge_idx, edge_idx]),
+        np.concatenate([values, -values if directed else values]),
+        pad_value,
+        output,
+    )
+
+
 def adj_list_conversion(
     adj_list_to_matrix_fn: callable,
     adj: jnp.ndarray,
@@ -362,49 +616,178 @@ def bnd_count_atm_count(df: Union[ds.Dataset, pd.DataFrame]) -> dict[str, list[i
     return {"atm_count": num_nodes.tolist(), "bnd_count": num_edges.tolist()}
 
 
-def atm_adj(df: Union[ds.Dataset, pd.DataFrame]) -> dict[str, list[jnp.ndarray]]:
+def atm_adj(df: Union[ds.Dataset, pd.DataFrame]) -> dict[str, list[np.ndarray]]:
     """A function to convert the atom adjacency list to an adjacency matrix. Symmetric, since the molecule graph is undirected.
 
     Args:
         df (Union[ds.Dataset, pd.DataFrame]): A dataset or dataframe containing the "bnd_idcs", "atm_count", and "bnd_count" columns.
 
     Returns:
-        dict[str, list[jnp.ndarray]]: A dictionary containing the adjacency matrices for each molecule.
+        dict[str, list[np.ndarray]]: A dictionary containing the adjacency matrices for each molecule.
     """
-    df = df.with_format("jax")
+    df = df.with_format("numpy")
     return {
-        "atm_adj": [
-            adj_list_to_adjmatr(
-                df["bnd_idcs"][i], df["atm_count"][i], df["bnd_count"][i]
-            ).tolist()
-            for i in range(len(df))
-        ]
+        "atm_adj": adj_lists_to_adjmatrs(
+            df["bnd_idcs"], df["atm_count"], df["bnd_count"], output="list"
+        )
     }
 
 
-def atm_bnd_incid(df: Union[ds.Dataset, pd.DataFrame]) -> dict[str, list[jnp.ndarray]]:
+def atm_bnd_incid(df: Union[ds.Dataset, pd.DataFrame]) -> dict[str, list[np.ndarray]]:
     """A function to convert the atom-bond incidence list to an incidence matrix.
 
     Args:
         df (Union[ds.Dataset, pd.DataFrame]): A dataset or dataframe containing the "bnd_idcs", "atm_count", and "bnd_count" columns.
 
     Returns:
-        dict[str, list[jnp.ndarray]]: A dictionary containing the incidence matrices for each molecule.
+        dict[str, list[np.ndarray]]: A dictionary containing the incidence matrices for each molecule.
     """
-    df = df.with_format("jax")
+    df = df.with_format("numpy")
     return {
-        "atm_bnd_incid": [
-            adj_list_to_incidence(
-                df["bnd_idcs"][i], df["atm_count"][i], df["bnd_count"][i]
-            ).tolist()
-            for i in range(len(df))
-        ]
+        "atm_bnd_incid": adj_lists_to_incidences(
+            df["bnd_idcs"], df["atm_count"], df["bnd_count"], output="list"
+        )
     }
 
 
+def _split_block_diagonal(
+    matrix: scipy.sparse.spmatrix, num_rows: np.ndarray, num_cols: np.ndarray
+) -> tuple[list[np.ndarray], list[np.ndarray]]:
+    """Split a sparse block diagonal matrix into the entries of its blocks.
+
+    Args:
+        matrix (scipy.sparse.spmatrix): The block diagonal matrix.
+        num_rows (np.ndarray): Number of rows of each block.
+        num_cols (np.ndarray): Number of columns of each block.
+
+    Returns:
+        tuple[list[np.ndarray], list[np.ndarray]]: Per block, the int32 row and column indices of the entries within
+            the block, of shape (2, num_entries), and the float32 values of the entries.
+    """
+    matrix = matrix.tocsr().tocoo()  # entries sorted by row, hence by block
+    row_ends = np.cumsum(num_rows)
+    block = np.searchsorted(row_ends, matrix.row, side="right")
+    idcs = np.stack(
+        [
+            matrix.row - (row_ends - num_rows)[block],
+            matrix.col - (np.cumsum(num_cols) - num_cols)[block],
+        ]
+    ).astype(np.int32)
+    splits = np.cumsum(np.bincount(block, minlength=len(num_rows)))[:-1]
+    return np.split(idcs, splits, axis=1), np.split(
+        matrix.data.astype(np.float32), splits
+    )
+
+
+def atm_adj_sparse(df: Union[ds.Dataset, pd.DataFrame]) -> dict[str, list[np.ndarray]]:
+    """Sparse variant of `atm_adj`, storing the entries of the adjacency matrices instead of the dense matrices.
+
+    Args:
+        df (Union[ds.Dataset, pd.DataFrame]): A dataset or dataframe containing the "bnd_idcs", "atm_count", and "bnd_count" columns.
+
+    Returns:
+        dict[str, list[np.ndarray]]: A dictionary containing the row and column indices of the nonzero entries of
+            each adjacency matrix ("atm_adj_idcs", of shape (2, num_entries)) and their values ("atm_adj_vals").
+    """
+    df = df.with_format("numpy")
+    idcs, vals = _split_block_diagonal(
+        adj_lists_to_adjmatrs(
+            df["bnd_idcs"], df["atm_count"], df["bnd_count"], output="csr"
+        ),
+        np.asarray(df["atm_count"]),
+        np.asarray(df["atm_count"]),
+    )
+    return {"atm_adj_idcs": idcs, "atm_adj_vals": vals}
+
+
+def atm_bnd_incid_sparse(
+    df: Union[ds.Dataset, pd.DataFrame],
+) -> dict[str, list[np.ndarray]]:
+    """Sparse variant of `atm_bnd_incid`, storing the entries of the incidence matrices instead of the dense matrices.
+
+    Args:
+        df (Union[ds.Dataset, pd.DataFrame]): A dataset or dataframe containing the "bnd_idcs", "atm_count", and "bnd_count" columns.
+
+    Returns:
+        dict[str, list[np.ndarray]]: A dictionary containing the atom and bond indices of the nonzero entries of
+            each incidence matrix ("atm_bnd_incid_idcs", of shape (2, num_entries)) and their values ("atm_bnd_incid_vals").
+    """
+    df = df.with_format("numpy")
+    idcs, vals = _split_block_diagonal(
+        adj_lists_to_incidences(
+            df["bnd_idcs"], df["atm_count"], df["bnd_count"], output="csr"
+        ),
+        np.asarray(df["atm_count"]),
+        np.asarray(df["bnd_count"]),
+    )
+    return {"atm_bnd_incid_idcs": idcs, "atm_bnd_incid_vals": vals}
+
+
+def return_probabilities(
+    adj_matrices: Sequence[np.ndarray],
+    nb_iter: int,
+    bucket_size: int = 8,
+    max_bucket_entries: int = 2**22,
+) -> list[np.ndarray]:
+    """Return probabilities of lazy random walks on many graphs, see Zhang et al. (2018) "RetGK: Graph Kernels based on Return Probabilities of Random Walks", https://arxiv.org/abs/1809.02670
+
+    The lazy random walk matrix `0.5 * (I + D^-1 A)` is similar to the symmetric matrix `0.5 * (I + D^-1/2 A D^-1/2)`,
+    so the diagonals of all its powers follow from a single eigendecomposition `V diag(w) V^T` of the latter:
+    `diag(P^k) = (V * V) @ w^k`. Graphs are padded to sizes which are multiples of `bucket_size` and the graphs
+    of a size bucket are decomposed together. Padding nodes are isolated and do not change the return probabilities
+    of the other nodes.
+
+    Isolated nodes have no edge to walk along, the walk stays at such a node and returns with probability 1.
+
+    Args:
+        adj_matrices (Sequence[np.ndarray]): Adjacency matrix of each graph, of shape (num_nodes, num_nodes).
+        nb_iter (int): The number of steps of the random walks.
+        bucket_size (int, optional): Graph sizes are rounded up to multiples of this size. Defaults to 8.
+        max_bucket_entries (int, optional): Maximum number of matrix entries decomposed at once, which limits memory usage. Defaults to 2**22.
+
+    Returns:
+        list[np.ndarray]: The return probabilities of each graph, of shape (num_nodes, nb_iter), where column `k` holds the probabilities after `k + 1` steps.
+
+    Example:
+        >>> adj = np.array([[0, 1, 0], [1, 0, 0], [0, 0, 0]])
+        >>> return_probabilities([adj], 3)[0]
+        array([[0.5, 0.5, 0.5],
+               [0.5, 0.5, 0.5],
+               [1. , 1. , 1. ]])
+    """
+    adj_matrices = [np.asarray(adj, dtype=np.float64) for adj in adj_matrices]
+    num_nodes = np.array([len(adj) for adj in adj_matrices], dtype=np.int64)
+    sizes = -(-num_nodes // bucket_size) * bucket_size
+    steps = np.arange(1, nb_iter + 1)
+    rval = [None] * len(adj_matrices)
+
+    for size in np.unique(sizes):
+        members = np.flatnonzero(sizes == size)
+        chunk = max(1, max_bucket_entries // max(1, size * size))
+        for start in range(0, len(members), chunk):
+            graphs = members[start : start + chunk]
+            batch = np.zeros((len(graphs), size, size))
+            for b, g in enumerate(graphs):
+                batch[b, : num_nodes[g], : num_nodes[g]] = adj_matrices[g]
+
+            # isolated nodes, including padding nodes, get a self loop
+            degree = batch.sum(axis=2)
+            isolated = degree == 0
+            batch[:, np.arange(size), np.arange(size)] += isolated
+            degree[isolated] = 1
+            scale = degree**-0.5
+            walk = 0.5 * (np.eye(size) + scale[:, :, None] * batch * scale[:, None, :])
+
+            eigvals, eigvecs = np.linalg.eigh(walk)
+            probs = (eigvecs**2) @ (eigvals[:, :, None] ** steps)
+            for b, g in enumerate(graphs):
+                rval[g] = probs[b, : num_nodes[g]]
+    return rval
+
+
 def return_prob_feat(
     nb_iter: int, df: Union[ds.Dataset, pd.DataFrame]
-) -> dict[str, list[jnp.ndarray]]:
+) -> dict[str, list[np.ndarray]]:
     """A function to compute the return probability feature from the RetGk kernel model. See Zhang et al. (2018) "RetGK: Graph Kernels based on Return Probabilities of Random Walks", https://arxiv.org/abs/1809.02670
 
     Args:
@@ -412,17 +795,106 @@ def return_prob_feat(
         df (Union[ds.Dataset, pd.DataFrame]): A dataset or dataframe containing the "atm_adj" column.
 
     Returns:
-        dict[str, list[jnp.ndarray]]: A dictionary containing the return probability feature for each molecule.
+        dict[str, list[np.ndarray]]: A dictionary containing the return probability feature for each molecule.
+    """
+    return {"atm_retprob100": return_probabilities(df["atm_adj"], nb_iter)}
+
+
+def sparse_return_probabilities(
+    edge_index: Sequence[np.ndarray],
+    values: Sequence[np.ndarray],
+    num_nodes: Sequence[int],
+    nb_iter: int,
+    chunk_size: int = 64,
+    max_walk_entries: int = 2**22,
+) -> list[np.ndarray]:
+    """Return probabilities of lazy random walks on sparse graphs, see `return_probabilities`.
+
+    The walk matrices of many graphs are combined into one sparse block diagonal matrix, which is multiplied with
+    start vectors of `chunk_size` nodes per graph at once; walks on different graphs never meet. Memory scales
+    with the number of edges and nodes instead of the squared number of nodes, and time with
+    `nb_iter * num_edges * num_nodes` instead of `num_nodes**3`.
+
+    Args:
+        edge_index (Sequence[np.ndarray]): Row and column indices of the nonzero adjacency matrix entries of each graph, of shape (2, num_entries).
+        values (Sequence[np.ndarray]): Values of the nonzero adjacency matrix entries of each graph.
+        num_nodes (Sequence[int]): Number of nodes of each graph.
+        nb_iter (int): The number of steps of the random walks.
+        chunk_size (int, optional): Number of start nodes per graph walked at once. Defaults to 64.
+        max_walk_entries (int, optional): Maximum number of walk probabilities held at once, which limits memory usage. Defaults to 2**22.
+
+    Returns:
+        list[np.ndarray]: The return probabilities of each graph, of shape (num_nodes, nb_iter), where column `k` holds the probabilities after `k + 1` steps.
+
+    Example:
+        >>> edge_index = [np.array([[0, 1], [1, 0]]), np.zeros((2, 0), dtype=int)]
+        >>> sparse_return_probabilities(edge_index, [np.ones(2), np.ones(0)], [3, 1], 2)
+        [array([[0.5, 0.5],
+               [0.5, 0.5],
+               [1. , 1. ]]), array([[1., 1.]])]
+    """
+    num_nodes = np.asarray(num_nodes, dtype=np.int64).reshape(-1)
+    rval = []
+    # graphs are walked in groups, such that the probabilities of a group fit into `max_walk_entries`
+    group_ends = np.cumsum(num_nodes) // max(1, max_walk_entries // chunk_size)
+    for group in np.split(
+        np.arange(len(num_nodes)), np.flatnonzero(np.diff(group_ends)) + 1
+    ):
+        if len(group) == 0:
+            continue
+        nodes = num_nodes[group]
+        offsets = np.cumsum(nodes) - nodes
+        total = nodes.sum()
+        idcs = [np.asarray(edge_index[g], dtype=np.int64).reshape(2, -1) for g in group]
+        graph = np.repeat(offsets, [i.shape[1] for i in idcs])
+        rows, cols = np.concatenate([np.zeros((2, 0), dtype=np.int64)] + idcs, axis=1)
+        adj = scipy.sparse.csr_matrix(
+            (
+                np.concatenate([np.zeros(0)] + [np.asarray(values[g]) for g in group]),
+                (rows + graph, cols + graph),
+            ),
+            shape=(total, total),
+        )
+
+        # isolated nodes get a self loop
+        degree = np.asarray(adj.sum(axis=1)).ravel()
+        isolated = degree == 0
+        degree[isolated] = 1
+        walk = 0.5 * (
+            scipy.sparse.identity(total, format="csr")
+            + scipy.sparse.diags(1 / degree)
+            @ (adj + scipy.sparse.diags(isolated.astype(np.float64)))
+        )
+        walk = walk.tocsr()
+
+        probs = np.zeros((total, nb_iter))
+        node = np.arange(total) - np.repeat(offsets, nodes)
+        for start in range(0, nodes.max(initial=0), chunk_size):
+            started = np.flatnonzero((node >= start) & (node < start + chunk_size))
+            column = node[started] - start
+            x = np.zeros((total, chunk_size))
+            x[started, column] = 1
+            for step in range(nb_iter):
+                x = walk @ x
+                probs[started, step] = x[started, column]
+        rval.extend(np.split(probs, np.cumsum(nodes)[:-1]))
+    return rval
+
+
+def return_prob_feat_sparse(
+    nb_iter: int, df: Union[ds.Dataset, pd.DataFrame]
+) -> dict[str, list[np.ndarray]]:
+    """Sparse variant of `return_prob_feat`, computing the return probability feature from the sparse adjacency matrices.
+
+    Args:
+        nb_iter (int): The number of iterations to run the random walk for.
+        df (Union[ds.Dataset, pd.DataFrame]): A dataset or dataframe containing the "atm_adj_idcs", "atm_adj_vals" and "atm_count" columns.
+
+    Returns:
+        dict[str, list[np.ndarray]]: A dictionary containing the return probability feature for each molecule.
     """
-    adj_matrices = df["atm_adj"]
-    T = []
-    for i in range(len(adj_matrices)):
-        P = np.diag(np.sum(adj_matrices[i], axis=1) ** -1).dot(adj_matrices[i])
-        Ptld = 0.5 * (np.eye(len(P)) + P)
-        H = np.eye(len(P))
-        U = np.zeros((len(P), nb_iter))
-        for j in range(nb_iter):
-            H = H.dot(Ptld)
-            U[:, j] = np.diag(H)
-        T.append(U.tolist())
-    return {"atm_retprob100": T}
+    return {
+        "atm_retprob100": sparse_return_probabilities(
+            df["atm_adj_idcs"], df["atm_adj_vals"], df["atm_count"], nb_iter
+        )
+    }
@@ -1,4 +1,11 @@
-from typing import Callable
+import multiprocessing
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Sequence, Union
+
+import datasets as ds
+import numpy as np
+
 from .base import EncodingSpec
 
 
@@ -12,6 +19,12 @@ def find_function_order(
     Find the order in which to call encoding functions such that the required encodings can be computed.
     If the requirements are not satisfiable, throw an exception.
 
+    If several encoders provide the same encoding, the one calling the fewest encoding functions for its
+    requirements is chosen, counting encodings which are available or required anyway as free, and the one
+    listed first among equally expensive ones. E.g. a pooled embedding is computed directly from the sequence
+    when only the pooled embedding is required, but derived from the per-residue embedding when that is
+    available or required as well.
+
     Args:
         encoders (List[EncodingSpec]): List of encoding specifications.
         provided_encodings (List[str]): List of globally provided encodings.
@@ -41,9 +54,15 @@ def find_function_order(
         >>> result = find_function_order(encoders, provided_encodings, required_encodings, satisfy_all)
         >>> print(result) # doctest: +ELLIPSIS +NORMALIZE_WHITESPACE
         [EncodingSpec(provides=['aa_len'], requires=['aa_seq'], ...)]
+        >>> f4 = lambda x: x
+        >>> encoders.insert(0, base.EncodingSpec(["aa_len"], ["aa_1hot"], f4))
+        >>> find_function_order(encoders, ["aa_seq"], ["aa_len"])[0].func is f1
+        True
+        >>> [e.func for e in find_function_order(encoders, ["aa_seq"], ["aa_1hot", "aa_len"])] == [f2, f4]
+        True
     """
 
-    encoding_functions = {}  # Stores encoding functions for each encoder
+    encoding_functions = {}  # Stores the encoding functions providing each encoding
     encodings_provided = {}  # Stores all avaialble encodings
     encodings_required = {}  # Stores all required/needed encodings
     encoding_specs = {}  # Stores all encoders
@@ -52,10 +71,10 @@ def find_function_order(
         encodings = required_encodings
         required_encodings = []
         for encoding in encodings:
-            # Skip encodings that require 'bnd_idcs' when it's not provided
-            if (
-                encoding.startswith("atm") or encoding.startswith("bnd")
-            ) and "bnd_idcs" not in provided_encodings:
+            # Encodings of molecular graphs only require 'bnd_idcs', also without sequences
+            if encoding.startswith("atm") or encoding.startswith("bnd"):
+                if "bnd_idcs" in provided_encodings:
+                    required_encodings.append(encoding)
                 continue
 
             if any(provided_enc.startswith("aa") for provided_enc in provided_encodings):
@@ -73,7 +92,7 @@ def find_function_order(
     # Collect all necessary details from encoders
     for encoder in encoders:
         for encoding in encoder.provides:
-            encoding_functions[encoding] = encoder.func
+            encoding_functions.setdefault(encoding, []).append(encoder.func)
         encodings_provided[encoder.func] = encoder.provides
         encodings_required[encoder.func] = encoder.requires
         encoding_specs[encoder.func] = encoder
@@ -101,7 +120,38 @@ def find_function_order(
                         f"Requirements cannot be satisfied. Lacking function for encoding: {encoding}"
                     )
 
-                check_function(encoding_functions[encoding])
+                check_function(choose_function(encoding_functions[encoding]))
+
+    def choose_function(functions: list[Callable]) -> Callable:
+        """
+        Choose among the functions providing the same encoding.
+
+        Args:
+            functions (List[Callable]): The functions providing the encoding, in the order of the encoders.
+
+        Returns:
+            Callable: The first of the functions needing the fewest encoding functions to be called.
+        """
+        available = set(provided_encodings) | set(required_encodings)
+
+        def encoding_cost(encoding: str, visited: frozenset) -> float:
+            # number of functions to call for an encoding which is neither available nor required anyway
+            if encoding in available:
+                return 0
+            if encoding not in encoding_functions or encoding in visited:
+                return float("inf")
+            return min(
+                function_cost(f, visited | {encoding})
+                for f in encoding_functions[encoding]
+            )
+
+        def function_cost(function: Callable, visited: frozenset) -> float:
+            return 1 + sum(
+                encoding_cost(e, visited) for e in encodings_required[function]
+            )
+
+        # min returns the first of several functions with equal cost
+        return min(functions, key=lambda f: function_cost(f, frozenset()))
 
     def check_function(function: Callable):
         """
@@ -130,3 +180,171 @@ def find_function_order(
             )
 
     return [encoding_specs[f] for f in sorted_list]
+
+
+def concatenate_encodings(parts: Sequence[Any]) -> Union[np.ndarray, list]:
+    """Concatenate the encodings of consecutive shards of a dataset.
+
+    Arrays are zero-padded to a common shape before being concatenated along the first axis,
+    like the encodings of a single shard are padded to its longest sequence.
+
+    Args:
+        parts (Sequence[Any]): Encodings of each shard, either arrays of shape (num_rows, ...) or lists with one entry per row.
+
+    Returns:
+        Union[np.ndarray, list]: The encodings of all rows in the order of the shards.
+
+    Example:
+        >>> concatenate_encodings([np.ones((1, 2)), np.ones((2, 3))])
+        array([[1., 1., 0.],
+               [1., 1., 1.],
+               [1., 1., 1.]])
+        >>> concatenate_encodings([["MK"], ["MKV", "MKVL"]])
+        ['MK', 'MKV', 'MKVL']
+    """
+    if len(parts) > 0 and all(isinstance(p, np.ndarray) for p in parts):
+        shape = np.max([p.shape for p in parts], axis=0)
+        return np.concatenate(
+            [
+                np.pad(
+                    p, [(0, 0)] + [(0, n - m) for n, m in zip(shape[1:], p.shape[1:])]
+                )
+                for p in parts
+            ]
+        )
+    return [row for p in parts for row in p]
+
+
+# encoding functions of a worker process, set once when the worker starts
+_worker_funcs = ()
+
+
+def _init_worker(funcs: tuple[Callable, ...]) -> None:
+    """Set the encoding functions of a worker process."""
+    global _worker_funcs
+    _worker_funcs = funcs
+
+
+def _run_worker(job: int, shard: ds.Dataset) -> Any:
+    """Encode a shard with the encoding function of a job in a worker process."""
+    return _worker_funcs[job](shard)
+
+
+def submit_shards(
+    jobs: Sequence[tuple[Callable, ds.Dataset]], num_proc: int
+) -> Callable[[], list[list[Any]]]:
+    """Start applying encoding functions to contiguous shards of datasets in a single pool of worker processes.
+
+    The functions are sent to each worker once when the worker starts, the shards are sent as they are processed.
+    Workers are forked where possible, so they share the memory of already loaded encoders.
+    As jax deadlocks in forked processes, the functions must not run jax computations.
+    All workers are forked before this function returns, so it should be called before starting other threads.
+    Submitting all jobs at once forks a single pool, instead of forking a pool per job while the threads managing
+    earlier pools run.
+
+    Args:
+        jobs (Sequence[tuple[Callable, ds.Dataset]]): Pairs of an encoding function taking a dataset and the dataset.
+            Select the columns needed by a function beforehand to reduce the data sent to the workers.
+        num_proc (int): Number of worker processes. Each dataset is split into this many shards.
+
+    Returns:
+        Callable[[], list[list[Any]]]: Function waiting for the workers and returning, per job, the results of its
+            function on each shard in the order of the rows in its dataset.
+
+    Raises:
+        ValueError: If `num_proc` is smaller than 1.
+    """
+    if num_proc < 1:
+        raise ValueError(f"num_proc must be at least 1, got {num_proc}")
+    shards = [
+        [
+            dataset.shard(min(num_proc, len(dataset)), i, contiguous=True)
+            for i in range(min(num_proc, len(dataset)))
+        ]
+        for _, dataset in jobs
+    ]
+    if all(len(job_shards) <= 1 for job_shards in shards):
+        results = [[func(dataset)] for func, dataset in jobs]
+        return lambda: results
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with warnings.catch_warnings():
+        # jax warns about every fork once it is imported, even if the workers do not use it
+        warnings.filterwarnings("ignore", "os.fork", RuntimeWarning)
+        executor = ProcessPoolExecutor(
+            min(num_proc, max(len(job_shards) for job_shards in shards)),
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(tuple(func for func, _ in jobs),),
+        )
+        futures = [
+            [executor.submit(_run_worker, job, shard) for shard in job_shards]
+            for job, job_shards in enumerate(shards)
+        ]
+
+    def result() -> list[list[Any]]:
+        try:
+            return [[future.result() for future in job] for job in futures]
+        finally:
+            # also joins the thread managing the pool, so later forks do not run concurrently with it
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    return result
+
+
+def map_shards(func: Callable, dataset: ds.Dataset, num_proc: int) -> list[Any]:
+    """Apply an encoding function to contiguous shards of a dataset in parallel worker processes.
+
+    See `submit_shards` for details.
+
+    Args:
+        func (Callable): Encoding function taking a dataset.
+        dataset (ds.Dataset): The dataset. Select the columns needed by `func` beforehand to reduce the data sent to the workers.
+        num_proc (int): Number of worker processes.
+
+    Returns:
+        list[Any]: The results of `func` on each shard, in the order of the rows in `dataset`.
+
+    Raises:
+        ValueError: If `num_proc` is smaller than 1.
+    """
+    return submit_shards([(func, dataset)], num_proc)()[0]
+
+
+def dependency_levels(
+    encoders: list[EncodingSpec], provided_encodings: list[str]
+) -> list[list[EncodingSpec]]:
+    """Group encoders into levels of the dependency graph, such that the encoders of a level are independent of each other.
+
+    The encoders of a level only require the provided encodings or encodings of earlier levels,
+    so they can be computed concurrently once the earlier levels are computed.
+
+    Args:
+        encoders (list[EncodingSpec]): Encoders in the order returned by `find_function_order`.
+        provided_encodings (list[str]): Encodings available before any encoder is called.
+
+    Returns:
+        list[list[EncodingSpec]]: The levels, each in the order of `encoders`.
+
+    Example:
+        >>> from pedata.encoding import base
+        >>> encoders = [
+        ...     base.EncodingSpec(["aa_seq"], ["dna_seq"], None),
+        ...     base.EncodingSpec(["aa_len"], ["aa_seq"], None),
+        ...     base.EncodingSpec(["dna_len"], ["dna_seq"], None),
+        ...     base.EncodingSpec(["aa_1hot"], ["aa_seq"], None),
+        ... ]
+        >>> [[e.provides[0] for e in level] for level in dependency_levels(encoders, ["dna_seq"])]
+        [['aa_seq', 'dna_len'], ['aa_len', 'aa_1hot']]
+    """
+    level_of = {encoding: -1 for encoding in provided_encodings}
+    levels = []
+    for encoder in encoders:
+        level = 1 + max((level_of.get(r, -1) for r in encoder.requires), default=-1)
+        for encoding in encoder.provides:
+            level_of[encoding] = level
+        if level == len(levels):
+            levels.append([])
+        levels[level].append(encoder)
+    return levels
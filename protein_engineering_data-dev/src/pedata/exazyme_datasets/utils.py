@@ -35,6 +35,7 @@ def dataset_base_processing(
     needed_encodings: list[str] | set[str] = [],
     add_index: bool = True,
     add_splits: bool = True,
+    max_lengths: dict[str, int] | None = None,
 ) -> Dataset:
     """Perform base processing on the dataset
     Args
@@ -42,6 +43,8 @@ def dataset_base_processing(
         add_index: whether to add an index column to the dataset
         add_splits: whether to add split columns to the dataset
         needed_encoding: encodings to add to the dataset
+        max_lengths: length of the longest sequence per sequence column to pad the encodings to,
+            e.g. of a whole file processed in blocks. Defaults to None (longest sequence of the dataset).
     Returns:
         ds.Dataset: processed dataset
     Raises:
@@ -53,7 +56,7 @@ def dataset_base_processing(
         )
 
     # Add encodings to dataset
-    dataset = add_encodings(dataset, needed=needed_encodings)
+    dataset = add_encodings(dataset, needed=needed_encodings, max_lengths=max_lengths)
 
     if add_index:
         # Add index column to dataset
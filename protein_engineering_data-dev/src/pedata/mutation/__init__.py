@@ -1,5 +1,12 @@
-from . import mutation, mutation_converter, mutation_extractor, mutation_util
+from . import (
+    mutation,
+    mutation_converter,
+    mutation_extractor,
+    mutation_table,
+    mutation_util,
+)
 
 from .mutation import Mutation
+from .mutation_table import MutationTable
 from . import mutation_converter as convert
 from . import mutation_extractor as extract
@@ -7,28 +7,46 @@ The `Mut` objects are defined in `pedata.constants` module and contain informati
 | `Mutation.sort_mutations_by_pos`: Sort a list of mutations by position.
 | `Mutation.parse_variant_mutations`: Parse each change/mutation in a list of changes.
 | `Mutation.parse_all_mutations`: Parse all mutations for all variants, where single mutations are delimited by the delimiting_character.
+| `Mutation.parse_mutation_column`: Parse the mutations of all variants at once into columnar arrays.
 | `Mutation.combine_variant_mutations`: Combine the mutations of one variant (represented as lists of Mut namedtuples) with those of another variant.
 | `Mutation.generate_variant_mutation_combinations`: Generate all possible combinations of mutations from two sets of variants.
 | `Mutation.generate_variant_mutation_combinations_within_dataset`: Generate all possible combinations of mutations within the same dataset.
+| `Mutation.iter_variant_recombinations`: Generate the recombinations of all pairs of non-conflicting variants, one pair at a time.
 | `Mutation.concat_mutations`: Combine multiple mutation lists into a single list of Mut namedtuples.
 | `Mutation.get_parent_aa_seq`: Get the parent amino acid sequence from a dataset (identified by the variant name 'wildtype' or 'wt').
 | `Mutation.get_parent_sketch_from_mutations`: Sketch out the parent sequence from a list of mutations. This is useful, for example, to then estimate the offset of the position encoding.
+| `Mutation.count_matches_per_offset`: Count the characters of a parent sketch matching the parent sequence for every offset.
 | `Mutation.estimate_offset`: Return offsets in rank order of likelihood between a parent string and mutated sequences.
 | `Mutation.apply_variant_mutations`: Apply mutations to a sequence.
+| `Mutation.apply_mutations_batched`: Apply the mutations of many variants to a parent sequence at once.
 | `Mutation.apply_all_variant_mutations`: Apply mutations to a list of sequences.
 
 """
 from jaxrk.core.typing import Array
-from typing import Callable, Union, Sequence
+from typing import Callable, Iterator, Optional, Union, Sequence
 import datasets as ds
 import numpy as onp
+import pyarrow as pa
+import pyarrow.compute as pc
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
+from functools import partial
+import multiprocessing
+from operator import itemgetter
+import scipy.sparse
+import warnings
 import re
 from pedata.integrity import check_mutation_namedtuple
 from collections import namedtuple
-from pedata.constants import Mut
+from pedata.constants import Mut, ParsedMutations, wildtype_codes
 import pedata.mutation.mutation_util as mu
 from pedata.integrity import check_dataset
+from pedata.encoding.transform import byte_lookup_table
+from pedata.mutation.mutation_table import (
+    MutationTable,
+    arrow_char_codes,
+    char_codes,
+)
 
 
 class Mutation:
@@ -185,7 +203,7 @@ class Mutation:
                 var = var.strip()
 
                 # Check if the aa_mut or dna_mut is not wildtype or empty
-                if var.lower() in ["wildtype (wt)", "wildtype", "", "wt", "-", "none"]:
+                if var.lower() in wildtype_codes:
                     non_parsed_idx.append(row_idx)
                     # Skip this row
                     continue
@@ -203,6 +221,105 @@ class Mutation:
 
         return parsed, non_parsed_idx
 
+    @staticmethod
+    def parse_mutation_column(
+        mutations: Union[ds.Dataset, pa.Array, pa.ChunkedArray, Sequence[str]],
+        offset: int = 0,
+        pattern: str = r"^(?P<src>[a-zA-Z])\s*(?P<pos>[0-9]+)\s*(?P<targ>[a-zA-Z])$",
+        delimiting_char: str = "_",
+        raise_invalid: bool = True,
+    ) -> ParsedMutations:
+        """
+        Parse the mutations of all variants at once into columnar arrays.
+
+        The mutation codes are split, validated and extracted by Arrow compute kernels on the whole column,
+        without creating Python objects per mutation.
+
+        Args:
+            mutations (Union[ds.Dataset, pa.Array, pa.ChunkedArray, Sequence[str]]): Mutation codes of all variants,
+                or a dataset with an `aa_mut` or `dna_mut` column.
+            offset (int, optional): Offset of positions in mutation codes. Defaults to 0.
+            pattern (str, optional): Regular expression (RE2 syntax) matching a single mutation,
+                with the groups `src`, `pos` and `targ`. Defaults to `r"^(?P<src>[a-zA-Z])\\s*(?P<pos>[0-9]+)\\s*(?P<targ>[a-zA-Z])$"`.
+            delimiting_char (str, optional): Character that delimits individual mutations. Defaults to "_".
+            raise_invalid (bool, optional): Whether to raise an error listing all variants with invalid mutations.
+                If False, these variants are left out of the mutation arrays and listed in `invalid_idx`. Defaults to True.
+
+        Returns:
+            ParsedMutations: Variant index, 0-based position, source and target character (as uint8 bytes) of each mutation,
+                sorted by variant and position, and the row indices of wildtype and invalid variants.
+
+        Raises:
+            TypeError: If the dataset contains no mutation column.
+            ValueError: If `raise_invalid` is True and mutation codes don't match `pattern`.
+
+        Example:
+            >>> parsed = Mutation.parse_mutation_column(["G34C_L33T", "wildtype", "K14M"])
+            >>> parsed.variant_idx, parsed.pos, bytes(parsed.src), bytes(parsed.targ), parsed.wildtype_idx
+            (array([0, 0, 2]), array([32, 33, 13]), b'LGK', b'TCM', array([1]))
+            >>> Mutation.parse_mutation_column(["G34C", "K14"], raise_invalid=False).invalid_idx
+            array([1])
+        """
+        if isinstance(mutations, ds.Dataset):
+            mut_columns = [c for c in ["dna_mut", "aa_mut"] if c in mutations.features]
+            if len(mut_columns) == 0:
+                raise TypeError(
+                    "The dataset should contain an 'aa_mut' or 'dna_mut' column"
+                )
+            mutations = mutations.data.column(mut_columns[0])
+        elif not isinstance(mutations, (pa.Array, pa.ChunkedArray)):
+            mutations = pa.array(list(mutations), type=pa.string(), from_pandas=True)
+        if isinstance(mutations, pa.ChunkedArray):
+            mutations = mutations.combine_chunks()
+
+        # Variants without mutations, missing codes count as empty
+        codes = pc.fill_null(pc.utf8_trim_whitespace(mutations), "")
+        is_wildtype = pc.is_in(
+            pc.utf8_lower(codes), value_set=pa.array(wildtype_codes)
+        ).to_numpy(zero_copy_only=False)
+        rows = onp.flatnonzero(~is_wildtype)
+
+        # Split all variants into single mutations
+        split = pc.split_pattern(codes.filter(pa.array(~is_wildtype)), delimiting_char)
+        variant_idx = onp.repeat(rows, onp.diff(split.offsets.to_numpy()))
+        extracted = pc.extract_regex(
+            pc.utf8_trim_whitespace(pc.list_flatten(split)), pattern
+        )
+
+        # Collect all variants with invalid mutations
+        is_valid = extracted.is_valid().to_numpy(zero_copy_only=False)
+        invalid_idx = onp.unique(variant_idx[~is_valid])
+        if len(invalid_idx) > 0:
+            if raise_invalid:
+                invalid = [mutations[int(i)].as_py() for i in invalid_idx[:10]]
+                raise ValueError(
+                    f"No valid mutation found in {len(invalid_idx)} variants: "
+                    + ", ".join(f"'{v}'" for v in invalid)
+                    + (", ..." if len(invalid_idx) > 10 else "")
+                )
+            keep = ~onp.isin(variant_idx, invalid_idx)
+            variant_idx = variant_idx[keep]
+            extracted = extracted.filter(pa.array(keep))
+
+        pos = pc.cast(extracted.field("pos"), pa.int64()).to_numpy() - 1 + offset
+        src = arrow_char_codes(extracted.field("src"))
+        targ = arrow_char_codes(extracted.field("targ"))
+
+        # Sort the mutations of each variant by position, using a single sort key
+        if len(pos) > 0:
+            key = variant_idx * (int(pos.max() - pos.min()) + 1) + (pos - pos.min())
+            order = onp.argsort(key, kind="stable")
+        else:
+            order = onp.zeros(0, dtype=onp.int64)
+        return ParsedMutations(
+            variant_idx[order],
+            pos[order],
+            src[order],
+            targ[order],
+            onp.flatnonzero(is_wildtype),
+            invalid_idx,
+        )
+
     @staticmethod
     def combine_variant_mutations(
         mut1: list[Mut], mut2: list[Mut], check_validity: bool = True
@@ -401,12 +518,133 @@ class Mutation:
         return rval  # Return the final list containing all possible combinations
 
     @staticmethod
-    def concat_mutations(mut: list[list[Mut]]) -> list[Mut]:
+    def _recombination_pairs(
+        positions: scipy.sparse.csr_matrix,
+        mutations: scipy.sparse.csr_matrix,
+        start: int,
+        stop: int,
+        max_distance: Optional[int] = None,
+        max_overlap: Optional[int] = None,
+    ) -> tuple[onp.ndarray, onp.ndarray]:
+        """Find the pairs (i, j) with start <= i < stop and i < j of variants which can be recombined, see `iter_variant_recombinations`."""
+        num_variants = positions.shape[0]
+        num_mut = onp.diff(positions.indptr)
+
+        # Shared positions and shared mutations of the variants in the chunk with all others
+        shared_pos = (positions[start:stop] @ positions.T).toarray()
+        shared_mut = (mutations[start:stop] @ mutations.T).toarray()
+
+        valid = (shared_pos == shared_mut) & (
+            onp.arange(num_variants) > onp.arange(start, stop)[:, None]
+        )
+        if max_distance is not None:
+            distance = (
+                num_mut[start:stop, None] + num_mut[None, :] - shared_pos - shared_mut
+            )
+            valid &= distance <= max_distance
+        if max_overlap is not None:
+            valid &= shared_pos <= max_overlap
+        rows, cols = onp.nonzero(valid)
+        return rows + start, cols
+
+    @staticmethod
+    def iter_variant_recombinations(
+        variants: Union[list[list[Mut]], MutationTable],
+        max_distance: Optional[int] = None,
+        max_overlap: Optional[int] = None,
+        chunk_size: int = 256,
+        num_proc: int = 1,
+    ) -> Iterator[tuple[int, int, list[Mut]]]:
+        """Generate the recombinations of all pairs of variants, one pair at a time.
+
+        Two variants are recombined by taking the union of their mutations. Pairs which mutate the same position
+        differently conflict and are skipped. The conflicts of a chunk of variants with all other variants are found
+        at once from sparse products of position and mutation indicators, so only the pairs which pass all filters are materialized.
+
+        Args:
+            variants (Union[list[list[Mut]], MutationTable]): The mutations of each variant.
+            max_distance (Optional[int], optional): Only recombine variants whose sequences differ at no more than this many positions. Defaults to None (no limit).
+            max_overlap (Optional[int], optional): Only recombine variants sharing no more than this many mutated positions. Defaults to None (no limit).
+            chunk_size (int, optional): Number of variants compared to all others at once. Defaults to 256.
+            num_proc (int, optional): Number of worker processes comparing chunks of variants in parallel. Defaults to 1.
+
+        Yields:
+            tuple[int, int, list[Mut]]: Indices i < j of the two variants and their combined mutations sorted by position, ordered by i and j.
+
+        Raises:
+            ValueError: If `chunk_size` or `num_proc` is smaller than 1.
+
+        Example:
+            >>> variants = [[Mut(1, "A", "G")], [Mut(2, "C", "T")], [Mut(1, "A", "C")]]
+            >>> for i, j, mut in Mutation.iter_variant_recombinations(variants):
+            ...     print(i, j, mut)
+            0 1 [Mut(pos=1, src='A', targ='G'), Mut(pos=2, src='C', targ='T')]
+            1 2 [Mut(pos=1, src='A', targ='C'), Mut(pos=2, src='C', targ='T')]
+        """
+        if chunk_size < 1 or num_proc < 1:
+            raise ValueError(
+                f"chunk_size and num_proc must be at least 1, got {chunk_size} and {num_proc}"
+            )
+        table = (
+            variants
+            if isinstance(variants, MutationTable)
+            else MutationTable.from_mutations(variants)
+        )
+        if table.num_mutations == 0:
+            return
+
+        # Sparse indicators of the mutated positions and of the mutations of each variant
+        variant_idx = table.variant_idx
+        ones = onp.ones(table.num_mutations, dtype=onp.int32)
+        pos = table.pos.astype(onp.int64) - table.pos.min()
+        _, mut_idx = onp.unique(
+            (pos << 16) | (table.src.astype(onp.int64) << 8) | table.targ,
+            return_inverse=True,
+        )
+        find_pairs = partial(
+            Mutation._recombination_pairs,
+            scipy.sparse.csr_matrix(
+                (ones, (variant_idx, pos)), shape=(len(table), pos.max() + 1)
+            ),
+            scipy.sparse.csr_matrix(
+                (ones, (variant_idx, mut_idx.ravel())),
+                shape=(len(table), mut_idx.max() + 1),
+            ),
+            max_distance=max_distance,
+            max_overlap=max_overlap,
+        )
+        mutations = table.to_mutations()
+        chunks = [
+            (start, min(start + chunk_size, len(table)))
+            for start in range(0, len(table), chunk_size)
+        ]
+
+        if num_proc == 1 or len(chunks) == 1:
+            pairs = (find_pairs(start, stop) for start, stop in chunks)
+        else:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("fork" if "fork" in methods else None)
+            with warnings.catch_warnings():
+                # jax warns about every fork once it is imported, even if the workers do not use it
+                warnings.filterwarnings("ignore", "os.fork", RuntimeWarning)
+                executor = ProcessPoolExecutor(num_proc, mp_context=context)
+                pairs = executor.map(find_pairs, *zip(*chunks))
+            # the workers exit once all chunks are processed
+            executor.shutdown(wait=False)
+
+        for rows, cols in pairs:
+            for i, j in zip(rows.tolist(), cols.tolist()):
+                yield i, j, sorted(
+                    dict.fromkeys(mutations[i] + mutations[j]), key=itemgetter(0)
+                )
+
+    @staticmethod
+    def concat_mutations(mut: Union[list[list[Mut]], MutationTable]) -> list[Mut]:
         """
         Combine multiple mutation lists into a single list of Mut namedtuples.
 
         Args:
-            mut (List[List[Mut]]): A list of mutation lists, where each inner list contains Mut namedtuples.
+            mut (Union[List[List[Mut]], MutationTable]): A list of mutation lists, where each inner list contains Mut namedtuples, or a table of mutations.
 
         Returns:
             List[Mut]: A single list of Mut namedtuples combining all the mutation lists.
@@ -419,6 +657,10 @@ class Mutation:
 
         rval = []  # List to store the combined mutations
 
+        # Split a table into the mutation lists of its variants
+        if isinstance(mut, MutationTable):
+            mut = mut.to_mutations()
+
         # Add mutation namedtuples to a single list
         for m in mut:
             if not isinstance(m, list):
@@ -500,12 +742,12 @@ class Mutation:
 
     @staticmethod
     def get_parent_sketch_from_mutations(
-        mut: list[Mut], fill_character: str = "*"
+        mut: Union[list[Mut], MutationTable], fill_character: str = "*"
     ) -> namedtuple("Sketch", "pos str"):
         """Sketch out the parent sequence from a list of mutations. This is useful, for example, to then estimate the offset of the position encoding.
 
         Args:
-            mut (list): List of namedtuples representing mutations. Each namedtuple should contain at least the position (int) and source (str) respectively.
+            mut (Union[list, MutationTable]): List of namedtuples representing mutations, or a table of mutations. Each namedtuple should contain at least the position (int) and source (str) respectively.
             fill_character (str, optional): Character used to fill positions that do not occur in `mut`. Defaults to "*".
 
         Returns:
@@ -522,6 +764,9 @@ class Mutation:
             (2, '**BA')
         """
 
+        if isinstance(mut, MutationTable):
+            return Mutation._get_parent_sketch_from_table(mut, fill_character)
+
         # Check if mutations is a list
         if not isinstance(mut, list) or len(mut) == 0:
             raise TypeError("Input a non-empty list of mutations")
@@ -574,9 +819,78 @@ class Mutation:
         # Return the number of positions filled and the resulting parent sketch string
         return num_mut_pos, parent_sketch
 
+    @staticmethod
+    def _get_parent_sketch_from_table(
+        mut: MutationTable, fill_character: str = "*"
+    ) -> namedtuple("Sketch", "pos str"):
+        """Sketch out the parent sequence from a table of mutations, see `get_parent_sketch_from_mutations`."""
+        if mut.num_mutations == 0:
+            raise TypeError("Input a non-empty list of mutations")
+        if mut.pos.min() < 0:
+            raise ValueError("Mutation positions should not be negative")
+
+        # Collect all source character conflicts
+        order = onp.lexsort((mut.src, mut.pos))
+        pos, src = mut.pos[order], mut.src[order]
+        conflicts = onp.unique(pos[1:][(pos[1:] == pos[:-1]) & (src[1:] != src[:-1])])
+        if len(conflicts) > 0:
+            multiple_source_characters = [
+                f"pos {k}: {set(map(chr, onp.unique(src[pos == k])))}"
+                for k in conflicts
+            ]
+            raise ValueError(
+                f"Multiple source characters found at the same position: {', '.join(multiple_source_characters)}"
+            )
+
+        # Fill the parent sequence with the source characters at their respective positions
+        parent = onp.full(pos[-1] + 1, ord(fill_character), dtype=onp.uint8)
+        parent[pos] = src
+        return len(onp.unique(pos)), parent.tobytes().decode()
+
+    @staticmethod
+    def count_matches_per_offset(
+        sketch: str, parent: str, fill_character: str = " "
+    ) -> onp.ndarray:
+        """Count the characters of a sketch matching the parent sequence, for every offset of the sketch in the parent.
+
+        The counts of all offsets are computed at once as the sum of the cross-correlations between the indicator vectors
+        of each letter in the sketch and in the parent, which are computed with a single inverse FFT.
+
+        Args:
+            sketch (str): Sketch of the parent sequence, where unknown characters are `fill_character`.
+            parent (str): The parent sequence.
+            fill_character (str, optional): Character of the sketch which is never counted. Defaults to " ".
+
+        Returns:
+            onp.ndarray: Number of matching characters for each of the `len(parent) - len(sketch) + 1` offsets.
+
+        Example:
+            >>> Mutation.count_matches_per_offset("C E", "ABCDEFGH")
+            array([0, 0, 2, 0, 0, 0])
+        """
+        sketch = onp.frombuffer(sketch.encode("utf-32-le"), dtype=onp.uint32)
+        parent = onp.frombuffer(parent.encode("utf-32-le"), dtype=onp.uint32)
+        num_offsets = max(len(parent) - len(sketch) + 1, 0)
+        letters = onp.intersect1d(sketch[sketch != ord(fill_character)], parent)
+        if num_offsets == 0 or len(letters) == 0:
+            return onp.zeros(num_offsets, dtype=onp.int64)
+
+        # The correlation of a letter at offset i is the convolution of its parent indicator
+        # with its reversed sketch indicator at i + len(sketch) - 1
+        size = 1 << (len(parent) + len(sketch) - 1).bit_length()
+        spectrum = 0
+        for letter in letters:
+            spectrum = spectrum + onp.fft.rfft(parent == letter, size) * onp.fft.rfft(
+                sketch[::-1] == letter, size
+            )
+        correlation = onp.fft.irfft(spectrum, size)
+        return onp.rint(
+            correlation[len(sketch) - 1 : len(sketch) - 1 + num_offsets]
+        ).astype(onp.int64)
+
     @staticmethod
     def estimate_offset(
-        mut: Union[list[Mut], ds.Dataset],
+        mut: Union[list[Mut], MutationTable, ds.Dataset],
         parent: str,
         delimiting_char: str = "_",
         most_likely: bool = False,
@@ -589,7 +903,7 @@ class Mutation:
         mutation codes provided. The offset with the highest matching ratio is considered the most likely offset.
 
         Args:
-            mut (Union[Mut, ds.Dataset]): Mutations information represented as a namedtuple with atleast "source" and "position" attributes, or a DaDataset containing a "aa_mut" or "dna_mut" column. If a Dataset is provided, the `delimiting_char` is used to parse the mutations.
+            mut (Union[Mut, MutationTable, ds.Dataset]): Mutations information represented as a namedtuple with atleast "source" and "position" attributes, a table of mutations, or a DaDataset containing a "aa_mut" or "dna_mut" column. If a Dataset is provided, the `delimiting_char` is used to parse the mutations.
             parent (str): The parent string for which to find the offset.
             delimiting_char (str, optional): The string delimiting individual mutations when parsing mutations from a Dataset.
                 Defaults to "_".
@@ -627,15 +941,22 @@ class Mutation:
 
             # Validate dataset
             check_dataset(mut)
-            parsed_mut, non_parsed_idx = Mutation.parse_all_mutations(
+            if not {"aa_mut", "dna_mut"} & set(mut.column_names):
+                raise ValueError(f"No parsed mutations found in dataset: \n{input_mut}")
+            parsed = Mutation.parse_mutation_column(
                 mut, delimiting_char=delimiting_char
             )
 
             # Check if parsed mutation is empty
-            if len(parsed_mut) == 0:
+            if len(parsed.pos) == 0:
                 raise ValueError(f"No parsed mutations found in dataset: \n{input_mut}")
 
-            mut = Mutation.concat_mutations(parsed_mut)
+            mut = MutationTable.from_variant_idx(
+                parsed.variant_idx, parsed.pos, parsed.src, parsed.targ
+            )
+
+        elif isinstance(mut, MutationTable):
+            pass
 
         elif isinstance(mut, list) and all(isinstance(m, Mut) for m in mut):
             # Validate mutation namedtuples
@@ -651,43 +972,35 @@ class Mutation:
         )
         sketch = sketch.rstrip()
         off = len(sketch) - len(sketch.strip())
-        sketch = onp.array(list(sketch.strip()), dtype=object)
-        parent = onp.array(list(parent), dtype=object).squeeze()
-        not_fill = sketch != fill_character
-        num_matching_pos = []
-        non_matching_pos = []
-        non_matching_src = []
-        non_matching_par = []
+        sketch = sketch.strip()
 
         # Calculate the max_offset and raise an error is it's a negative number
         max_offset = len(parent) - len(sketch) + 1
         if max_offset < 0:
             raise Exception(
-                f"The length of the parent sequence ({''.join(parent.astype(str))}) is smaller than the sketch derived from its mutations: {''.join(sketch.astype(str))}"
-            )
-
-        # Compare parent sequences with the sketch
-        for i in range(max_offset):
-            parent_window = parent[i : i + len(sketch)]
-            match = (parent_window[not_fill] == sketch[not_fill]).squeeze()
-            no_match = onp.bitwise_not(match)
-            num_matching_pos.append(match.sum())
-            non_matching_pos.append(
-                onp.arange(off, off + len(sketch))[not_fill][no_match] + 1
+                f"The length of the parent sequence ({parent}) is smaller than the sketch derived from its mutations: {sketch}"
             )
-            non_matching_src.append(sketch[not_fill][no_match])
-            non_matching_par.append(parent_window[not_fill][no_match])
 
-        # Convert arrays to NumPy arrays and perform sorting
-        num_matching_pos = onp.atleast_1d(onp.array(num_matching_pos).squeeze())
-        non_matching_pos = onp.atleast_1d(
-            onp.array(non_matching_pos, dtype=object).squeeze()
+        # Compare parent sequences with the sketch at all offsets at once
+        num_matching_pos = Mutation.count_matches_per_offset(
+            sketch, parent, fill_character=fill_character
         )
         rank_order = onp.argsort(num_matching_pos)[::-1].squeeze()
         rval = onp.atleast_1d(
             (rank_order - off).squeeze()
         )  # Adjust the ranked order of offsets
 
+        # Collect the mismatches of the most likely offset only
+        best = onp.atleast_1d(rank_order)[0]
+        sketch = onp.array(list(sketch), dtype=object)
+        parent_window = onp.array(list(parent[best : best + len(sketch)]), dtype=object)
+        no_match = onp.flatnonzero(
+            (sketch != fill_character) & (parent_window != sketch)
+        )
+        non_matching_pos = no_match + off + 1
+        non_matching_src = sketch[no_match]
+        non_matching_par = parent_window[no_match]
+
         # Check if all mutations match the parent sequence
         if num_mut == num_matching_pos.max():
             rval = ds.Dataset.from_dict(
@@ -704,11 +1017,9 @@ class Mutation:
                 {
                     "offset": [rval[0]],
                     "matching_ratio": [num_matching_pos[rank_order][0] / num_mut],
-                    "non_match_pos": [str(non_matching_pos[rank_order[0]])],
-                    "non_match_mutation_src": [str(non_matching_src[rank_order[0]])],
-                    "non_match_parent_character": [
-                        str(non_matching_par[rank_order[0]])
-                    ],
+                    "non_match_pos": [str(non_matching_pos)],
+                    "non_match_mutation_src": [str(non_matching_src)],
+                    "non_match_parent_character": [str(non_matching_par)],
                 }
             )
 
@@ -774,14 +1085,111 @@ class Mutation:
 
         return seq  # Return the mutated sequence
 
+    @staticmethod
+    def apply_mutations_batched(
+        parent: str,
+        variant_idx: Sequence[int],
+        pos: Sequence[int],
+        targ: Union[Sequence[str], onp.ndarray],
+        num_variants: int = None,
+        offset: int = 0,
+        src: Union[Sequence[str], onp.ndarray] = None,
+        check_validity: bool = False,
+        output: str = "str",
+        alphabet: Sequence[str] = None,
+    ) -> Union[list[str], onp.ndarray]:
+        """
+        Apply the mutations of many variants to a parent sequence at once.
+
+        The parent is tiled into an array of shape (num_variants, len(parent)) holding one byte per character,
+        and all substitutions are written with a single scatter from the flat mutation arrays.
+
+        Args:
+            parent (str): Parent sequence of ASCII characters.
+            variant_idx (Sequence[int]): Index of the variant of each mutation.
+            pos (Sequence[int]): Position of each mutation, relative to the parent after adding `offset`.
+            targ (Union[Sequence[str], onp.ndarray]): Target character of each mutation, or its byte as uint8 array.
+            num_variants (int, optional): Number of variants. Defaults to None (largest variant index + 1).
+            offset (int, optional): Offset of the mutation positions to the parent sequence. Defaults to 0.
+            src (Union[Sequence[str], onp.ndarray], optional): Source character of each mutation, needed to check validity. Defaults to None.
+            check_validity (bool, optional): Whether to check that the source characters match the parent sequence. Defaults to False.
+            output (str, optional): "str" for a list of sequences, "bytes" for the uint8 array of characters
+                or "tokens" for the indices of the characters in `alphabet`. Defaults to "str".
+            alphabet (Sequence[str], optional): Alphabet of the tokens, needed if `output` is "tokens". Defaults to None.
+
+        Returns:
+            Union[list[str], onp.ndarray]: The mutated sequences, or an array of shape (num_variants, len(parent)).
+
+        Raises:
+            TypeError: If the parent sequence is not a non-empty string.
+            ValueError: If the mutation arrays differ in length, characters are not single ASCII characters,
+                positions are out of range, source characters don't match the parent or the output is unknown.
+
+        Example:
+            >>> Mutation.apply_mutations_batched("TGAACC", [0, 0, 1], [2, 4, 0], ["G", "T", "A"])
+            ['TGGATC', 'AGAACC']
+            >>> Mutation.apply_mutations_batched("TGAACC", [0], [2], ["G"], num_variants=2, output="tokens", alphabet="ACGT")
+            array([[3, 2, 2, 0, 1, 1],
+                   [3, 2, 0, 0, 1, 1]], dtype=int16)
+        """
+        if not isinstance(parent, str) or len(parent) == 0:
+            raise TypeError("Parent sequence should be a string and not empty")
+        if output not in ("str", "bytes", "tokens"):
+            raise ValueError(
+                f"Output should be 'str', 'bytes' or 'tokens', got '{output}'"
+            )
+
+        parent_codes = char_codes(parent)
+        variant_idx = onp.asarray(variant_idx, dtype=onp.int64)
+        pos = onp.asarray(pos, dtype=onp.int64) + offset
+        targ = char_codes(targ)
+        if not len(variant_idx) == len(pos) == len(targ):
+            raise ValueError(
+                f"Got {len(variant_idx)} variant indices, {len(pos)} positions and {len(targ)} targets"
+            )
+        if num_variants is None:
+            num_variants = int(variant_idx.max()) + 1 if len(variant_idx) > 0 else 0
+
+        out_of_range = (pos < 0) | (pos >= len(parent))
+        if out_of_range.any():
+            raise ValueError(
+                f"Mutation positions {onp.unique(pos[out_of_range] - offset).tolist()} are outside the parent sequence of length {len(parent)} (offset {offset})"
+            )
+
+        if check_validity:
+            if src is None:
+                raise ValueError("Source characters are needed to check validity")
+            src = char_codes(src)
+            invalid = onp.flatnonzero(parent_codes[pos] != src)
+            if len(invalid) > 0:
+                raise ValueError(
+                    "Mutations assume other characters than the parent: "
+                    + ", ".join(
+                        f"'{chr(src[i])}' at position {pos[i]} in variant {variant_idx[i]} (found '{parent[pos[i]]}')"
+                        for i in invalid[:10]
+                    )
+                    + (f" and {len(invalid) - 10} more" if len(invalid) > 10 else "")
+                )
+
+        seqs = onp.tile(parent_codes, (num_variants, 1))
+        seqs[variant_idx, pos] = targ
+
+        if output == "bytes":
+            return seqs
+        elif output == "tokens":
+            if alphabet is None:
+                raise ValueError("An alphabet is needed to output tokens")
+            return byte_lookup_table(alphabet)[seqs]
+        return [s.decode() for s in seqs.view(f"S{len(parent)}").ravel()]
+
     @staticmethod
     def apply_all_mutations(
-        mutations: Union[ds.Dataset, list[list[Mut]]],
+        mutations: Union[ds.Dataset, list[list[Mut]], MutationTable],
         parent: str = None,
         offset: int = None,
         check_validity: bool = False,
-        valid: re.Pattern = re.compile(r"^[a-zA-Z]\s*[0-9]+\s*[a-zA-Z]$"),
-        extractor: Callable = lambda c: (int(c[1:-1]), c[0], c[-1]),
+        valid: re.Pattern = None,
+        extractor: Callable = None,
         delimiting_char: str = "_",
     ) -> list[str]:
         """
@@ -790,7 +1198,8 @@ class Mutation:
         The resulting mutated sequences are returned as a list.
 
         Args:
-            mutations (ds.Dataset): Dataset containing atleast an aa_mut or a dna_mut column.
+            mutations (Union[ds.Dataset, list[list[Mut]], MutationTable]): Dataset containing atleast an aa_mut or a dna_mut column,
+                or the mutations of each variant as list of namedtuples or table.
             parent (str, optional): Parent sequence.
                 If not provided, it is assumed to be contained in the dataset,
                 in the unique row where the 'variant' column contains the string 'wildtype'.
@@ -801,9 +1210,11 @@ class Mutation:
             check_validity (bool, optional): Whether to perform a validity check for the contained mutations.
                 Defaults to False.
             valid (re.Pattern, optional): Regular expression to check the validity of a mutation string.
-                Defaults to `re.compile(r"^[a-zA-Z]\s*[0-9]+\s*[a-zA-Z]$")`.
+                Defaults to None, i.e. `re.compile(r"^[a-zA-Z]\s*[0-9]+\s*[a-zA-Z]$")`.
             extractor (Callable, optional): Function to extract a mutation triple containing `(position, source, target)`.
-                Defaults to `lambda c: (int(c[1:-1]), c[0], c[-1])`.
+                Defaults to None, i.e. `lambda c: (int(c[1:-1]), c[0], c[-1])`.
+                Mutation codes of a dataset in this default format are parsed by Arrow with `parse_mutation_column`,
+                a custom `valid` or `extractor` parses them row by row with `parse_all_mutations`.
             delimiting_char (str, optional): Delimiting character for the mutations.
                 Defaults to "_".
 
@@ -832,21 +1243,52 @@ class Mutation:
         no_mutation = []  # Counter for the number of variants without mutations found.
         parsed_mutations = []
         # Check if the input is a Dataset
-        if not isinstance(mutations, ds.Dataset) and not isinstance(mutations, list):
+        if not isinstance(mutations, (ds.Dataset, list, MutationTable)):
             raise TypeError("Input either a dataset or a list of namedtuple mutations")
 
         elif len(mutations) == 0:
             raise ValueError("The input dataset should not be empty")
 
-        if isinstance(mutations, ds.Dataset):
+        if isinstance(mutations, ds.Dataset) and valid is None and extractor is None:
+            dataset = mutations
+            check_dataset(dataset)
+            mut_columns = [
+                mut
+                for seq, mut in [("dna_seq", "dna_mut"), ("aa_seq", "aa_mut")]
+                if seq in dataset.features and mut in dataset.features
+            ]
+            if len(mut_columns) == 0:
+                return rval
+
+            # Parse all mutation codes at once, wildtype rows are variants without mutations
+            parsed = Mutation.parse_mutation_column(
+                dataset.data.column(mut_columns[0]), delimiting_char=delimiting_char
+            )
+            if len(parsed.wildtype_idx) > 1:
+                raise Exception(
+                    "More than one variant without mutations found. This is not supported."
+                )
+            if len(parsed.wildtype_idx) == len(dataset):
+                return rval
+            parsed_mutations = MutationTable.from_variant_idx(
+                parsed.variant_idx,
+                parsed.pos,
+                parsed.src,
+                parsed.targ,
+                num_variants=len(dataset),
+            )
+            if parent is None:
+                parent = Mutation.get_parent_aa_seq(dataset)
+
+        elif isinstance(mutations, ds.Dataset):
             dataset = mutations
 
-            # Parse mutations if the parsed_mutations column/feature is not present
+            # Parse the mutations row by row with the custom format
             parsed_mutations, no_mutation = Mutation.parse_all_mutations(
                 dataset,
                 delimiting_char=delimiting_char,
-                valid=valid,
-                extractor=extractor,
+                valid=valid or re.compile(r"^[a-zA-Z]\s*[0-9]+\s*[a-zA-Z]$"),
+                extractor=extractor or (lambda c: (int(c[1:-1]), c[0], c[-1])),
             )
 
             # Raise an Exception if they're more more than one mutations that were not changed
@@ -863,7 +1305,7 @@ class Mutation:
             if parent is None:
                 parent = Mutation.get_parent_aa_seq(dataset)
 
-        elif isinstance(mutations, list):
+        elif isinstance(mutations, (list, MutationTable)):
             parsed_mutations = mutations
             if parent is None:
                 raise ValueError("Input a parent sequence")
@@ -871,25 +1313,70 @@ class Mutation:
         # If offset is not provided, estimate it based on the mutations
         if offset is None:
             estimation = Mutation.estimate_offset(
-                Mutation.concat_mutations(parsed_mutations), parent
+                (
+                    parsed_mutations
+                    if isinstance(parsed_mutations, MutationTable)
+                    else Mutation.concat_mutations(parsed_mutations)
+                ),
+                parent,
             )
             offset = estimation["offset"][0]
             if estimation["matching_ratio"][0] != 1.0:
                 raise Exception("Couldn't estimate an offset with 100%% certainty.")
 
-        # Iterate over each variant and apply the mutations
+        # Apply the mutations of all variants at once if they substitute single characters
+        flat = (
+            []
+            if isinstance(parsed_mutations, MutationTable)
+            else Mutation.concat_mutations(parsed_mutations)
+        )
+        if isinstance(parsed_mutations, MutationTable):
+            mutated = Mutation.apply_mutations_batched(
+                parent,
+                parsed_mutations.variant_idx,
+                parsed_mutations.pos,
+                parsed_mutations.targ,
+                num_variants=len(parsed_mutations),
+                offset=offset,
+                src=parsed_mutations.src,
+                check_validity=check_validity,
+            )
+        elif (
+            isinstance(parent, str)
+            and parent.isascii()
+            and set(map(len, flat)) <= {3}
+            and set(map(len, map(itemgetter(1), flat))) <= {1}
+            and set(map(len, map(itemgetter(2), flat))) <= {1}
+        ):
+            mutated = Mutation.apply_mutations_batched(
+                parent,
+                onp.repeat(
+                    onp.arange(len(parsed_mutations)),
+                    [len(mut) for mut in parsed_mutations],
+                ),
+                list(map(itemgetter(0), flat)),
+                list(map(itemgetter(2), flat)),
+                num_variants=len(parsed_mutations),
+                offset=offset,
+                src=list(map(itemgetter(1), flat)),
+                check_validity=check_validity,
+            )
+        else:
+            mutated = [
+                Mutation.apply_variant_mutations(
+                    mut, parent, offset=offset, check_validity=check_validity
+                )
+                for mut in parsed_mutations
+            ]
+
+        # Iterate over each variant and collect the mutated sequences
         for row_idx in range(len(mutations)):
             # Append parent sequence where there is no mutations
             if row_idx in no_mutation:
                 rval.append(parent)
 
-            # Apply variant mutations to the parent sequence
+            # Append the mutated parent sequence
             if row_idx < len(parsed_mutations):
-                mut = parsed_mutations[row_idx]
-                rval.append(
-                    Mutation.apply_variant_mutations(
-                        mut, parent, offset=offset, check_validity=check_validity
-                    )
-                )
+                rval.append(mutated[row_idx])
 
         return rval
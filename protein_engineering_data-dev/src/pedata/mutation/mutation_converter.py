@@ -1,12 +1,13 @@
 """ The mutation_converter module contains functions for converting a mutation object type into another type.
 
 | `convert_variant_mutation_to_str`: Mut objects into str 
-| `convert_all_variant_mutations_to_str`: Mut objects into list
+| `convert_all_variant_mutations_to_str`: Mut objects or a MutationTable into list
 | `dict_to_namedtuple_mut`: dictionary into Mut objects
 | `namedtuple_to_dict_mut`: Mut objects into dictionary """
 
-from typing import Iterable, Dict
+from typing import Iterable, Dict, Union
 from pedata.mutation.mutation import Mutation
+from pedata.mutation.mutation_table import MutationTable
 from pedata.integrity import check_mutation_namedtuple
 from pedata.constants import Mut
 import pedata.mutation.mutation_util as mu
@@ -47,16 +48,16 @@ def convert_variant_mutation_to_str(
     for m in mut:
         check_mutation_namedtuple(m)
 
-    # Collect src & targ attributes from mutations
-    tmp = []
-    sources = [mutation.src for mutation in mut]
-    targets = [mutation.targ for mutation in mut]
-
     # Convert mutation tuples to mutation namedtuples before sorting
     mut = [mu.convert_tuple_to_valid_namedtuple(m) for m in mut]
 
     sorted_mutations = Mutation.sort_mutations_by_pos(mut)
 
+    # Collect src & targ attributes from the sorted mutations
+    tmp = []
+    sources = [mutation.src for mutation in sorted_mutations]
+    targets = [mutation.targ for mutation in sorted_mutations]
+
     # Loop over sorted positions
     sorted_positions = [mutation[0] for mutation in sorted_mutations]
     for i, pos in enumerate(sorted_positions):
@@ -68,12 +69,14 @@ def convert_variant_mutation_to_str(
 
 
 def convert_all_variant_mutations_to_str(
-    mut: list[list[Mut]], delimiting_char: str = "_", offset: int = 0
+    mut: Union[list[list[Mut]], MutationTable],
+    delimiting_char: str = "_",
+    offset: int = 0,
 ) -> list:
     """Turn a sequence of mutation sequences into a list of string encodings.
 
     Args:
-        mut (sequence[sequence[tuple]]): Sequence of mutation sequences, one for each variant.
+        mut (Union[sequence[sequence[tuple]], MutationTable]): Sequence of mutation sequences, one for each variant, or a table of mutations.
         delimiting_char (str): Character used to connect the mutations for one variant (default is "_")
         offset (int): Offset value to adjust mutation positions (default is 0)
 
@@ -87,9 +90,19 @@ def convert_all_variant_mutations_to_str(
     ... ]
     >>> convert_all_variant_mutations_to_str(mutation)
     ['A13T_T24G', 'M16K_G24A']
+    >>> convert_all_variant_mutations_to_str(MutationTable.from_mutations(mutation))
+    ['A13T_T24G', 'M16K_G24A']
 
     """
 
+    # Encode all mutations of a table at once
+    if isinstance(mut, MutationTable):
+        if len(mut) == 0:
+            raise TypeError("Invalid input: Expected a non-empty table of mutations")
+        if (np.diff(mut.offsets) == 0).any():
+            raise TypeError("Invalid input: Expected a non-empty list of mutations")
+        return mut.sort_by_pos().to_str(delimiting_char=delimiting_char, offset=offset)
+
     # Check if mut is a list
     if not isinstance(mut, list) or len(mut) == 0:
         raise TypeError(f"Invalid input: Expected a list of mutation but got {type(mut)}")
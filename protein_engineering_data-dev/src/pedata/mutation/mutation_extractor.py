@@ -1,13 +1,40 @@
 """ The mutation_extractor module contains functions for extracting mutations from sequences.
 
 | `extract_mutation_namedtuples_from_sequences`: Extract mutations from sequences with respect to a parent sequence
+| `extract_mutation_table_from_sequences`: Extract the mutations of equal-length sequences at once into a MutationTable
 | `extract_mutation_str_from_sequences`: Convert a list of sequences to a list of mutations
 
 """
 from pedata.constants import Mut
 import pedata.mutation.mutation_util as mu
 from typing import Iterable
+import numpy as onp
 from pedata.mutation.mutation_converter import convert_all_variant_mutations_to_str
+from pedata.mutation.mutation_table import MutationTable
+
+
+def _check_extraction_input(variant_seq_str: list[str], parent: str) -> None:
+    """Validate the variant sequences and the parent sequence to extract mutations from."""
+    if not isinstance(variant_seq_str, Iterable):
+        raise TypeError(
+            f"Invalid variant sequence string: Expected variant sequence to be list of strings but got {type(variant_seq_str)}"
+        )
+
+    if len(variant_seq_str) == 0:
+        raise ValueError(
+            "Invalid variant sequence string: Variant sequence should be a non-empty list of strings."
+        )
+
+    if not isinstance(parent, str):
+        raise TypeError(
+            f"Invalid parent: Expected parent to be a string but got {type(parent)}"
+        )
+
+    if len(parent) == 0:
+        raise ValueError("Invalid parent: Parent should be a non-empty string.")
+
+    if not isinstance(parent, str) or len(parent) == 0:
+        raise TypeError("Parent sequence should be a string and not empty")
 
 
 def extract_mutation_namedtuples_from_sequences(
@@ -35,26 +62,7 @@ def extract_mutation_namedtuples_from_sequences(
     """
 
     # Validate input
-    if not isinstance(variant_seq_str, Iterable):
-        raise TypeError(
-            f"Invalid variant sequence string: Expected variant sequence to be list of strings but got {type(variant_seq_str)}"
-        )
-
-    if len(variant_seq_str) == 0:
-        raise ValueError(
-            "Invalid variant sequence string: Variant sequence should be a non-empty list of strings."
-        )
-
-    if not isinstance(parent, str):
-        raise TypeError(
-            f"Invalid parent: Expected parent to be a string but got {type(parent)}"
-        )
-
-    if len(parent) == 0:
-        raise ValueError("Invalid parent: Parent should be a non-empty string.")
-
-    if not isinstance(parent, str) or len(parent) == 0:
-        raise TypeError("Parent sequence should be a string and not empty")
+    _check_extraction_input(variant_seq_str, parent)
 
     changed_mut = []  # Store resulting list of mutation sequences that were changed
     invalid_var_seq = []  # List to track variant sequences with unequal lengths (where mutations were not changed)
@@ -87,6 +95,74 @@ def extract_mutation_namedtuples_from_sequences(
     return changed_mut, invalid_var_seq
 
 
+def extract_mutation_table_from_sequences(
+    variant_seq_str: list[str],
+    parent: str,
+    offset: int = 0,
+    batch_size: int = 2**24,
+) -> tuple[MutationTable, list[str]]:
+    """
+    Extract mutations from sequences with respect to a parent sequence, comparing all variants at once.
+
+    The variants of the same length as the parent are stacked into an (N, L) uint8 matrix,
+    and all their mutations are found with a single comparison against the parent row.
+
+    Args:
+        variant_seq_str (List[str]): List of variant sequence strings.
+        parent (str): Parent sequence.
+        offset (int): Offset of the parent sequence and the interesting part (default is 0).
+        batch_size (int): Maximum number of characters compared at once, bounding the memory used (default is 2**24).
+
+    Returns:
+        Tuple[MutationTable, List[str]]: A tuple containing a table of the mutations of each valid variant,
+        and a list of invalid variant sequences found (variant sequences with different lengths from the parent sequence).
+
+    Raises:
+        ValueError: If the parent or a valid variant sequence contains non-ASCII characters.
+
+    Example:
+        >>> parent_sequence = "ATCGATCG"
+        >>> variant_sequences = ["ATCGTTCG", "ATCGATCG", "ATTGATCG", "ATCG"]
+        >>> table, invalid = extract_mutation_table_from_sequences(variant_sequences, parent_sequence)
+        >>> table.to_mutations(), invalid
+        ([[Mut(pos=4, src='A', targ='T')], [], [Mut(pos=2, src='C', targ='T')]], ['ATCG'])
+    """
+    _check_extraction_input(variant_seq_str, parent)
+    if not parent.isascii():
+        raise ValueError("Mutations can only be extracted for ASCII sequences")
+
+    valid = [var for var in variant_seq_str if len(var) == len(parent)]
+    invalid_var_seq = [var for var in variant_seq_str if len(var) != len(parent)]
+    parent_codes = onp.frombuffer(parent.encode(), dtype=onp.uint8)
+
+    # Compare batches of variants against the parent row
+    variant_idx = [onp.zeros(0, dtype=onp.int64)]
+    pos = [onp.zeros(0, dtype=onp.int64)]
+    targ = [onp.zeros(0, dtype=onp.uint8)]
+    rows_per_batch = max(1, batch_size // len(parent))
+    for start in range(0, len(valid), rows_per_batch):
+        batch = "".join(valid[start : start + rows_per_batch])
+        if not batch.isascii():
+            raise ValueError("Mutations can only be extracted for ASCII sequences")
+        seqs = onp.frombuffer(batch.encode(), dtype=onp.uint8).reshape(-1, len(parent))
+        rows, cols = onp.nonzero(seqs != parent_codes)
+        variant_idx.append(rows + start)
+        pos.append(cols)
+        targ.append(seqs[rows, cols])
+
+    pos = onp.concatenate(pos)
+    return (
+        MutationTable.from_variant_idx(
+            onp.concatenate(variant_idx),
+            pos - offset,
+            parent_codes[pos],
+            onp.concatenate(targ),
+            num_variants=len(valid),
+        ),
+        invalid_var_seq,
+    )
+
+
 def extract_mutation_str_from_sequences(
     variant_seq_str: Iterable[str],
     parent: str,
@@ -107,6 +183,9 @@ def extract_mutation_str_from_sequences(
     Returns:
         list[str]: A list of mutation codes, where each code corresponds to a variant sequence in the input.
 
+    Raises:
+        TypeError: If a variant sequence equals the parent sequence, as it has no mutations to encode.
+
     Example:
         >>> variant_sequences = ["AAAA", "ABBA"]
         >>> parent_sequence = "BBAA"
@@ -114,16 +193,26 @@ def extract_mutation_str_from_sequences(
         ['B1A_B2A', 'B1A_A3B']
 
     Note:
-        The function internally uses the `extract_mutation_namedtuples_from_sequences` function from the `me` module.
+        The function internally uses the `extract_mutation_table_from_sequences` function for ASCII sequences and
+        the `extract_mutation_namedtuples_from_sequences` function from the `me` module otherwise.
         The `extract_mutation_namedtuples_from_sequences` function takes the variant sequences, parent sequence, and offset as inputs, and returns the mutation objects.
         The `convert_all_variant_mutations_to_str` function is then used to convert the mutation objects into mutation codes.
 
     """
 
-    # Extract all valid mutations from input sequences
-    mutations, invalid_var_seq = extract_mutation_namedtuples_from_sequences(
-        variant_seq_str, parent, offset
-    )
+    # Extract all valid mutations from input sequences, all at once for ASCII sequences
+    if (
+        isinstance(parent, str)
+        and parent.isascii()
+        and all(map(str.isascii, variant_seq_str))
+    ):
+        mutations, invalid_var_seq = extract_mutation_table_from_sequences(
+            variant_seq_str, parent, offset
+        )
+    else:
+        mutations, invalid_var_seq = extract_mutation_namedtuples_from_sequences(
+            variant_seq_str, parent, offset
+        )
 
     # Convert mutations to string
     encoded_mut = convert_all_variant_mutations_to_str(mutations, delimiting_char)
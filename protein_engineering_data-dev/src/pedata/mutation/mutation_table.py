@@ -0,0 +1,348 @@
+"""The mutation_table module contains a compact columnar representation of the mutations of many variants.
+
+A `MutationTable` stores the mutations of all variants in flat arrays, one entry per mutation,
+and delimits the mutations of each variant with CSR-style offsets:
+
+| `offsets`: int64 array of length `num_variants + 1`, the mutations of variant `i` are at `offsets[i]:offsets[i + 1]`
+| `pos`: int32 array of mutation positions
+| `src`: uint8 array of source characters (ASCII bytes)
+| `targ`: uint8 array of target characters (ASCII bytes)
+
+This takes 6 bytes per mutation and 8 bytes per variant, compared to more than 100 bytes per mutation for `list[list[Mut]]`,
+and converts to and from Arrow list arrays without copying. Iterating over a table yields the mutations of each variant
+as list of `Mut` namedtuples, so tables can be used where `list[list[Mut]]` is expected.
+
+"""
+
+from typing import Iterator, Sequence, Union
+
+import numpy as onp
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from pedata.constants import Mut
+
+
+def char_codes(chars: Union[str, Sequence[str], onp.ndarray]) -> onp.ndarray:
+    """Bytes of single ASCII characters.
+
+    Args:
+        chars (Union[str, Sequence[str], onp.ndarray]): Characters as string, sequence of strings or uint8 array.
+
+    Returns:
+        onp.ndarray: uint8 array with one byte per character.
+
+    Raises:
+        ValueError: If the characters are not single ASCII characters.
+
+    Example:
+        >>> char_codes(["A", "C"])
+        array([65, 67], dtype=uint8)
+    """
+    if isinstance(chars, onp.ndarray) and chars.dtype == onp.uint8:
+        return chars
+    if not isinstance(chars, str) and not all(isinstance(c, str) for c in chars):
+        raise ValueError("Mutations can only be applied for single ASCII characters")
+    joined = chars if isinstance(chars, str) else "".join(chars)
+    if not joined.isascii() or (
+        not isinstance(chars, str) and set(map(len, chars)) - {1}
+    ):
+        raise ValueError("Mutations can only be applied for single ASCII characters")
+    return onp.frombuffer(joined.encode(), dtype=onp.uint8)
+
+
+def arrow_char_codes(chars: pa.Array) -> onp.ndarray:
+    """Bytes of an Arrow string array of single ASCII characters, read directly from its buffers.
+
+    Args:
+        chars (pa.Array): String array with one ASCII character per entry.
+
+    Returns:
+        onp.ndarray: uint8 array with one byte per entry.
+    """
+    offset_type = onp.int64 if pa.types.is_large_string(chars.type) else onp.int32
+    offsets = onp.frombuffer(chars.buffers()[1], dtype=offset_type)
+    data = chars.buffers()[2]
+    if data is None:
+        return onp.zeros(0, dtype=onp.uint8)
+    return onp.frombuffer(data, dtype=onp.uint8)[
+        offsets[chars.offset : chars.offset + len(chars)]
+    ]
+
+
+def chars_to_arrow(codes: onp.ndarray) -> pa.StringArray:
+    """Arrow string array with one character per byte, sharing the memory of `codes`.
+
+    Args:
+        codes (onp.ndarray): uint8 array of ASCII characters.
+
+    Returns:
+        pa.StringArray: String array with one entry per character.
+    """
+    codes = onp.ascontiguousarray(codes, dtype=onp.uint8)
+    offsets = onp.arange(len(codes) + 1, dtype=onp.int32)
+    return pa.StringArray.from_buffers(
+        len(codes), pa.py_buffer(offsets), pa.py_buffer(codes)
+    )
+
+
+class MutationTable(object):
+    """Mutations of many variants, stored in flat arrays with CSR-style offsets."""
+
+    def __init__(
+        self,
+        offsets: Sequence[int],
+        pos: Sequence[int],
+        src: Union[Sequence[str], onp.ndarray],
+        targ: Union[Sequence[str], onp.ndarray],
+    ) -> None:
+        """Constructor for MutationTable.
+
+        Args:
+            offsets (Sequence[int]): Start of the mutations of each variant, followed by the total number of mutations.
+            pos (Sequence[int]): Position of each mutation.
+            src (Union[Sequence[str], onp.ndarray]): Source character of each mutation, or its byte as uint8 array.
+            targ (Union[Sequence[str], onp.ndarray]): Target character of each mutation, or its byte as uint8 array.
+
+        Raises:
+            ValueError: If the offsets don't delimit the mutation arrays or the characters are not single ASCII characters.
+
+        Example:
+            >>> table = MutationTable([0, 2, 2, 3], [12, 23, 4], "ATG", "TGA")
+            >>> len(table), table.num_mutations
+            (3, 3)
+            >>> table[0]
+            [Mut(pos=12, src='A', targ='T'), Mut(pos=23, src='T', targ='G')]
+        """
+        self.offsets = onp.asarray(offsets, dtype=onp.int64)
+        self.pos = onp.asarray(pos, dtype=onp.int32)
+        self.src = char_codes(src)
+        self.targ = char_codes(targ)
+
+        if (
+            self.offsets.ndim != 1
+            or len(self.offsets) == 0
+            or self.offsets[0] != 0
+            or (onp.diff(self.offsets) < 0).any()
+        ):
+            raise ValueError(
+                "Offsets should be a non-decreasing sequence starting with 0"
+            )
+        if not self.offsets[-1] == len(self.pos) == len(self.src) == len(self.targ):
+            raise ValueError(
+                f"Offsets delimit {self.offsets[-1]} mutations, but got {len(self.pos)} positions, "
+                f"{len(self.src)} source and {len(self.targ)} target characters"
+            )
+
+    @classmethod
+    def from_mutations(cls, mut: Sequence[Sequence[Mut]]) -> "MutationTable":
+        """Create a table from the mutations of each variant.
+
+        Args:
+            mut (Sequence[Sequence[Mut]]): List of mutation namedtuples (pos, src, targ) per variant.
+
+        Returns:
+            MutationTable: Table of all mutations.
+
+        Raises:
+            ValueError: If mutations have no target or the characters are not single ASCII characters.
+
+        Example:
+            >>> table = MutationTable.from_mutations([[Mut(12, "A", "T")], [], [Mut(4, "G", "A")]])
+            >>> table.offsets, table.pos
+            (array([0, 1, 1, 2]), array([12,  4], dtype=int32))
+        """
+        flat = [m for variant in mut for m in variant]
+        if set(map(len, flat)) - {3}:
+            raise ValueError("All mutations in a table need a target character")
+        offsets = onp.zeros(len(mut) + 1, dtype=onp.int64)
+        onp.cumsum([len(variant) for variant in mut], out=offsets[1:])
+        return cls(
+            offsets,
+            [m.pos for m in flat],
+            [m.src for m in flat],
+            [m.targ for m in flat],
+        )
+
+    @classmethod
+    def from_variant_idx(
+        cls,
+        variant_idx: Sequence[int],
+        pos: Sequence[int],
+        src: Union[Sequence[str], onp.ndarray],
+        targ: Union[Sequence[str], onp.ndarray],
+        num_variants: int = None,
+    ) -> "MutationTable":
+        """Create a table from the variant index of each mutation, e.g. as returned by `Mutation.parse_mutation_column`.
+
+        Args:
+            variant_idx (Sequence[int]): Non-decreasing variant index of each mutation.
+            pos (Sequence[int]): Position of each mutation.
+            src (Union[Sequence[str], onp.ndarray]): Source character of each mutation, or its byte as uint8 array.
+            targ (Union[Sequence[str], onp.ndarray]): Target character of each mutation, or its byte as uint8 array.
+            num_variants (int, optional): Number of variants. Defaults to None (largest variant index + 1).
+
+        Returns:
+            MutationTable: Table of all mutations.
+
+        Raises:
+            ValueError: If the variant indices are not sorted or exceed `num_variants`.
+
+        Example:
+            >>> MutationTable.from_variant_idx([0, 0, 2], [32, 33, 13], "LGK", "TCM").offsets
+            array([0, 2, 2, 3])
+        """
+        variant_idx = onp.asarray(variant_idx, dtype=onp.int64)
+        if (onp.diff(variant_idx) < 0).any() or (variant_idx < 0).any():
+            raise ValueError("Variant indices should be non-negative and sorted")
+        if num_variants is None:
+            num_variants = int(variant_idx[-1]) + 1 if len(variant_idx) > 0 else 0
+        elif len(variant_idx) > 0 and variant_idx[-1] >= num_variants:
+            raise ValueError(
+                f"Variant index {variant_idx[-1]} exceeds the number of variants {num_variants}"
+            )
+        offsets = onp.zeros(num_variants + 1, dtype=onp.int64)
+        onp.cumsum(onp.bincount(variant_idx, minlength=num_variants), out=offsets[1:])
+        return cls(offsets, pos, src, targ)
+
+    @classmethod
+    def from_arrow(cls, array: Union[pa.Array, pa.ChunkedArray]) -> "MutationTable":
+        """Create a table from an Arrow list array of structs with the fields pos, src and targ, e.g. created by `to_arrow`.
+
+        Fields of type int32 and uint8 are used without copying.
+
+        Args:
+            array (Union[pa.Array, pa.ChunkedArray]): List array with the mutations of each variant.
+
+        Returns:
+            MutationTable: Table of all mutations.
+
+        Example:
+            >>> table = MutationTable.from_mutations([[Mut(12, "A", "T")], [Mut(4, "G", "A")]])
+            >>> MutationTable.from_arrow(table.to_arrow()).to_mutations() == table.to_mutations()
+            True
+        """
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        offsets = array.offsets.to_numpy()
+        values = array.flatten()
+        return cls(
+            offsets - offsets[0],
+            values.field("pos").to_numpy(zero_copy_only=False),
+            values.field("src").to_numpy(zero_copy_only=False),
+            values.field("targ").to_numpy(zero_copy_only=False),
+        )
+
+    def to_arrow(self) -> pa.LargeListArray:
+        """Convert the table to an Arrow list array of structs with the fields pos (int32), src and targ (uint8), without copying.
+
+        Returns:
+            pa.LargeListArray: The mutations of each variant.
+        """
+        values = pa.StructArray.from_arrays(
+            [pa.array(self.pos), pa.array(self.src), pa.array(self.targ)],
+            names=["pos", "src", "targ"],
+        )
+        return pa.LargeListArray.from_arrays(pa.array(self.offsets), values)
+
+    @property
+    def num_mutations(self) -> int:
+        """Total number of mutations of all variants."""
+        return len(self.pos)
+
+    @property
+    def variant_idx(self) -> onp.ndarray:
+        """Variant index of each mutation."""
+        return onp.repeat(onp.arange(len(self)), onp.diff(self.offsets))
+
+    def __len__(self) -> int:
+        """Number of variants."""
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[list[Mut], "MutationTable"]:
+        """Mutations of a variant as list of namedtuples, or a table of a contiguous range of variants."""
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(len(self))
+            if step != 1:
+                raise ValueError("Only contiguous ranges of variants can be selected")
+            stop = max(start, stop)
+            begin, end = self.offsets[start], self.offsets[stop]
+            return MutationTable(
+                self.offsets[start : stop + 1] - begin,
+                self.pos[begin:end],
+                self.src[begin:end],
+                self.targ[begin:end],
+            )
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f"Variant index {idx} out of range")
+        begin, end = self.offsets[idx], self.offsets[idx + 1]
+        return [
+            Mut(int(p), chr(s), chr(t))
+            for p, s, t in zip(
+                self.pos[begin:end], self.src[begin:end], self.targ[begin:end]
+            )
+        ]
+
+    def __iter__(self) -> Iterator[list[Mut]]:
+        """Iterate over the mutations of each variant as lists of namedtuples."""
+        return iter(self.to_mutations())
+
+    def __repr__(self) -> str:
+        return f"MutationTable(num_variants={len(self)}, num_mutations={self.num_mutations})"
+
+    def to_mutations(self) -> list[list[Mut]]:
+        """Convert the table to a list of mutation namedtuples (pos, src, targ) per variant.
+
+        Returns:
+            list[list[Mut]]: The mutations of each variant.
+        """
+        flat = list(
+            map(
+                Mut,
+                self.pos.tolist(),
+                map(chr, self.src.tolist()),
+                map(chr, self.targ.tolist()),
+            )
+        )
+        bounds = self.offsets.tolist()
+        return [flat[begin:end] for begin, end in zip(bounds[:-1], bounds[1:])]
+
+    def sort_by_pos(self) -> "MutationTable":
+        """Sort the mutations of each variant by position.
+
+        Returns:
+            MutationTable: Table with the mutations of each variant sorted by position.
+        """
+        if self.num_mutations == 0:
+            return self
+        pos = self.pos.astype(onp.int64)
+        key = self.variant_idx * (int(pos.max() - pos.min()) + 1) + (pos - pos.min())
+        order = onp.argsort(key, kind="stable")
+        return MutationTable(
+            self.offsets, self.pos[order], self.src[order], self.targ[order]
+        )
+
+    def to_str(self, delimiting_char: str = "_", offset: int = 0) -> list[str]:
+        """Convert the mutations of each variant into a mutation code, e.g. "A13T_T24G".
+
+        Args:
+            delimiting_char (str, optional): Character used to connect the mutations of a variant. Defaults to "_".
+            offset (int, optional): Offset value to adjust mutation positions. Defaults to 0.
+
+        Returns:
+            list[str]: Mutation code of each variant, an empty string for variants without mutations.
+
+        Example:
+            >>> MutationTable([0, 2, 3], [12, 23, 4], "ATG", "TGA").to_str()
+            ['A13T_T24G', 'G5A']
+        """
+        pos = pc.cast(pa.array(self.pos.astype(onp.int64) - offset + 1), pa.string())
+        codes = pc.binary_join_element_wise(
+            chars_to_arrow(self.src), pos, chars_to_arrow(self.targ), ""
+        )
+        return pc.binary_join(
+            pa.LargeListArray.from_arrays(pa.array(self.offsets), codes),
+            delimiting_char,
+        ).to_pylist()
@@ -1,13 +1,13 @@
+import csv
+import hashlib
+import io
+import os
+from functools import lru_cache
 from os.path import abspath, dirname, isfile
 from dataclasses import dataclass
-from datasets import Dataset, load_dataset
-from Bio import Seq
-from tqdm import tqdm
-import pandas as pd
+from datasets import Dataset
 import numpy as np
-import scipy as sp
-
-from pedata.util import load_full_dataset
+from numpy.lib.stride_tricks import sliding_window_view
 
 """
 This is the main module of TagFinder. 
@@ -24,6 +24,10 @@ tag_strip_csv: Strips tags from a .csv file and adds a report of the stripped ta
 clean_dataset: Cleans a huggingface dataset by converting sequences to protein and removing tags.
 """
 
+# The tag database and the tag library compiled from it, see `TagLibrary`
+_TAG_FILE = f"{dirname(abspath(__file__))}/static/protein_tags.csv"
+_TAG_LIBRARY_FILE = f"{dirname(abspath(__file__))}/static/protein_tags.bin"
+
 
 @dataclass
 class ProteinTag:
@@ -360,6 +364,445 @@ class ProteinTagHit(ProteinTag):
         return info_string
 
 
+class TagIndex:
+    """
+    The sequences of a tag library encoded as read-only arrays, used to search for all tags in many sequences at once.
+    Only the arrays are pickled, so sending the index to worker processes is cheap.
+    """
+
+    def __init__(self, sequences: list[str], fusion: list[bool]):
+        """
+        Encode the tag sequences and group the tags by length.
+
+        Args:
+            sequences (list[str]): The amino-acid sequences of the tags.
+            fusion (list[bool]): True for each tag which is a fusion with another protein or protein domain.
+        """
+        self.lengths = np.array([len(s) for s in sequences], dtype=np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(self.lengths)])
+        self.codes = np.frombuffer("".join(sequences).encode("ascii"), dtype=np.uint8)
+        self.fusion = np.asarray(fusion, dtype=bool)
+        for array in (self.lengths, self.offsets, self.fusion):
+            array.setflags(write=False)
+        self._build_groups()
+
+    def _build_groups(self) -> None:
+        """Group the tags by length, tags of the same length are compared with the query together."""
+        # Residues of the tags are numbered by their position in the alphabet of the library
+        self._letters = np.unique(self.codes)
+        self._lookup = np.full(256, len(self._letters), dtype=np.intp)
+        self._lookup[self._letters] = np.arange(len(self._letters))
+        self._groups = []
+        for length in np.unique(self.lengths):
+            tag_idx = np.flatnonzero(self.lengths == length)
+            rows = self.offsets[tag_idx][:, None] + np.arange(length)
+            self._groups.append((int(length), tag_idx, self._lookup[self.codes[rows]]))
+        self._max_group_size = max((len(g[1]) for g in self._groups), default=0)
+
+    def __getstate__(self) -> dict:
+        """Pickle the tag arrays without the groups derived from them."""
+        state = self.__dict__.copy()
+        for key in ("_letters", "_lookup", "_groups", "_max_group_size"):
+            del state[key]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore the tag arrays and group the tags by length."""
+        self.__dict__.update(state)
+        self._build_groups()
+
+    @classmethod
+    def from_arrays(
+        cls, codes: np.ndarray, offsets: np.ndarray, fusion: np.ndarray
+    ) -> "TagIndex":
+        """
+        Build the index of tags which are already encoded, e.g. memory-mapped from a compiled tag library.
+
+        Args:
+            codes (np.ndarray): The concatenated tag sequences as uint8 array.
+            offsets (np.ndarray): The start of each tag in `codes`, followed by the length of `codes`.
+            fusion (np.ndarray): True for each tag which is a fusion with another protein or protein domain.
+
+        Returns:
+            index (TagIndex): The index of the tags.
+        """
+        index = cls.__new__(cls)
+        index.codes = codes
+        index.offsets = offsets
+        index.lengths = np.diff(offsets)
+        index.fusion = np.asarray(fusion, dtype=bool)
+        for array in (index.lengths, index.fusion):
+            array.setflags(write=False)
+        index._build_groups()
+        return index
+
+    @classmethod
+    def from_tags(cls, tags: list[ProteinTag]) -> "TagIndex":
+        """
+        Build the index of a list of tags.
+
+        Args:
+            tags (list[ProteinTag]): The tags, in the order in which hits are reported.
+
+        Returns:
+            index (TagIndex): The index of the tags.
+        """
+        return cls([tag.sequence for tag in tags], [tag.fusion for tag in tags])
+
+    def __len__(self) -> int:
+        """Number of tags in the index."""
+        return len(self.lengths)
+
+    def search(
+        self, sequence: str, identity_cutoff: float, block_size: int = 2**22
+    ) -> tuple[np.ndarray, np.ndarray, list[float]]:
+        """
+        Find all tags in a sequence with an identity of at least `identity_cutoff`, see `search_batch`.
+
+        Args:
+            sequence (str): The sequence to search for the tags in.
+            identity_cutoff (float): The minimum identity in percent, rounded to two decimals, of a hit.
+            block_size (int): The approximate size in bytes of the intermediate arrays [Default=2**22].
+
+        Returns:
+            tag_idx (np.ndarray): The index of the tag of each hit.
+            start (np.ndarray): The start position of each hit in the sequence.
+            identity (list[float]): The identity of each hit.
+            The hits are ordered by tag index and start position.
+
+        Example:
+            >>> index = TagIndex(["HHHHHH", "DYKDDDDK"], [False, False])
+            >>> index.search("MHHHHHHGDYKDDDEK", identity_cutoff=85.0)
+            (array([0, 1]), array([1, 8]), [100.0, 87.5])
+        """
+        _, tag_idx, start, identity = self.search_batch(
+            [sequence], identity_cutoff, block_size
+        )
+        return tag_idx, start, identity
+
+    def search_batch(
+        self, sequences: list[str], identity_cutoff: float, block_size: int = 2**22
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[float]]:
+        """
+        Find all tags in many sequences with an identity of at least `identity_cutoff`.
+
+        The sequences are concatenated and encoded as uint8. For each tag length, the matches of all tags of this length
+        are counted at all offsets of all sequences at once, by adding up the one-hot encoded query shifted by each
+        position of the tags. The query is processed in chunks to bound the memory.
+        Tags are only searched in longer sequences, and fusion tags only if at least 25 residues of the sequence
+        are left.
+
+        Args:
+            sequences (list[str]): The sequences to search for the tags in.
+            identity_cutoff (float): The minimum identity in percent, rounded to two decimals, of a hit.
+            block_size (int): The approximate size in bytes of the intermediate arrays [Default=2**22].
+
+        Returns:
+            seq_idx (np.ndarray): The index of the sequence of each hit.
+            tag_idx (np.ndarray): The index of the tag of each hit.
+            start (np.ndarray): The start position of each hit in its sequence.
+            identity (list[float]): The identity of each hit.
+            The hits are ordered by sequence index, tag index and start position.
+
+        Example:
+            >>> index = TagIndex(["HHHHHH", "DYKDDDDK"], [False, False])
+            >>> index.search_batch(["MHHHHHHG", "GDYKDDDDKG"], identity_cutoff=90.0)
+            (array([0, 1]), array([0, 1]), array([1, 1]), [100.0, 100.0])
+        """
+        query = np.frombuffer(
+            "".join(sequences).encode("ascii", errors="replace"), dtype=np.uint8
+        )
+        seq_lengths = np.array([len(s) for s in sequences], dtype=np.int64)
+        seq_ends = np.cumsum(seq_lengths)
+        seq_starts = seq_ends - seq_lengths
+        seq_of_pos = np.repeat(np.arange(len(sequences)), seq_lengths)
+        groups = [g for g in self._groups if g[0] < seq_lengths.max(initial=0)]
+        max_length = max((length for length, _, _ in groups), default=1)
+        num_letters = len(self._letters)
+
+        # (sequence, tag, start, number of matching residues) of the candidate hits
+        hits = []
+        chunk = max(1, block_size // (num_letters + 2 * self._max_group_size))
+        for first in range(0, len(query), chunk):
+            # One-hot encoding of the residues of the chunk, residues which are in no tag are left out
+            segment = self._lookup[query[first : first + chunk + max_length - 1]]
+            known = np.flatnonzero(segment < num_letters)
+            onehot = np.zeros((num_letters, len(segment)), dtype=np.uint8)
+            onehot[segment[known], known] = 1
+
+            for length, tag_idx, tags in groups:
+                # Windows which lie within sequences longer than the tag
+                position = np.arange(first, min(first + chunk, len(query) - length + 1))
+                seq = seq_of_pos[position]
+                valid = (position + length <= seq_ends[seq]) & (
+                    seq_lengths[seq] > length
+                )
+                if not valid.any():
+                    continue
+
+                # Count the matching residues of every tag in every window. Few windows are compared directly,
+                # otherwise the one-hot encoded residues are added up one tag position at a time.
+                if len(tag_idx) * len(position) <= 2**10:
+                    windows = sliding_window_view(segment, length)[: len(position)]
+                    matches = (windows[None] == tags[:, None, :]).sum(
+                        axis=-1, dtype=np.uint16
+                    )
+                else:
+                    matches = np.zeros((len(tag_idx), len(position)), np.uint16)
+                    for j in range(length):
+                        matches += onehot[tags[:, j], j : j + len(position)]
+                # Candidates within rounding precision of the cutoff, the identity is checked exactly below
+                hit_tag, hit_window = np.nonzero(
+                    (matches >= (identity_cutoff - 0.01) * length / 100) & valid
+                )
+                hit_pos = position[hit_window]
+                hit_seq = seq[hit_window]
+                keep = ~self.fusion[tag_idx[hit_tag]] | (
+                    seq_lengths[hit_seq] - length >= 25
+                )
+                hits += zip(
+                    hit_seq[keep].tolist(),
+                    tag_idx[hit_tag[keep]].tolist(),
+                    (hit_pos - seq_starts[hit_seq])[keep].tolist(),
+                    matches[hit_tag, hit_window][keep].tolist(),
+                )
+
+        # Identities are rounded before comparing them to the cutoff
+        hits = [
+            (seq, tag, start, round(num_matches / self.lengths[tag].item() * 100, 2))
+            for seq, tag, start, num_matches in sorted(hits)
+        ]
+        hits = [hit for hit in hits if hit[3] >= identity_cutoff]
+        return (
+            np.array([hit[0] for hit in hits], dtype=np.int64),
+            np.array([hit[1] for hit in hits], dtype=np.int64),
+            np.array([hit[2] for hit in hits], dtype=np.int64),
+            [hit[3] for hit in hits],
+        )
+
+
+class TagLibrary:
+    """
+    The tag database compiled to a binary file, which is memory-mapped instead of parsed when a TagFinder is created.
+
+    The file starts with a header holding a magic number, the format version, the number of tags, the SHA-256 digest
+    of the csv file it was compiled from and the location of each section. The sections are the concatenated tag
+    sequences, their offsets, their flags (fusion, leader, cleavage) and the UTF-8 encoded name, method, origin and
+    reference of every tag with their offsets. All sections are aligned to 8 bytes.
+
+    After editing the tag database, recompile the library with `TagLibrary.compile(tag_file).write(library_file)`.
+    Until then, `load_tag_library` compiles the csv file in memory.
+    """
+
+    MAGIC = b"PETAGLIB"
+    VERSION = 1
+    FUSION, LEADER, CLEAVAGE = 1, 2, 4
+    _SECTIONS = (
+        ("codes", np.uint8),
+        ("offsets", "<i8"),
+        ("flags", np.uint8),
+        ("text_offsets", "<i8"),
+        ("text", np.uint8),
+    )
+    _HEADER_DTYPE = np.dtype(
+        [
+            ("magic", "S8"),
+            ("version", "<u4"),
+            ("num_tags", "<u4"),
+            ("source", "S64"),
+            ("sections", "<i8", (len(_SECTIONS), 2)),
+        ]
+    )
+
+    def __init__(self, buffer: np.ndarray):
+        """
+        Read the sections of a compiled tag library.
+
+        Args:
+            buffer (np.ndarray): The compiled library as a uint8 array, e.g. memory-mapped from a file.
+
+        Raises:
+            ValueError: If the buffer is not a tag library of the current version.
+        """
+        header_size = self._HEADER_DTYPE.itemsize
+        if len(buffer) < header_size:
+            raise ValueError("The buffer is too small to be a tag library")
+        header = buffer[:header_size].view(self._HEADER_DTYPE)[0]
+        if header["magic"] != self.MAGIC or header["version"] != self.VERSION:
+            raise ValueError(
+                f"Expected a tag library of version {self.VERSION}, "
+                f"got magic {header['magic']!r} and version {header['version']}"
+            )
+        self.buffer = buffer
+        self.source = header["source"].decode("ascii")
+        for (name, dtype), (start, nbytes) in zip(self._SECTIONS, header["sections"]):
+            setattr(self, name, buffer[start : start + nbytes].view(dtype))
+        if len(self.offsets) != header["num_tags"] + 1:
+            raise ValueError("The tag library is truncated")
+        self._index = None
+
+    def __getstate__(self) -> dict:
+        """Pickle the buffer only, the sections are views of it."""
+        return {"buffer": np.asarray(self.buffer)}
+
+    def __setstate__(self, state: dict) -> None:
+        """Read the sections of the pickled buffer."""
+        self.__init__(state["buffer"])
+
+    @classmethod
+    def compile(cls, tag_file: str) -> "TagLibrary":
+        """
+        Compile a tag database.
+
+        Args:
+            tag_file (str): The csv file with the name, sequence, method, origin and reference of each tag.
+
+        Returns:
+            library (TagLibrary): The compiled library, held in memory.
+        """
+        with open(tag_file, "rb") as f:
+            source = f.read()
+        rows = list(csv.DictReader(io.StringIO(source.decode("utf-8"), newline="")))
+        names = [row["name"] for row in rows]
+        sequences = [row["sequence"] for row in rows]
+        # Missing fields are stored as empty strings
+        text = [
+            (row[key] or "").encode("utf-8")
+            for row in rows
+            for key in ("name", "method", "origin", "reference")
+        ]
+        sections = [
+            np.frombuffer("".join(sequences).encode("ascii"), dtype=np.uint8),
+            np.cumsum([0] + [len(s) for s in sequences]),
+            [
+                cls.FUSION * name.endswith("-Fusion")
+                | cls.LEADER * name.endswith("-Leader")
+                | cls.CLEAVAGE * name.endswith("-Cleavage")
+                for name in names
+            ],
+            np.cumsum([0] + [len(t) for t in text]),
+            np.frombuffer(b"".join(text), dtype=np.uint8),
+        ]
+
+        header = np.zeros(1, dtype=cls._HEADER_DTYPE)
+        header["magic"] = cls.MAGIC
+        header["version"] = cls.VERSION
+        header["num_tags"] = len(rows)
+        header["source"] = hashlib.sha256(source).hexdigest().encode("ascii")
+        chunks = [header.tobytes()]
+        size = len(chunks[0])
+        for i, (section, (_, dtype)) in enumerate(zip(sections, cls._SECTIONS)):
+            data = np.ascontiguousarray(section, dtype=dtype).tobytes()
+            chunks.append(bytes(-size % 8))
+            size += len(chunks[-1])
+            header["sections"][0, i] = (size, len(data))
+            chunks.append(data)
+            size += len(data)
+        chunks[0] = header.tobytes()
+        return cls(np.frombuffer(b"".join(chunks), dtype=np.uint8))
+
+    def write(self, library_file: str) -> None:
+        """
+        Write the compiled library to a file. The file is replaced at once, so readers never see a partial library.
+
+        Args:
+            library_file (str): The output file.
+        """
+        tmp_file = f"{library_file}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(np.asarray(self.buffer).tobytes())
+        os.replace(tmp_file, library_file)
+
+    def __len__(self) -> int:
+        """Number of tags in the library."""
+        return len(self.offsets) - 1
+
+    def _text(self, i: int) -> str:
+        """The i-th string of the text section."""
+        start, end = self.text_offsets[i : i + 2].tolist()
+        return self.text[start:end].tobytes().decode("utf-8")
+
+    def tag(self, i: int) -> ProteinTag:
+        """
+        Create a tag of the library.
+
+        Args:
+            i (int): The index of the tag.
+
+        Returns:
+            tag (ProteinTag): The tag.
+        """
+        start, end = self.offsets[i : i + 2].tolist()
+        flags = int(self.flags[i])
+        return ProteinTag(
+            name=self._text(4 * i),
+            sequence=self.codes[start:end].tobytes().decode("ascii"),
+            method=self._text(4 * i + 1),
+            origin=self._text(4 * i + 2),
+            reference=self._text(4 * i + 3),
+            length=end - start,
+            fusion=bool(flags & self.FUSION),
+            leader=bool(flags & self.LEADER),
+            cleavage=bool(flags & self.CLEAVAGE),
+        )
+
+    def tags(self) -> list[ProteinTag]:
+        """
+        Create all tags of the library.
+
+        Returns:
+            tags (list[ProteinTag]): The tags, in the order of the tag database.
+        """
+        return [self.tag(i) for i in range(len(self))]
+
+    @property
+    def index(self) -> TagIndex:
+        """getting the search index of the library, built when it is first used"""
+        if self._index is None:
+            self._index = TagIndex.from_arrays(
+                self.codes, self.offsets, (self.flags & self.FUSION) != 0
+            )
+        return self._index
+
+
+@lru_cache(maxsize=None)
+def load_tag_library(
+    tag_file: str = _TAG_FILE, library_file: str = _TAG_LIBRARY_FILE
+) -> TagLibrary:
+    """
+    Load the compiled tag library once per process.
+
+    The library file is memory-mapped if it was compiled from the current tag database with the current version of
+    the library format. Otherwise, the tag database is compiled in memory.
+
+    Args:
+        tag_file (str): The csv file of the tag database [Default=the database shipped with pedata].
+        library_file (str): The compiled tag library [Default=the library shipped with pedata].
+
+    Returns:
+        library (TagLibrary): The tag library, shared by all callers.
+
+    Raises:
+        FileNotFoundError: If the tag database does not exist.
+
+    Example:
+        >>> library = load_tag_library()
+        >>> library.tag(0).name
+        'Isopep-Tag'
+    """
+    if not isfile(tag_file):
+        raise FileNotFoundError(f"Could not find tag database file: {tag_file}")
+    with open(tag_file, "rb") as f:
+        source = hashlib.sha256(f.read()).hexdigest()
+    try:
+        library = TagLibrary(np.memmap(library_file, dtype=np.uint8, mode="r"))
+    except (OSError, ValueError):
+        library = None
+    if library is None or library.source != source:
+        library = TagLibrary.compile(tag_file)
+    return library
+
+
 class TagFinder:
     """
     This is the main class used for finding tags in sequences. When initialized this class builds an internal tag
@@ -368,7 +811,7 @@ class TagFinder:
 
     def __init__(self, identity_cutoff: float = 90.0, margin_cutoff: int = 4):
         """
-        Initialize the tag finder class and build the internal list of tags used to search for tags in sequences.
+        Initialize the tag finder class and load the internal library of tags used to search for tags in sequences.
 
         Args:
             identity_cutoff (float): The minimum required identity for a tag to be considered a hit. This is also the
@@ -377,23 +820,13 @@ class TagFinder:
             margin_cutoff (float): The maximum number of amino-acids between tag and termini or between two tags
             [Default=4].
         """
-        self._tags = []
+        self._tag_list = None
+        self._tag_index = None
         self._identity_cutoff = identity_cutoff
         self._margin_cutoff = margin_cutoff
 
-        # Read in the tag database
-        tag_file = f"{dirname(abspath(__file__))}/static/protein_tags.csv"
-        if not isfile(tag_file):
-            raise FileNotFoundError(f"Could not find tag database file: {tag_file}")
-        tag_data = pd.read_csv(tag_file, delimiter=",", low_memory=True)
-        for i, row in tag_data.iterrows():
-            self._add_tag(
-                name=row["name"],
-                sequence=row["sequence"],
-                method=row["method"],
-                origin=row["origin"],
-                reference=row["reference"],
-            )
+        # Memory-map the compiled tag database, the tags are only created when they are used
+        self._library = load_tag_library()
 
     @property
     def identity_cutoff(self) -> float:
@@ -405,6 +838,23 @@ class TagFinder:
         """setting identity_cutoff value"""
         self._identity_cutoff = value
 
+    @property
+    def _tags(self) -> list[ProteinTag]:
+        """getting the internal tag library, created from the compiled library when it is first used"""
+        if self._tag_list is None:
+            self._tag_list = self._library.tags()
+        return self._tag_list
+
+    @property
+    def tag_index(self) -> TagIndex:
+        """getting the index of the tag library, built when it is first used"""
+        if self._tag_index is None:
+            if self._tag_list is None:
+                self._tag_index = self._library.index
+            else:
+                self._tag_index = TagIndex.from_tags(self._tag_list)
+        return self._tag_index
+
     @property
     def margin_cutoff(self) -> int:
         """getting margin_cutoff value"""
@@ -446,60 +896,38 @@ class TagFinder:
             cleavage=is_cleavage,
         )
         self._tags.append(tag)
+        self._tag_index = None
         return tag
 
-    def _tag_search(self, tag: ProteinTag, query_seq: str) -> list[ProteinTagHit]:
+    @staticmethod
+    def _tag_hit(
+        tag: ProteinTag, query_seq: str, start: int, identity: float
+    ) -> ProteinTagHit:
         """
-        Search for a single in a query sequence and return a list of ProteinTagHits.
+        Create the ProteinTagHit of a tag found in a query sequence.
 
         Args:
-            tag (ProteinTag): The ProteinTag to search for.
-            query_seq (str): The sequence to search for the tag in.
+            tag (ProteinTag): The tag that was found.
+            query_seq (str): The sequence the tag was found in.
+            start (int): The start position of the tag within the query sequence.
+            identity (float): The sequence identity between the tag and the query sequence.
 
         Returns:
-            hits (list[ProteinTagHit]): A list of ProteinTagHits for the query sequence.
+            hit (ProteinTagHit): The hit of the tag, with an unknown location.
         """
-        query_len = len(query_seq)
-        hits = []
-
-        # Don't count protein fusions if the non-fusion part
-        # is smaller than 25 amino acid residues.
-        if tag.fusion and query_len - tag.length < 25:
-            return []
-
-        if tag.length < query_len:
-            for i in range(query_len - tag.length + 1):
-                #  TODO: This can be done faster at some point
-                #  TODO: (doing the comparison for positions only once)
-                #  TODO: Similar to offset estimation and
-                #  TODO: Ingmars PosXobsKernel
-                query_sub = query_seq[i : i + tag.length]
-                identity = round(
-                    [t == q for t, q in zip(tag.sequence, query_sub)].count(True)
-                    / tag.length
-                    * 100,
-                    2,
-                )
-                if identity >= self.identity_cutoff:
-                    start = i
-                    end = i + tag.length
-                    tag_aln = (
-                        "-" * i + tag.sequence + "-" * (query_len - i - tag.length)
-                    )
-                    hit = ProteinTagHit(
-                        tag=tag,
-                        start=start,
-                        end=end,
-                        query_aln=query_seq,
-                        tag_aln=tag_aln,
-                        identity=identity,
-                        location="Unknown",
-                        conservation=0,
-                    )
-                    hits.append(hit)
-        if len(hits) == 0:
-            return []
-        return hits
+        tag_aln = (
+            "-" * start + tag.sequence + "-" * (len(query_seq) - start - tag.length)
+        )
+        return ProteinTagHit(
+            tag=tag,
+            start=start,
+            end=start + tag.length,
+            query_aln=query_seq,
+            tag_aln=tag_aln,
+            identity=identity,
+            location="Unknown",
+            conservation=0,
+        )
 
     @staticmethod
     def _tag_hit_overlap(hit1: ProteinTagHit, hit2: ProteinTagHit) -> bool:
@@ -531,20 +959,36 @@ class TagFinder:
         Returns:
             tag_hits (list[ProteinTagHit]): Output non-redundant list of ProteinTagHits.
         """
-        # Find all hits and group by tag name or prefix
+        # Find all hits of all tags at once, ordered by tag and start position
+        tag_idx, start, identity = self.tag_index.search(sequence, self.identity_cutoff)
+        hits = [
+            self._tag_hit(self._tags[t], sequence, s, i)
+            for t, s, i in zip(tag_idx.tolist(), start.tolist(), identity)
+        ]
+        return self._remove_redundant_hits(hits)
+
+    def _remove_redundant_hits(self, hits: list[ProteinTagHit]) -> list[ProteinTagHit]:
+        """
+        Remove the hits overlapping longer hits of a tag with the same name or prefix.
+
+        Args:
+            hits (list[ProteinTagHit]): All hits in a sequence, ordered by tag and start position.
+
+        Returns:
+            tag_hits (list[ProteinTagHit]): Output non-redundant list of ProteinTagHits.
+        """
+        # Group hits by tag name or prefix
         all_hits = {}
         all_prefixes = {}
-        for tag in self._tags:
-            hits = self._tag_search(tag, sequence)
-            for hit in hits:
-                prefix = hit.name.split("-")[0]
-                if hit.name in all_hits:
-                    all_hits[hit.name] += [hit]
-                elif prefix in all_prefixes:
-                    all_hits[all_prefixes[prefix]] += [hit]
-                else:
-                    all_hits[hit.name] = [hit]
-                    all_prefixes[prefix] = hit.name
+        for hit in hits:
+            prefix = hit.name.split("-")[0]
+            if hit.name in all_hits:
+                all_hits[hit.name] += [hit]
+            elif prefix in all_prefixes:
+                all_hits[all_prefixes[prefix]] += [hit]
+            else:
+                all_hits[hit.name] = [hit]
+                all_prefixes[prefix] = hit.name
 
         # Remove redundant hits that overlap
         non_redundant = []
@@ -600,7 +1044,9 @@ class TagFinder:
         # Adjust the maximum n terminus by extending it if a methionine is found
         # close to where the tag ends, as this methionine is likely to be the
         # biological start of the sequence.
-        for pos in range(max_n_terminus, max_n_terminus + self.margin_cutoff):
+        for pos in range(
+            max_n_terminus, min(max_n_terminus + self.margin_cutoff, len(sequence))
+        ):
             if sequence[pos] == "M":
                 max_n_terminus = pos
                 break
@@ -744,7 +1190,28 @@ class TagFinder:
             >>> '{"N-terminus": (0, 7), "C-terminus": (18, 18)}'
         """
         tag_hits = self._get_non_redundant_tag_hits(sequence)
+        return self._locate_tags(tag_hits, sequence, query_aln, reference_aln)
+
+    def _locate_tags(
+        self,
+        tag_hits: list[ProteinTagHit],
+        sequence: str,
+        query_aln: str = None,
+        reference_aln: str = None,
+    ) -> tuple[list[ProteinTagHit], dict[str, tuple[int, int]]]:
+        """
+        Remove conserved tags, find the termini containing tags and assign the tag locations, see `find_tags`.
 
+        Args:
+            tag_hits (list[ProteinTagHit]): Non-redundant list of ProteinTagHits in the sequence.
+            sequence (str): Input sequence the tags were found in.
+            query_aln (str): (Optional) Input query alignment [Default=None].
+            reference_aln (str): (Optional) Input reference alignment [Default=None].
+
+        Returns:
+            tags (tuple[list[ProteinTagHit]]): A list of ProteinTagHits.
+            termini (dict[str, tuple[int, int]]): Output dictionary with N-terminal and C-terminal regions with tags.
+        """
         # Validate tags if a query and reference alignment is provided
         if query_aln is None or reference_aln is None:
             query_aln = None
@@ -778,6 +1245,53 @@ class TagFinder:
 
         return all_tags, termini
 
+    def find_tags_batch(
+        self, sequences: list[str]
+    ) -> list[tuple[list[ProteinTagHit], dict[str, tuple[int, int]]]]:
+        """
+        Find tags in many sequences at once and return the tags and termini of each sequence.
+
+        All tags are searched in all sequences with a single call of `TagIndex.search_batch`.
+
+        Args:
+            sequences (list[str]): Input sequences to find tags in.
+
+        Returns:
+            results (list[tuple[list[ProteinTagHit], dict[str, tuple[int, int]]]]): The output of `find_tags` for
+            each sequence.
+
+        Example:
+            >>> tag_finder = TagFinder()
+            >>> results = tag_finder.find_tags_batch(["GHHHHHHMYNAMEISCARL", "MYNAMEISCARL"])
+            >>> [[tag.sequence for tag in tags] for tags, termini in results]
+            [['GHHHHHH'], []]
+        """
+        seq_idx, tag_idx, start, identity = self.tag_index.search_batch(
+            sequences, self.identity_cutoff
+        )
+        bounds = np.searchsorted(seq_idx, np.arange(len(sequences) + 1)).tolist()
+        tag_idx, start = tag_idx.tolist(), start.tolist()
+
+        results = []
+        for i, sequence in enumerate(sequences):
+            hits = [
+                self._tag_hit(self._tags[tag_idx[h]], sequence, start[h], identity[h])
+                for h in range(bounds[i], bounds[i + 1])
+            ]
+            results.append(
+                self._locate_tags(self._remove_redundant_hits(hits), sequence)
+            )
+        return results
+
+    @staticmethod
+    def _strip(
+        sequence: str, tags: list[ProteinTagHit], termini: dict[str, tuple[int, int]]
+    ) -> tuple[str, list[ProteinTagHit]]:
+        """Strip the terminal tags found by `find_tags` from a sequence, see `strip_tags`."""
+        stripped_seq = sequence[termini["N-terminus"][-1] : termini["C-terminus"][0]]
+        removed_tags = [tag for tag in tags if tag.location != "Internal"]
+        return stripped_seq, removed_tags
+
     def strip_tags(
         self,
         sequence: str,
@@ -804,9 +1318,32 @@ class TagFinder:
             >>> 'GHHHHHH'
         """
         tags, termini = self.find_tags(sequence=sequence)
-        stripped_seq = sequence[termini["N-terminus"][-1] : termini["C-terminus"][0]]
-        removed_tags = [tag for tag in tags if tag.location != "Internal"]
-        return stripped_seq, removed_tags
+        return self._strip(sequence, tags, termini)
+
+    def strip_tags_batch(
+        self, sequences: list[str]
+    ) -> list[tuple[str, list[ProteinTagHit]]]:
+        """
+        Strip tags from the N- and C-terminus of many sequences at once, see `strip_tags`.
+
+        Args:
+            sequences (list[str]): Input sequences to strip tags from.
+
+        Returns:
+            results (list[tuple[str, list[ProteinTagHit]]]): The sequence without tags and the list of removed tags
+            for each input sequence.
+
+        Example:
+            >>> tag_finder = TagFinder()
+            >>> [seq for seq, tags in tag_finder.strip_tags_batch(["GHHHHHHMYNAMEISCARL", "MYNAMEISCARL"])]
+            ['MYNAMEISCARL', 'MYNAMEISCARL']
+        """
+        return [
+            self._strip(sequence, tags, termini)
+            for sequence, (tags, termini) in zip(
+                sequences, self.find_tags_batch(sequences)
+            )
+        ]
 
     @staticmethod
     def _tag_report(removed_tag_list: list[ProteinTagHit], terminus: str) -> str:
@@ -867,10 +1404,30 @@ class TagFinder:
                           QRKYSDLPGFISWKKQNIIALRNNMSKLHRLY'
             }
         """
+        return self._strip_report(*self.strip_tags(sequence))
+
+    def get_strip_report_batch(self, sequences: list[str]) -> list[dict]:
+        """
+        Strip tags from many sequences at once and return a report dictionary for each, see `get_strip_report`.
+
+        Args:
+            sequences (list[str]): Input sequences to strip tags from.
+
+        Returns:
+            output (list[dict]): The report dictionary of each sequence.
+        """
+        return [
+            self._strip_report(stripped_sequence, removed_tags)
+            for stripped_sequence, removed_tags in self.strip_tags_batch(sequences)
+        ]
+
+    def _strip_report(
+        self, stripped_sequence: str, removed_tags: list[ProteinTagHit]
+    ) -> dict:
+        """Create the report dictionary of the tags stripped from a sequence, see `get_strip_report`."""
         found_tag = True
         removed_names = []
         removed_locations = []
-        stripped_sequence, removed_tags = self.strip_tags(sequence)
 
         # Create a tag report for both termini
         if len(removed_tags) != 0:
@@ -894,7 +1451,9 @@ class TagFinder:
 
         return output
 
-    def tag_strip_csv(self, input_file: str, output_file: str, col_name: str) -> str:
+    def tag_strip_csv(
+        self, input_file: str, output_file: str, col_name: str, batch_size: int = 1000
+    ) -> str:
         """
         Strip terminal purification tags from an input .csv file containing protein sequences.
 
@@ -902,6 +1461,7 @@ class TagFinder:
             input_file (str): Full path of the input CSV file.
             output_file (str): Full path of the output CSV file.
             col_name (str): The column name containing the sequence.
+            batch_size (int): Number of sequences searched for tags at once [Default=1000].
 
         Returns:
             output_file (str): An output file where the sequences in the column specified by 'col_name' have their
@@ -920,23 +1480,21 @@ class TagFinder:
         if not input_file.endswith(".csv"):
             raise TypeError("Input File is not a .csv file!")
 
+        import pandas as pd
+        from tqdm import tqdm
+
         dataframe = pd.read_csv(input_file, delimiter=",", low_memory=True)
-        dataframe["removed_tags"] = dataframe.apply(lambda _: "", axis=1)
-        tag_counter = 0
-        seq_counter = 0
-        tag_names = []
-        tag_locations = []
-        for i, row in tqdm(
-            dataframe.iterrows(), total=dataframe.index.size, desc="Processing"
-        ):
-            report = self.get_strip_report(sequence=row[col_name])
-            tag_names += report["names"]
-            tag_locations += report["locations"]
-            dataframe.at[i, col_name] = report["sequence"]
-            dataframe.at[i, "removed_tags"] = report["summary"]
-            if report["tag_found"]:
-                tag_counter += 1
-            seq_counter += 1
+        sequences = dataframe[col_name].tolist()
+        reports = []
+        for start in tqdm(range(0, len(sequences), batch_size), desc="Processing"):
+            batch = sequences[start : start + batch_size]
+            reports += self.get_strip_report_batch(batch)
+        dataframe[col_name] = [report["sequence"] for report in reports]
+        dataframe["removed_tags"] = [report["summary"] for report in reports]
+        tag_counter = sum(report["tags_found"] for report in reports)
+        seq_counter = len(reports)
+        tag_names = [name for report in reports for name in report["names"]]
+        tag_locations = [loc for report in reports for loc in report["locations"]]
 
         # Generate basic report
         tag_percent = int(round(tag_counter / seq_counter * 100))
@@ -964,6 +1522,7 @@ class TagFinder:
         num_proc: int = 1,
         convert_nucleotide: bool = False,
         remove_artificial: bool = False,
+        batch_size: int = 1000,
     ) -> Dataset:
         """
         Clean an input Huggingface Dataset by converting to protein sequences and removing tags. This will add a column
@@ -977,6 +1536,7 @@ class TagFinder:
             convert_nucleotide (bool): If True, convert DNA and RNA sequences to protein sequences before removing tags.
             remove_artificial (bool): If True, remove artificial low entropy sequences with a Jensen-Shannon distance
             over 0.6 to naturally occuring proteins from the data-set if they do not start with methionine.
+            batch_size (int): Number of sequences searched for tags at once [Default=1000].
         Returns:
             dataset: Modified HuggingFace dataset. The seq_col_name column has been replaced with a sequence where
             N-terminal and C-terminal tags are removed. The dataset also has a new column called 'removed_tags' where a
@@ -1003,7 +1563,11 @@ class TagFinder:
             convert_nucleotide=convert_nucleotide,
             label_artificial=remove_artificial,
         )
-        dataset = dataset.map(cleaner, num_proc=num_proc)
+        # The tag index is built once and sent to the workers with the cleaner
+        self.tag_index
+        dataset = dataset.map(
+            cleaner.clean_batch, batched=True, batch_size=batch_size, num_proc=num_proc
+        )
         if num_proc == 1:
             print(cleaner)
         else:
@@ -1027,7 +1591,8 @@ class SequenceCleaner:
     method to clean sequences by detecting and converting DNA and RNA sequences to protein sequences and use TagFinder
     on the sequences converted sequences to remove tags.
 
-    This class operates on individual samples (rows) and returns new samples where the sequence column has been replaced
+    This class operates on individual samples (rows), or on batches of rows with `clean_batch`,
+    and returns new samples where the sequence column has been replaced
     with a cleaned up sequence without tags and where the removed_tags column has a summary of the tags that were
     removed from the input sequence.
     """
@@ -1066,6 +1631,33 @@ class SequenceCleaner:
         self._convert_nucleotide = convert_nucleotide
         self._label_artificial = label_artificial
 
+    @staticmethod
+    def _residue_counts(sequences: list[str]) -> np.ndarray:
+        """
+        Count the residues of many sequences with a single bincount over their concatenated uint8 encoding.
+
+        Args:
+            sequences (list[str]): The input sequences. Non-ASCII characters are counted as '?'.
+
+        Returns:
+            counts (np.ndarray): The (sequences x 256) number of occurrences of each byte in each sequence.
+        """
+        codes = np.frombuffer(
+            "".join(sequences).encode("ascii", errors="replace"), dtype=np.uint8
+        )
+        seq_idx = np.repeat(
+            np.arange(len(sequences)), [len(sequence) for sequence in sequences]
+        )
+        counts = np.bincount(seq_idx * 256 + codes, minlength=len(sequences) * 256)
+        return counts.reshape(len(sequences), 256)
+
+    @staticmethod
+    def _byte_mask(characters: str) -> np.ndarray:
+        """Boolean mask of the bytes of the given characters."""
+        mask = np.zeros(256, dtype=bool)
+        mask[np.frombuffer(characters.encode("ascii"), dtype=np.uint8)] = True
+        return mask
+
     @staticmethod
     def get_sequence_type(sequence: str) -> str:
         """
@@ -1075,22 +1667,60 @@ class SequenceCleaner:
             sequence (str): The input sequence.
 
         Returns:
-            seq_type (str): The type of the input sequence.
-        """
-        alphabet = set(sequence)
-        dna_fraction = sum([sequence.count(x) for x in 'ATGC']) / len(sequence)
-        rna_fraction = sum([sequence.count(x) for x in 'AUGC']) / len(sequence)
-        if dna_fraction > 0.99 and len(sequence) % 3 == 0 and all(x in 'ATGCWSMKRYBDHVN.X' for x in alphabet):
-            seq_type = 'DNA'
-        elif rna_fraction > 0.99 and len(sequence) % 3 == 0 and all(x in 'AUGCWSMKRYBDHVN.X' for x in alphabet):
-            seq_type = 'RNA'
-        elif all(x in 'QWERTYIPASDFGHKLCVNM' for x in alphabet):
-            seq_type = 'Protein'
-        elif all(x in 'QWERTYIPASDFGHKLCVNMX' for x in alphabet):
-            seq_type = 'Ambiguous_Protein'
-        else:
-            seq_type = 'Unknown'
-        return seq_type
+            seq_type (str): The type of the input sequence, see `get_sequence_types`.
+        """
+        return SequenceCleaner.get_sequence_types([sequence])[0]
+
+    @staticmethod
+    def get_sequence_types(sequences: list[str]) -> list[str]:
+        """
+        Calculate the sequence types (DNA, RNA, Protein, Ambiguous Protein) of many sequences at once.
+
+        DNA and RNA sequences consist of more than 99% A, T/U, G and C, have a length divisible by three and only
+        contain IUPAC nucleotide codes. Protein sequences only contain the 20 standard amino acids, ambiguous protein
+        sequences also contain X. All other sequences, including empty sequences, are of type 'Unknown'.
+
+        Args:
+            sequences (list[str]): The input sequences.
+
+        Returns:
+            seq_types (list[str]): The type of each input sequence.
+
+        Example:
+            >>> SequenceCleaner.get_sequence_types(["ATGGCC", "AUGGCC", "MKV", "MKX", "MK1", ""])
+            ['DNA', 'RNA', 'Protein', 'Ambiguous_Protein', 'Unknown', 'Unknown']
+        """
+        # Number of residues of each sequence in each set of characters
+        character_sets = [
+            "ATGC",
+            "AUGC",
+            "ATGCWSMKRYBDHVN.X",
+            "AUGCWSMKRYBDHVN.X",
+            "QWERTYIPASDFGHKLCVNM",
+            "QWERTYIPASDFGHKLCVNMX",
+        ]
+        masks = np.stack([SequenceCleaner._byte_mask(c) for c in character_sets], 1)
+        counts = SequenceCleaner._residue_counts(sequences)
+        in_set = counts.astype(np.float64) @ masks
+        lengths = counts.sum(axis=1)
+        only = in_set == lengths[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            nucleotide = (in_set[:, :2] / lengths[:, None] > 0.99) & (
+                lengths[:, None] % 3 == 0
+            )
+
+        seq_types = np.select(
+            [
+                lengths == 0,
+                nucleotide[:, 0] & only[:, 2],
+                nucleotide[:, 1] & only[:, 3],
+                only[:, 4],
+                only[:, 5],
+            ],
+            ["Unknown", "DNA", "RNA", "Protein", "Ambiguous_Protein"],
+            default="Unknown",
+        )
+        return seq_types.tolist()
 
     @staticmethod
     def js_distance(
@@ -1103,8 +1733,28 @@ class SequenceCleaner:
             sequence (str): The input sequence.
 
         Returns:
-            entropy (float): Shannon Entropy of the input sequence.
+            entropy (float): Shannon Entropy of the input sequence, see `js_distances`.
         """
+        return SequenceCleaner.js_distances([sequence])[0]
+
+    @staticmethod
+    def js_distances(sequences: list[str]) -> np.ndarray:
+        """
+        Calculates the Jensen-Shannon distances of many sequences to natural amino-acid frequencies at once.
+        Residues are counted case-insensitively and X is ignored.
+
+        Args:
+            sequences (list[str]): The input sequences.
+
+        Returns:
+            js_distances (np.ndarray): The Jensen-Shannon distance of each sequence, NaN if it has no residues but X.
+
+        Example:
+            >>> distances = SequenceCleaner.js_distances(["ACDEFGHIKLMNPQRSTVWY", "AAAAAAAAAA"])
+            >>> bool(distances[0] < 0.2), bool(distances[1] > 0.6)
+            (True, True)
+        """
+        from scipy.spatial.distance import jensenshannon
 
         # Amino-Acid frequencies based on https://www.ncbi.nlm.nih.gov/pmc/articles/PMC7127678/
         aa_frequencies = {
@@ -1129,17 +1779,19 @@ class SequenceCleaner:
             'W': 0.0118,
             'Y': 0.0311}
         aa_list = list(aa_frequencies.keys())
-        sequence = sequence.upper().replace('X', '')
-        observed_frequencies = np.array([sequence.count(aa)/len(sequence) for aa in aa_list])
+        counts = SequenceCleaner._residue_counts(sequences)
+        upper = np.frombuffer("".join(aa_list).encode("ascii"), dtype=np.uint8)
+        aa_counts = counts[:, upper] + counts[:, upper + (ord("a") - ord("A"))]
+        lengths = counts.sum(axis=1) - counts[:, ord("X")] - counts[:, ord("x")]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            observed_frequencies = aa_counts / lengths[:, None]
         expected_frequencies = np.array([aa_frequencies[aa] for aa in aa_list])/sum(aa_frequencies.values())
         # Add a small number to avoid division by zero
         observed_frequencies += 1e-16
-        observed_frequencies = observed_frequencies / sum(observed_frequencies)
+        observed_frequencies /= observed_frequencies.sum(axis=1, keepdims=True)
 
         # Calculate JS-distance
-        js_distance = sp.spatial.distance.jensenshannon(observed_frequencies, expected_frequencies)
-
-        return js_distance
+        return jensenshannon(observed_frequencies, expected_frequencies[None], axis=1)
 
     def convert_sequence(self, sequence: str) -> str:
         """
@@ -1151,24 +1803,43 @@ class SequenceCleaner:
         Returns:
             sequence (str): Output sequence converted to protein.
         """
-        seq_type = self.get_sequence_type(sequence)
-        if seq_type == 'RNA':
-            self._rna_counter += 1
-        elif seq_type == 'DNA':
-            self._dna_counter += 1
-        elif seq_type == 'Protein':
-            self._protein_counter += 1
-        elif seq_type == 'Ambiguous_Protein':
-            self._protein_counter += 1
-            self._ambiguous_counter += 1
-        else:
-            seq_type = 'Unknown'
+        return self.convert_sequences([sequence])[0]
+
+    def convert_sequences(self, sequences: list[str]) -> list[str]:
+        """
+        Cleans up many input sequences by checking their sequence types at once and converting DNA and RNA sequences
+        to protein sequences.
 
-        if seq_type in ['DNA', 'RNA']:
-            translated = str(Seq.Seq(sequence).translate().replace('*', ''))
-            seq_type = self.get_sequence_type(translated)
-            sequence = translated
+        Args:
+            sequences (list[str]): Input sequences which can be DNA, RNA or protein.
+
+        Returns:
+            sequences (list[str]): Output sequences converted to protein.
 
+        Raises:
+            TypeError: If a translated DNA or RNA sequence is not a protein sequence.
+        """
+        seq_types = self.get_sequence_types(sequences)
+        self._rna_counter += seq_types.count('RNA')
+        self._dna_counter += seq_types.count('DNA')
+        self._protein_counter += seq_types.count('Protein')
+        self._protein_counter += seq_types.count('Ambiguous_Protein')
+        self._ambiguous_counter += seq_types.count('Ambiguous_Protein')
+
+        nucleotide_idx = [i for i, t in enumerate(seq_types) if t in ['DNA', 'RNA']]
+        if len(nucleotide_idx) == 0:
+            return list(sequences)
+
+        from pedata.encoding.transform import translate_dna
+
+        sequences = list(sequences)
+        translated = [
+            protein.replace('*', '')
+            for protein in translate_dna([sequences[i] for i in nucleotide_idx])
+        ]
+        for i, sequence, seq_type in zip(
+            nucleotide_idx, translated, self.get_sequence_types(translated)
+        ):
             if seq_type == 'Protein':
                 self._protein_counter += 1
             elif seq_type == 'Ambiguous_Protein':
@@ -1176,8 +1847,9 @@ class SequenceCleaner:
                 self._ambiguous_counter += 1
             else:
                 raise TypeError(f"Unknown sequence: {sequence}")
+            sequences[i] = sequence
 
-        return sequence
+        return sequences
 
     def __call__(self, sample):
         """
@@ -1189,34 +1861,58 @@ class SequenceCleaner:
         Returns:
             sample: The modified row in the HuggingFace dataset.
         """
-        if self._convert_nucleotide:
-            sequence = sample[self._seq_col_name]
-            converted_sequence = self.convert_sequence(sequence)
-            if sequence != converted_sequence:
-                print('Converting Nucleotide Sequence:')
-                print(sequence)
-                print()
+        batch = self.clean_batch({key: [value] for key, value in sample.items()})
+        return {key: value[0] for key, value in batch.items()}
+
+    def clean_batch(self, batch: dict) -> dict:
+        """
+        The function called by the HuggingFace .map() function with `batched=True`. The tags of all sequences in the
+        batch are searched at once.
+
+        Args:
+            batch: The input rows in the HuggingFace dataset, as dictionary of columns.
 
+        Returns:
+            batch: The modified rows in the HuggingFace dataset.
+        """
+        artificial = list(
+            batch.get(
+                self._artificial_col_name, [False] * len(batch[self._seq_col_name])
+            )
+        )
+        if self._convert_nucleotide:
+            sequences = self.convert_sequences(batch[self._seq_col_name])
+            for sequence, converted_sequence in zip(
+                batch[self._seq_col_name], sequences
+            ):
+                if sequence != converted_sequence:
+                    print('Converting Nucleotide Sequence:')
+                    print(sequence)
+                    print()
         else:
-            converted_sequence = sample[self._seq_col_name]
+            sequences = list(batch[self._seq_col_name])
 
         # Calculate a probability that the sequence is natural based on AA frequency
         if self._label_artificial:
-            js_dist = self.js_distance(converted_sequence)
-            artificial_candidate = js_dist > 0.6 and converted_sequence[0] != 'M'
-            if artificial_candidate:
-                sample[self._artificial_col_name] = True
-                print('Removing artificial sequence:')
-                print(converted_sequence)
-                print()
-        report = self._tag_finder.get_strip_report(sequence=converted_sequence)
-        self._tag_names += report["names"]
-        self._tag_locations += report["locations"]
-        sample[self._seq_col_name] = report["sequence"]
-        sample[self._tag_col_name] = report["summary"]
-        if report["tags_found"]:
-            self._tag_counter += 1
-        return sample
+            js_dist = self.js_distances(sequences)
+            for i in np.flatnonzero(js_dist > 0.6).tolist():
+                if sequences[i][0] != 'M':
+                    artificial[i] = True
+                    print('Removing artificial sequence:')
+                    print(sequences[i])
+                    print()
+
+        reports = self._tag_finder.get_strip_report_batch(sequences)
+        for report in reports:
+            self._tag_names += report["names"]
+            self._tag_locations += report["locations"]
+            if report["tags_found"]:
+                self._tag_counter += 1
+        batch[self._seq_col_name] = [report["sequence"] for report in reports]
+        batch[self._tag_col_name] = [report["summary"] for report in reports]
+        if self._label_artificial:
+            batch[self._artificial_col_name] = artificial
+        return batch
 
     def __repr__(self):
         """
@@ -1225,6 +1921,8 @@ class SequenceCleaner:
         Returns:
             map_report (str): A string report of the TagFinder results of the dataset.
         """
+        import pandas as pd
+
         nucleic_acid_count = self._dna_counter + self._rna_counter
         convert_percent = int(round(nucleic_acid_count / self._protein_counter * 100))
         ambiguous_percent = int(
@@ -1259,6 +1957,8 @@ class SequenceCleaner:
 
 
 if __name__ == '__main__':
+    from pedata.util import load_full_dataset
+
     tag_finder = TagFinder()
     tf = TagFinder()
     # ds = load_full_dataset('Exazyme/TemStaProLabelled')
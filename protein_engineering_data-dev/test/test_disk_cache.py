@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import os
 import pytest
@@ -233,6 +234,85 @@ def test_preprocess_data_no_missing_dna_seq_val(dna_expected_new_features, csv_f
     )
 
 
+def test_preprocess_data_chunked(csv_file, folder_path):
+    """preprocess_data test: Processing the file in blocks gives the same dataset"""
+    pd.DataFrame(
+        {
+            "aa_mut": ["T8M", "P3G", "wildtype", "T8M_P3G", "C10A"],
+            "aa_seq": [None, None, "GMPKSEFTHC", None, None],
+            "target foo": [1, 2, 3, 4, 5],
+        }
+    ).to_csv(csv_file, index=False)
+    needed = ["aa_len", "aa_1gram"]
+    expected = preprocess_data(csv_file, needed_encodings=needed).sort("index")
+    # the wildtype is in the second block
+    dataset = preprocess_data(
+        csv_file,
+        save_to_path=folder_path,
+        filesystem=fsspec.filesystem("file"),
+        needed_encodings=needed,
+        chunk_size=2,
+    ).sort("index")
+    clean_up()
+    assert dataset.column_names == expected.column_names
+    for column in ["aa_seq", "aa_len", "aa_1gram", "target foo"]:
+        np.testing.assert_array_equal(dataset[column], expected[column])
+    assert dataset["aa_seq"][:2] == ["GMPKSEFMHC", "GMGKSEFTHC"]
+
+
+def test_preprocess_data_chunked_padding(csv_file):
+    """preprocess_data test: Encodings of all blocks are padded to the longest sequence of the file"""
+    pd.DataFrame(
+        {"aa_seq": ["MAT", "PKSEFT", "MK", "MKVDLAGGTK"], "target foo": [1, 2, 3, 4]}
+    ).to_csv(csv_file, index=False)
+    needed = ["aa_len", "aa_1hot", "aa_tokens"]
+    dataset = preprocess_data(
+        csv_file, needed_encodings=needed, chunk_size=2, add_splits=False
+    ).sort("index")
+    expected = preprocess_data(
+        csv_file, needed_encodings=needed, add_splits=False
+    ).sort("index")
+    clean_up()
+    assert dataset.features == expected.features
+    assert np.array(dataset["aa_1hot"]).shape == (4, 10 * 21)
+    np.testing.assert_array_equal(dataset["aa_1hot"], expected["aa_1hot"])
+    np.testing.assert_array_equal(dataset["aa_tokens"], expected["aa_tokens"])
+
+    # sequences filled in from the mutation codes have the type of the sequences read from the file
+    pd.DataFrame(
+        {
+            "aa_mut": ["T8M", "P3G", "wildtype"],
+            "aa_seq": [None, None, "GMPKSEFTHC"],
+            "target foo": [1, 2, 3],
+        }
+    ).to_csv(csv_file, index=False)
+    dataset = preprocess_data(
+        csv_file, needed_encodings=needed, chunk_size=2, add_splits=False
+    )
+    expected = preprocess_data(csv_file, needed_encodings=needed, add_splits=False)
+    clean_up()
+    assert dataset.features == expected.features
+    np.testing.assert_array_equal(dataset["aa_seq"], expected["aa_seq"])
+
+
+def test_preprocess_data_chunked_invalid(csv_file):
+    """preprocess_data test: Blocks are validated and need the parent sequence"""
+    pd.DataFrame(
+        {"aa_mut": ["T8M", "P3G"], "aa_seq": [None, None], "target foo": [1, 2]}
+    ).to_csv(csv_file, index=False)
+    with pytest.raises(ValueError):
+        preprocess_data(csv_file, chunk_size=0)
+    with pytest.raises(ValueError):
+        preprocess_data(csv_file, needed_encodings=["aa_len"], chunk_size=1)
+
+    pd.DataFrame({"aa_seq": ["GMPKSEFTHC", None], "target foo": [1, 2]}).to_csv(
+        csv_file, index=False
+    )
+    with pytest.raises(KeyError):
+        preprocess_data(csv_file, needed_encodings=["aa_len"], chunk_size=1)
+    clean_up()
+
+
 def test_load_similarity_invalid_alphabet():
     """Test load_similarity: Invalid alphabet type"""
     alphabet_type_bb = "bb"
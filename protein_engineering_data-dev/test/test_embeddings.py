@@ -1,7 +1,16 @@
-from pedata.encoding.embeddings import ESM, Ankh
+from pedata.encoding.embeddings import (
+    ESM,
+    Ankh,
+    AnkhBatched,
+    batched_embed,
+    length_bucketed_batches,
+    pool_hidden_states,
+)
 
 from datasets import Dataset
+import numpy as np
 import pytest
+import torch
 
 
 @pytest.fixture()
@@ -14,6 +23,11 @@ def ankh():
     return Ankh()
 
 
+@pytest.fixture()
+def ankh_batched():
+    return AnkhBatched(max_tokens=16)
+
+
 @pytest.fixture()
 def str_input():
     return "ATGC"
@@ -34,6 +48,41 @@ def valid_input_sequences():
     return ["ATGC", "GCTA"]
 
 
+@pytest.fixture()
+def mixed_length_sequences():
+    return ["MKVLAGGT", "MK", "MKVLAGGTKPLE", "MKV", "MKVLA"]
+
+
+# ======= Batching tests =======
+
+
+def test_length_bucketed_batches():
+    """Batches respect the token budget and cover every sequence exactly once"""
+    lengths = [30, 1000, 45, 600, 30, 31, 120]
+    batches = length_bucketed_batches(lengths, max_tokens=200)
+    assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+    for b in batches:
+        padded_tokens = len(b) * max(lengths[i] for i in b)
+        # only a single sequence may exceed the budget on its own
+        assert padded_tokens <= 200 or len(b) == 1
+
+    with pytest.raises(ValueError):
+        length_bucketed_batches(lengths, max_tokens=0)
+
+
+def test_batched_embed(mixed_length_sequences: list[str]):
+    """The original order is restored after batching"""
+    batches = []
+
+    def embed(batch):
+        batches.append(batch)
+        return [len(s) for s in batch]
+
+    result = batched_embed(mixed_length_sequences, embed, max_tokens=20)
+    assert result == [len(s) for s in mixed_length_sequences]
+    assert len(batches) > 1
+
+
 # ======= Esm tests =======
 
 
@@ -80,6 +129,50 @@ def test_esm_on_dataset(esm: ESM, regr_dataset):
     assert round(esm.transform(batch["aa_seq"])[-1][-1][-1], 3) == round(-0.057, 3)
 
 
+def test_esm_batched_matches_unbatched(esm: ESM, mixed_length_sequences: list):
+    """Small token budgets give the same representations as a single batch"""
+    single = np.array(esm.transform(mixed_length_sequences))
+    esm.max_tokens = 16
+    batched = np.array(esm.transform(mixed_length_sequences))
+    assert np.allclose(single, batched, atol=1e-4)
+
+
+def test_pool_hidden_states():
+    """Pooling ignores padding and, for the masked mean, special tokens"""
+    hidden = torch.tensor([[[1.0], [2.0], [6.0]], [[-1.0], [4.0], [9.0]]])
+    attention_mask = torch.tensor([[True, True, True], [True, True, False]])
+    special_tokens_mask = torch.tensor([[True, False, False], [True, False, False]])
+    expected = {
+        "mean": [[3.0], [1.5]],
+        "masked_mean": [[4.0], [4.0]],
+        "cls": [[1.0], [-1.0]],
+        "max": [[6.0], [4.0]],
+    }
+    for pooling, values in expected.items():
+        pooled = pool_hidden_states(
+            hidden, attention_mask, special_tokens_mask, pooling
+        )
+        assert torch.allclose(pooled, torch.tensor(values)), pooling
+
+    with pytest.raises(ValueError):
+        pool_hidden_states(hidden, attention_mask, special_tokens_mask, "median")
+
+
+def test_esm_pooled(esm: ESM, mixed_length_sequences: list):
+    """Pooled representations equal the per-residue representations averaged over the tokens of each sequence"""
+    per_residue = esm.transform(mixed_length_sequences)
+    pooled = esm.with_pooling("mean").transform(mixed_length_sequences)
+    # per-residue representations include CLS and EOS tokens
+    lengths = np.array([len(s) + 2 for s in mixed_length_sequences])
+    assert pooled.shape == (len(mixed_length_sequences), per_residue.shape[-1])
+    assert np.allclose(pooled, per_residue.sum(axis=1) / lengths[:, None], atol=1e-4)
+    # the transformer the pooled one was derived from is unchanged
+    assert esm.pooling is None
+
+    with pytest.raises(ValueError):
+        ESM(pooling="median")
+
+
 # ======= Ankh tests =======
 def test_ankh_nonelist_input(ankh: Ankh, str_input: str):
     """Test Ankh class: raise ValueError when Non-list input
@@ -130,3 +223,26 @@ def test_ankh_on_dataset(ankh: Ankh, regr_dataset: Dataset):
     """
     batch = regr_dataset[:2]
     assert ankh.transform(batch["aa_seq"])[-1][-1][-1], 3 == round(-0.057, 3)
+
+
+def test_ankh_batched_order(
+    ankh: Ankh, ankh_batched: AnkhBatched, mixed_length_sequences: list[str]
+):
+    """AnkhBatched restores the input order after length bucketing"""
+    expected = np.array(ankh.transform(mixed_length_sequences))
+    result = np.array(ankh_batched.transform(mixed_length_sequences))
+    assert result.shape == expected.shape
+    assert np.allclose(result, expected, atol=1e-4)
+
+
+def test_ankh_batched_pooled(
+    ankh_batched: AnkhBatched, mixed_length_sequences: list[str]
+):
+    """Masked mean pooling averages over the residues only"""
+    per_residue = ankh_batched.transform(mixed_length_sequences)
+    pooled = ankh_batched.with_pooling("masked_mean").transform(mixed_length_sequences)
+    # per-residue representations end with the EOS token
+    expected = [
+        r[: len(s)].mean(axis=0) for r, s in zip(per_residue, mixed_length_sequences)
+    ]
+    assert np.allclose(pooled, np.array(expected), atol=1e-4)
@@ -1,10 +1,13 @@
 from pedata.encoding.embeddings_transform import (
+    RKHSKmerEmbedding,
     linear_kernel,
     reshape_1hot,
     rkhs_kmer_embeddings,
     kmer_embeddings_centers,
     kmers_mean_embeddings,
 )
+from pedata.config.alphabets import padded_aa_alphabet
+from pedata.encoding.transform import tokens_to_one_hot
 import numpy as np
 import pytest
 
@@ -37,6 +40,17 @@ def test_reshape_1hot(regr_dataset_test, regr_dataset_seq_len, nb_aa):
     assert emb_list_1hot.shape == (5, 442, 21)
 
 
+def test_reshape_1hot_from_tokens(regr_dataset_test, regr_dataset_seq_len, nb_aa):
+    """The padded 1hot encoding can be derived from the tokens"""
+    emb_list_1hot = reshape_1hot(
+        regr_dataset_test["aa_1hot"], regr_dataset_seq_len, nb_aa
+    )
+    tokens = regr_dataset_test.with_format("numpy")["aa_tokens"]
+    np.testing.assert_array_equal(
+        tokens_to_one_hot(tokens, len(padded_aa_alphabet), "padded"), emb_list_1hot
+    )
+
+
 def test_kmers_mean_embeddings(regr_dataset_test, regr_dataset_seq_len, nb_aa):
     emb_list_1hot = reshape_1hot(
         regr_dataset_test["aa_1hot"], regr_dataset_seq_len, nb_aa
@@ -55,6 +69,29 @@ def test_kmer_embeddings_centers(regr_dataset_test, regr_dataset_seq_len, nb_aa)
     assert U1.shape == (759, 2100)
 
 
+def test_kmers_of_sequence_list():
+    """K-mer means and centers of differently long sequences equal those of explicit windows"""
+    rng = np.random.default_rng(0)
+    emb_list = [rng.integers(0, 2, (n, 3)).astype(float) for n in (4, 7, 5)]
+    kmers = [
+        np.array([emb[j : j + 3].ravel() for j in range(len(emb) - 2)])
+        for emb in emb_list
+    ]
+
+    U, U_norm = kmers_mean_embeddings(emb_list, kmer_size=3)
+    np.testing.assert_allclose(U, [k.mean(axis=0) for k in kmers])
+    np.testing.assert_allclose(np.linalg.norm(U_norm, axis=1), 1.0)
+
+    kmer_list, U1 = kmer_embeddings_centers(emb_list, kmer_size=3)
+    for kmer, expected in zip(kmer_list, kmers):
+        np.testing.assert_array_equal(kmer, expected)
+    unique = np.unique(np.concatenate(kmers), axis=0)
+    np.testing.assert_array_equal(U1, unique / np.linalg.norm(unique, axis=1)[:, None])
+
+    with pytest.raises(ValueError):
+        kmers_mean_embeddings(emb_list, kmer_size=5)
+
+
 def test_rkhs_kmer_embeddings(regr_dataset_test, regr_dataset_seq_len, nb_aa):
     # reshape 1hot
     emb_list_1hot_train = reshape_1hot(
@@ -75,3 +112,38 @@ def test_rkhs_kmer_embeddings(regr_dataset_test, regr_dataset_seq_len, nb_aa):
 
     assert rkhs_kmer_emb_list.shape == (5, 256)
     assert list(np.round(rkhs_kmer_emb_list[0][:2], 6)) == list([0.279357, 0.132699])
+
+
+def test_rkhs_kmer_embedding_transformer():
+    """The fitted transformer embeds new sequences in chunks like the direct computation"""
+    rng = np.random.default_rng(0)
+    emb_list = [np.eye(4)[rng.integers(0, 4, n)] for n in rng.integers(6, 15, 30)]
+    rkhs = RKHSKmerEmbedding(kmer_size=3, nystrom_size=8, chunk_size=7)
+    rkhs.fit(iter(emb_list[:20]))
+    assert rkhs.centers_.shape == (8, 12)
+    np.testing.assert_allclose(np.linalg.norm(rkhs.centers_, axis=1), 1.0)
+
+    expected = [
+        (
+            rkhs.normalization_
+            @ linear_kernel(
+                rkhs.centers_,
+                np.array([emb[j : j + 3].ravel() for j in range(len(emb) - 2)]),
+            )
+        ).mean(axis=1)
+        for emb in emb_list[20:]
+    ]
+    np.testing.assert_allclose(rkhs.transform(emb_list[20:]), expected, atol=1e-12)
+    # other kernels are evaluated on chunks of k-mers
+    rkhs.kernel_fn = lambda x, y: x @ y.T
+    np.testing.assert_allclose(rkhs.transform(emb_list[20:]), expected, atol=1e-12)
+
+    # the reservoir holds all unique k-mers or a sample of at most `max_kmers`
+    _, U1 = kmer_embeddings_centers(emb_list, kmer_size=3)
+    kmers = RKHSKmerEmbedding(kmer_size=3, max_kmers=10**6)._sample_kmers(emb_list)
+    np.testing.assert_allclose(kmers / np.linalg.norm(kmers, axis=1)[:, None], U1)
+    sampled = RKHSKmerEmbedding(kmer_size=3, max_kmers=20)._sample_kmers(emb_list)
+    assert len(sampled) <= 20
+
+    with pytest.raises(ValueError):
+        rkhs.transform([np.eye(4)[:2]])
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from pedata.encoding.cache import EmbeddingCache, embed_with_cache
+
+
+@pytest.fixture()
+def cache(tmp_path):
+    return EmbeddingCache(tmp_path, "toy_model", "1.0")
+
+
+def count_calls(calls: list):
+    """Toy embedding function recording the sequences it is called on"""
+
+    def embed(seqs):
+        calls.append(list(seqs))
+        return [
+            np.arange(len(s) * 2, dtype=np.float32).reshape(len(s), 2) for s in seqs
+        ]
+
+    return embed
+
+
+def test_put_get(cache: EmbeddingCache):
+    """Embeddings are returned as written, unknown sequences return None"""
+    cache.put_many(["MKV", "MK"], [np.ones((3, 4)), np.zeros(4)])
+    assert len(cache) == 2
+    assert "MKV" in cache and "MKVL" not in cache
+    np.testing.assert_array_equal(cache.get("MKV"), np.ones((3, 4)))
+    # 1D embeddings are stored as a single row
+    assert cache.get("MK").shape == (1, 4)
+    assert cache.get("MKVL") is None
+
+
+def test_persistence(tmp_path, cache: EmbeddingCache):
+    """A new cache object on the same directory sees all shards written before"""
+    cache.put_many(["MKV"], [np.ones((3, 4))])
+    cache.put_many(["MKA"], [np.full((3, 4), 2.0)])
+    reopened = EmbeddingCache(tmp_path, "toy_model", "1.0")
+    assert len(reopened) == 2
+    np.testing.assert_array_equal(reopened.get("MKA"), np.full((3, 4), 2.0))
+
+    # other versions of the model do not share embeddings
+    assert len(EmbeddingCache(tmp_path, "toy_model", "2.0")) == 0
+
+
+def test_float16(tmp_path):
+    """Embeddings can be stored in half precision"""
+    cache = EmbeddingCache(tmp_path, "toy_model", "1.0", dtype="float16")
+    cache.put_many(["MKV"], [np.full((3, 4), 0.5)])
+    assert cache.get("MKV").dtype == np.float16
+
+    with pytest.raises(ValueError):
+        EmbeddingCache(tmp_path, "toy_model", "1.0", dtype="int8")
+
+
+def test_shards_bounded(tmp_path):
+    """Many small writes are merged into few shards and only few shards are mapped at once"""
+    cache = EmbeddingCache(
+        tmp_path, "toy_model", "1.0", max_shards=16, max_open_shards=4
+    )
+    seqs = [f"MK{i}" for i in range(1100)]
+    for i, seq in enumerate(seqs):
+        cache.put_many([seq], [np.full((i % 3 + 1, 2), i)])
+        if i == 10:
+            reader = EmbeddingCache(tmp_path, "toy_model", "1.0")
+    assert len(list(tmp_path.glob("**/shard-*.index.npy"))) <= 16
+    assert len(list(tmp_path.glob("**/*.tmp"))) == 0
+
+    for cached in [cache, EmbeddingCache(tmp_path, "toy_model", "1.0")]:
+        embeddings = cached.get_many(seqs)
+        assert len(cached._open) <= cached.max_open_shards
+        for i, emb in enumerate(embeddings):
+            np.testing.assert_array_equal(emb, np.full((i % 3 + 1, 2), i))
+
+    # a reader indexing shards before they were merged finds the embeddings in the merged shards
+    np.testing.assert_array_equal(reader.get("MK7"), np.full((2, 2), 7))
+
+
+def test_put_invalid(cache: EmbeddingCache):
+    with pytest.raises(ValueError):
+        cache.put_many(["MKV", "MK"], [np.ones((3, 4))])
+    with pytest.raises(ValueError):
+        cache.put_many(["MKV", "MK"], [np.ones((3, 4)), np.ones((2, 3))])
+
+
+def test_embed_with_cache(cache: EmbeddingCache):
+    """The model only runs on unique sequences missing from the cache"""
+    calls = []
+    embed = count_calls(calls)
+    first = embed_with_cache(["MKV", "MK", "MKV"], embed, cache)
+    second = embed_with_cache(["MKVL", "MK", "MKV"], embed, cache)
+    assert calls == [["MKV", "MK"], ["MKVL"]]
+    np.testing.assert_array_equal(first[0], second[2])
+    assert [e.shape for e in second] == [(4, 2), (2, 2), (3, 2)]
+
+    # without a cache, every call runs the model
+    embed_with_cache(["MK"], embed, None)
+    assert calls[-1] == ["MK"]
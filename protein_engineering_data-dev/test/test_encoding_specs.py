@@ -1,7 +1,16 @@
 from datasets import load_dataset
 from pedata.config import add_encodings
+from pedata.config.encoding_specs import (
+    encodings,
+    array_feature,
+    add_array_column,
+    columns_to_dataset,
+    join_columns,
+)
 import datasets as ds
+from pedata.encoding.util import find_function_order
 import jax.numpy as jnp
+import numpy as np
 import pytest
 
 
@@ -149,3 +158,164 @@ def test_add_encodings():
         column in list(encoded.features.keys())
         for column in ["aa_seq", "aa_1hot", "aa_len", "dna_mut", "dna_seq"]
     )
+
+
+def test_array_feature():
+    """Numpy encodings are stored as typed Arrow columns"""
+    assert array_feature(np.zeros((4, 7, 320), dtype=np.float32)) == ds.Array2D(
+        shape=(None, 320), dtype="float32"
+    )
+    assert array_feature(np.zeros((4, 7, 5, 5), dtype=np.float16)) == ds.Array3D(
+        shape=(None, 5, 5), dtype="float16"
+    )
+    assert array_feature(np.zeros((4, 21), dtype=np.int8)) == ds.Sequence(
+        ds.Value("int8")
+    )
+    # Arrow infers the type of everything else
+    assert array_feature(np.zeros(4)) is None
+    assert array_feature(np.array(["MKV", "MKA"])) is None
+    assert array_feature([np.zeros((2, 2)), np.zeros((3, 3))]) is None
+
+
+def test_add_array_column():
+    """Array columns keep their shape and the format of the dataset"""
+    dataset = ds.Dataset.from_dict({"aa_seq": ["MLGTK", "MAGTK"]}).with_format("numpy")
+    values = np.arange(2 * 7 * 3, dtype=np.float32).reshape(2, 7, 3)
+    encoded = add_array_column(dataset, "aa_foo", values)
+    assert encoded.features["aa_foo"] == ds.Array2D(shape=(None, 3), dtype="float32")
+    np.testing.assert_array_equal(encoded["aa_foo"], values)
+
+    # differently shaped arrays are stored as typed nested lists
+    values = [np.ones((3, 3), dtype=np.float32), np.zeros((2, 4), dtype=np.float32)]
+    encoded = add_array_column(dataset, "atm_foo", values)
+    assert encoded.features["atm_foo"] == ds.Sequence(ds.Sequence(ds.Value("float32")))
+    for row, expected in zip(encoded["atm_foo"], values):
+        np.testing.assert_array_equal(np.stack(row), expected)
+    columns = columns_to_dataset({"atm_foo": values, "atm_bar": [np.arange(3)] * 2})
+    assert columns.features["atm_bar"] == ds.Sequence(ds.Value(str(np.arange(3).dtype)))
+    assert columns["atm_foo"][1] == [[0.0] * 4] * 2
+
+
+def test_add_encodings_molecules_default():
+    """Without needed encodings, the graph encodings are added to datasets of molecules"""
+    dataset = ds.Dataset.from_dict(
+        {
+            "bnd_idcs": [np.array([[0, 1], [1, 2]]), np.array([[0], [1]])],
+            "target foo": [1.0, 2.0],
+        }
+    ).with_format("numpy")
+    encoded = add_encodings(dataset)
+    for column in ["atm_count", "bnd_count", "atm_adj", "atm_retprob100"]:
+        assert column in encoded.column_names
+    assert not any(c.startswith(("aa", "dna")) for c in encoded.column_names)
+    # the sparse graph encodings are only added if needed explicitly
+    assert not any(c.endswith(("_idcs", "_vals")) for c in encoded.column_names[1:])
+    assert [np.shape(p) for p in encoded["atm_retprob100"]] == [(3, 100), (2, 100)]
+
+
+def test_sparse_graph_encodings():
+    """Return probabilities are computed from sparse matrices if those are available"""
+    dataset = ds.Dataset.from_dict(
+        {"bnd_idcs": [np.array([[0, 1], [1, 2]]), np.array([[0], [1]])]}
+    ).with_format("numpy")
+    order = find_function_order(encodings, ["bnd_idcs"], ["atm_retprob100"])
+    assert [e.provides for e in order][-1:] == [["atm_retprob100"]]
+    assert ["atm_adj"] in [e.provides for e in order]
+
+    sparse = add_encodings(dataset, ["atm_adj_idcs", "atm_adj_vals"])
+    order = find_function_order(encodings, sparse.column_names, ["atm_retprob100"])
+    assert [e.requires for e in order] == [
+        ["atm_adj_idcs", "atm_adj_vals", "atm_count"]
+    ]
+    encoded = add_encodings(sparse, ["atm_retprob100"])
+    assert "atm_adj" not in encoded.column_names
+    # the sparse-only pipeline is chosen when requesting the sparse matrices along with the return probabilities
+    sparse_only = add_encodings(
+        dataset, ["atm_adj_idcs", "atm_adj_vals", "atm_retprob100"]
+    )
+    assert "atm_adj" not in sparse_only.column_names
+    expected = add_encodings(dataset, ["atm_retprob100"])
+    # compared at full precision, the numpy format returns nested float lists as float32
+    for probs, expected_probs in zip(
+        encoded.with_format(None)["atm_retprob100"],
+        expected.with_format(None)["atm_retprob100"],
+    ):
+        np.testing.assert_allclose(probs, expected_probs, atol=1e-12)
+
+
+def test_embeddings_padded_to_dataset():
+    """Per-residue embeddings of all batches are padded to the longest sequence of the dataset"""
+    # batches of 100 rows with longest sequences of 6, 28 and 10 residues
+    seqs = ["MKVLAG"] * 100 + ["MKVLAGGT" * 3 + "MKVL"] + ["MKV"] * 99 + ["MKVLAGGTKP"]
+    seqs += ["MK"] * 29
+    dataset = ds.Dataset.from_dict({"aa_seq": seqs}).with_format("numpy")
+    encoded = add_encodings(dataset, ["aa_esm2_t6_8M", "aa_esm2_avg"])
+    per_residue = encoded["aa_esm2_t6_8M"]
+    # CLS and EOS tokens are included
+    assert per_residue.shape[:2] == (len(seqs), 30)
+    assert encoded["aa_esm2_avg"].shape == (len(seqs), per_residue.shape[-1])
+
+
+@pytest.mark.parametrize(
+    "per_residue, pooled",
+    [("aa_esm2_t6_8M", "aa_esm2_avg"), ("aa_ankh_base", "aa_ankh_avg")],
+)
+def test_pooled_embeddings_order_independent(per_residue: str, pooled: str):
+    """Pooled embeddings are the same whether averaged from the per-residue ones or pooled in the model"""
+    dataset = ds.Dataset.from_dict(
+        {"aa_seq": ["MKVLAGGT", "MK", "MKVLAGGTKPLE", "MKV"]}
+    ).with_format("numpy")
+    direct = add_encodings(dataset, [pooled])
+    averaged = add_encodings(dataset, [per_residue, pooled])
+    assert per_residue not in direct.column_names
+    np.testing.assert_allclose(averaged[pooled], direct[pooled], atol=1e-4)
+
+
+def test_add_encodings_num_proc():
+    """Encodings computed in worker processes equal those computed in a single process"""
+    dataset = ds.Dataset.from_dict(
+        {
+            "dna_seq": ["ATGAAACCC", "ATGTTT", "ATGGGGCCCTTT", "ATG", "ATGAAA"],
+            "bnd_idcs": [np.array([[0, 1], [1, 2]])] * 5,
+        }
+    ).with_format("numpy")
+    needed = [
+        "aa_seq",
+        "aa_len",
+        "aa_1hot",
+        "aa_1gram",
+        "atm_count",
+        "atm_adj",
+        "atm_bnd_incid",
+        "atm_retprob100",
+        "atm_adj_idcs",
+        "atm_bnd_incid_vals",
+        "dna_1hot",
+    ]
+    expected = add_encodings(dataset, needed)
+    encoded = add_encodings(dataset, needed, num_proc=3)
+    assert encoded.features == expected.features
+    for column in needed:
+        np.testing.assert_array_equal(encoded[column], expected[column])
+
+
+def test_join_columns():
+    """Columns of several encodings are added at once, replacing existing columns"""
+    dataset = ds.Dataset.from_dict(
+        {"aa_seq": ["MLGTK", "MAGTK"], "aa_len": [0, 0]}
+    ).with_format("numpy")
+    columns = [
+        columns_to_dataset({"aa_len": np.array([5, 5])}),
+        columns_to_dataset(
+            {
+                "aa_foo": np.zeros((2, 3, 4), dtype=np.float32),
+                "aa_bar": [np.zeros((1, 1)), np.zeros((2, 2))],
+            }
+        ),
+    ]
+    joined = join_columns(dataset, columns)
+    assert joined.column_names == ["aa_seq", "aa_len", "aa_foo", "aa_bar"]
+    assert joined.format["type"] == "numpy"
+    np.testing.assert_array_equal(joined["aa_len"], [5, 5])
+    assert joined.features["aa_foo"] == ds.Array2D(shape=(None, 4), dtype="float32")
+    assert joined[1]["aa_bar"].shape == (2, 2)
@@ -1,4 +1,13 @@
-from pedata.encoding.util import find_function_order
+from pedata.encoding.util import (
+    concatenate_encodings,
+    dependency_levels,
+    find_function_order,
+    map_shards,
+    submit_shards,
+)
+import datasets as ds
+import os
+import numpy as np
 import pytest
 
 
@@ -107,3 +116,96 @@ class TestEncodingUtil:
         assert (
             len(result) == 0
         ), "Test case 7 failed! Order of encoding functions is incorrect"
+
+    def test_find_function_order_alternative_providers(self):
+        # pooled embedding either computed from the sequence or derived from the per-residue embedding
+        pooled = lambda x: x
+        per_residue = lambda x: x
+        average = lambda x: x
+        translate = lambda x: x
+
+        encoders = [
+            EncodingSpec(["aa_seq"], ["dna_seq"], translate),
+            EncodingSpec(["aa_avg"], ["aa_emb"], average),
+            EncodingSpec(["aa_avg"], ["aa_seq"], pooled),
+            EncodingSpec(["aa_emb"], ["aa_seq"], per_residue),
+        ]
+
+        # only the pooled embedding is required
+        result = find_function_order(encoders, ["aa_seq"], ["aa_avg"])
+        assert [encoder.func for encoder in result] == [pooled]
+
+        # ... also when the sequence has to be translated first
+        result = find_function_order(encoders, ["dna_seq"], ["aa_avg"])
+        assert [encoder.func for encoder in result] == [translate, pooled]
+
+        # the per-residue embedding is required anyway
+        result = find_function_order(encoders, ["aa_seq"], ["aa_avg", "aa_emb"])
+        assert [encoder.func for encoder in result] == [per_residue, average]
+
+        # the per-residue embedding is already available
+        result = find_function_order(encoders, ["aa_seq", "aa_emb"], ["aa_avg"])
+        assert [encoder.func for encoder in result] == [average]
+
+
+def shard_lengths(dataset):
+    """Toy encoding function of a shard"""
+    return [len(s) for s in dataset["aa_seq"]]
+
+
+def test_map_shards():
+    """Shards are encoded in the order of the rows"""
+    dataset = ds.Dataset.from_dict({"aa_seq": ["M" * i for i in range(1, 8)]})
+    result = map_shards(shard_lengths, dataset, 3)
+    assert result == [[1, 2, 3], [4, 5], [6, 7]]
+    assert concatenate_encodings(result) == list(range(1, 8))
+    # a single process is used for a single shard
+    assert map_shards(shard_lengths, dataset.select([0]), 3) == [[1]]
+
+    with pytest.raises(ValueError):
+        map_shards(shard_lengths, dataset, 0)
+
+
+def shard_pids(dataset):
+    """Toy encoding function returning the worker process of a shard"""
+    return os.getpid()
+
+
+def test_submit_shards():
+    """The shards of several functions are encoded by a single pool of worker processes"""
+    dataset = ds.Dataset.from_dict({"aa_seq": ["M" * i for i in range(1, 8)]})
+    wait = submit_shards(
+        [(shard_lengths, dataset), (shard_pids, dataset), (shard_pids, dataset)], 3
+    )
+    lengths, *pids = wait()
+    assert lengths == [[1, 2, 3], [4, 5], [6, 7]]
+    assert [len(p) for p in pids] == [3, 3]
+    assert len(set(pids[0] + pids[1])) <= 3
+    assert os.getpid() not in pids[0]
+
+
+def test_concatenate_encodings():
+    """Arrays of shards are zero-padded to the same shape"""
+    result = concatenate_encodings([np.ones((2, 3, 2)), np.ones((1, 2, 4))])
+    assert result.shape == (3, 3, 4)
+    assert result[:2, :, 2:].sum() == 0 and result[2, 2].sum() == 0
+    assert result.sum() == 2 * 3 * 2 + 2 * 4
+
+
+def test_dependency_levels():
+    """Encoders only depend on encoders of earlier levels"""
+    encoders = [
+        EncodingSpec(["atm_count", "bnd_count"], ["bnd_idcs"], None),
+        EncodingSpec(["aa_seq"], ["dna_seq"], None),
+        EncodingSpec(["atm_adj"], ["bnd_idcs", "atm_count", "bnd_count"], None),
+        EncodingSpec(["aa_len"], ["aa_seq"], None),
+        EncodingSpec(["atm_retprob100"], ["atm_adj"], None),
+        EncodingSpec(["dna_len"], ["dna_seq"], None),
+    ]
+    levels = dependency_levels(encoders, ["dna_seq", "bnd_idcs"])
+    assert [[e.provides[0] for e in level] for level in levels] == [
+        ["atm_count", "aa_seq", "dna_len"],
+        ["atm_adj", "aa_len"],
+        ["atm_retprob100"],
+    ]
+    assert dependency_levels([], ["aa_seq"]) == []
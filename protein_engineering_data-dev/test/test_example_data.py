@@ -21,6 +21,7 @@ def test_regr_dataset_get_full_dataset():
             "aa_unirep_final",
             "aa_1gram",
             "aa_1hot",
+            "aa_tokens",
             "aa_len",
         ]
     )
@@ -43,6 +44,7 @@ def test_class_dataset_get_full_dataset():
             "aa_unirep_final",
             "aa_1gram",
             "aa_1hot",
+            "aa_tokens",
             "aa_len",
         ]
     )
@@ -1,7 +1,9 @@
 import datasets as ds
 import example_data as ed
 import pytest
+import numpy as np
 from pedata.mutation.mutation import Mutation
+from pedata.mutation.mutation_table import MutationTable
 from pedata.constants import Mut, Mut_with_no_targ
 import re
 
@@ -398,6 +400,53 @@ class TestMutation:
         assert result[4] == [Mut(2, "C", "T"), Mut(4, "T", "A")], "Test Case 5 failed"
         assert result[5] == [Mut(3, "G", "C"), Mut(4, "T", "A")], "Test Case 5 failed"
 
+    def test_iter_variant_recombinations(self):
+        variants = [
+            [Mut(1, "A", "G")],
+            [Mut(1, "A", "G"), Mut(2, "C", "T")],
+            [Mut(1, "A", "C"), Mut(3, "G", "T")],
+            [],
+            [Mut(3, "G", "T"), Mut(5, "E", "K")],
+        ]
+
+        # Test case 1: Conflicting pairs (0, 2) and (1, 2) are skipped
+        result = list(Mutation.iter_variant_recombinations(variants, chunk_size=2))
+        assert [(i, j) for i, j, _ in result] == [
+            (0, 1),
+            (0, 3),
+            (0, 4),
+            (1, 3),
+            (1, 4),
+            (2, 3),
+            (2, 4),
+            (3, 4),
+        ]
+        assert result[0][2] == [Mut(1, "A", "G"), Mut(2, "C", "T")]
+        assert result[6][2] == [Mut(1, "A", "C"), Mut(3, "G", "T"), Mut(5, "E", "K")]
+
+        # Test case 2: Filter by Hamming distance and shared positions
+        result = Mutation.iter_variant_recombinations(variants, max_distance=1)
+        assert [(i, j) for i, j, _ in result] == [(0, 1), (0, 3)]
+        result = Mutation.iter_variant_recombinations(variants, max_overlap=0)
+        assert [(i, j) for i, j, _ in result] == [
+            (0, 3),
+            (0, 4),
+            (1, 3),
+            (1, 4),
+            (2, 3),
+            (3, 4),
+        ]
+
+        # Test case 3: Parallel workers give the same result
+        assert list(
+            Mutation.iter_variant_recombinations(
+                MutationTable.from_mutations(variants), chunk_size=1, num_proc=2
+            )
+        ) == list(Mutation.iter_variant_recombinations(variants))
+
+        with pytest.raises(ValueError):
+            next(Mutation.iter_variant_recombinations(variants, chunk_size=0))
+
     def test_concat_mutations(self):
         # Test case 1: with empty list
         mut = [[]]
@@ -604,6 +653,34 @@ class TestMutation:
         
         assert len(Mutation.estimate_offset(dataset, parent=parent_seq)) == 1
 
+        # Test case 10: Mismatches are reported for the most likely offset
+        mutations = [Mut(2, "C", "X"), Mut(4, "Z", "Y")]
+        estimation = Mutation.estimate_offset(mutations, parent="ABCDEFGH")
+        assert estimation["offset"][0] == 0
+        assert estimation["matching_ratio"][0] == 0.5
+        assert estimation["non_match_pos"][0] == "[5]"
+        assert estimation["non_match_mutation_src"][0] == "['Z']"
+        assert estimation["non_match_parent_character"][0] == "['E']"
+
+    def test_count_matches_per_offset(self):
+        # Match counts of all offsets equal those of a sliding comparison
+        rng = np.random.default_rng(0)
+        parent = "".join(rng.choice(list("ACDEFGHIK"), 300))
+        sketch = "".join(
+            c if rng.random() < 0.3 else " " for c in parent[40:140]
+        ).strip()
+        counts = Mutation.count_matches_per_offset(sketch, parent)
+        expected = [
+            sum(s != " " and s == p for s, p in zip(sketch, parent[i:]))
+            for i in range(len(parent) - len(sketch) + 1)
+        ]
+        assert counts.tolist() == expected
+        assert counts.argmax() == 40
+
+        # Sketches longer than the parent or without common letters
+        assert len(Mutation.count_matches_per_offset("ABC", "AB")) == 0
+        assert Mutation.count_matches_per_offset("X Y", "ABCD").tolist() == [0, 0]
+
 
 
     def test_apply_variant_mutations(self):
@@ -652,6 +729,93 @@ class TestMutation:
                 mutations, parent_sequence, check_validity=True
             )
 
+    def test_parse_mutation_column(self):
+        # Test case 1: Same mutations as parsing each variant
+        dataset = ds.Dataset.from_dict(
+            {
+                "aa_mut": ["G34C_L33T", " wildtype", "K14M_A69G", "C2X"],
+                "aa_seq": [None, "ABCD", None, None],
+                "target foo": [1, 2, 3, 4],
+            }
+        )
+        parsed = Mutation.parse_mutation_column(dataset, offset=1)
+        expected, wildtype_idx = Mutation.parse_all_mutations(dataset, offset=1)
+        flat = Mutation.concat_mutations(expected)
+        assert parsed.variant_idx.tolist() == [0, 0, 2, 2, 3]
+        assert parsed.pos.tolist() == [m.pos for m in flat]
+        assert bytes(parsed.src).decode() == "".join(m.src for m in flat)
+        assert bytes(parsed.targ).decode() == "".join(m.targ for m in flat)
+        assert parsed.wildtype_idx.tolist() == wildtype_idx
+
+        # Test case 2: All invalid variants are reported at once
+        with pytest.raises(ValueError, match="2 variants: 'K14', 'AA3C'"):
+            Mutation.parse_mutation_column(["G34C", "K14", "AA3C", "-"])
+        parsed = Mutation.parse_mutation_column(
+            ["G34C", "K14_A2C", None, "AA3C"], raise_invalid=False
+        )
+        assert parsed.invalid_idx.tolist() == [1, 3]
+        assert parsed.wildtype_idx.tolist() == [2]
+        assert parsed.variant_idx.tolist() == [0]
+
+        # Test case 3: Dataset without mutation column
+        with pytest.raises(TypeError):
+            Mutation.parse_mutation_column(
+                ds.Dataset.from_dict({"aa_seq": ["ABCD"], "target foo": [1]})
+            )
+
+    def test_apply_mutations_batched(self):
+        # Test case 1: Same sequences as applying the mutations of each variant
+        parent = "MAKPSTHGEL"
+        variants = [
+            [Mut(1, "A", "G"), Mut(3, "P", "T")],
+            [],
+            [Mut(0, "M", "V"), Mut(9, "L", "W"), Mut(4, "S", "A")],
+        ]
+        flat = Mutation.concat_mutations(variants)
+        variant_idx = [i for i, mut in enumerate(variants) for _ in mut]
+        mutated = Mutation.apply_mutations_batched(
+            parent,
+            variant_idx,
+            [m.pos for m in flat],
+            [m.targ for m in flat],
+            num_variants=len(variants),
+            src=[m.src for m in flat],
+            check_validity=True,
+        )
+        assert mutated == [
+            Mutation.apply_variant_mutations(mut, parent) for mut in variants
+        ]
+
+        # Test case 2: Bytes and tokens are returned as arrays
+        codes = Mutation.apply_mutations_batched(
+            "ACGT", [0, 1], [1, 2], ["A", "T"], output="bytes"
+        )
+        assert codes.shape == (2, 4) and bytes(codes[0]) == b"AAGT"
+        tokens = Mutation.apply_mutations_batched(
+            "ACGT", [0, 1], [1, 2], ["A", "T"], output="tokens", alphabet="ACGT"
+        )
+        assert tokens.tolist() == [[0, 0, 2, 3], [0, 1, 3, 3]]
+
+        # Test case 3: Offset is set to 1 and all invalid mutations are reported
+        with pytest.raises(ValueError, match="'C' at position 2 .* 'G' at position 3"):
+            Mutation.apply_mutations_batched(
+                "ACGT",
+                [0, 1],
+                [1, 2],
+                ["A", "T"],
+                offset=1,
+                src=["C", "G"],
+                check_validity=True,
+            )
+
+        # Test case 4: Positions outside the parent and multi-character targets
+        with pytest.raises(ValueError):
+            Mutation.apply_mutations_batched("ACGT", [0], [4], ["A"])
+        with pytest.raises(ValueError):
+            Mutation.apply_mutations_batched("ACGT", [0], [1], ["AT"])
+        with pytest.raises(TypeError):
+            Mutation.apply_mutations_batched("", [0], [1], ["A"])
+
     def test_apply_all_mutations(self):
         # Test case 1: With an invalid input type
         invalid_input = {"aa_mut": ["DAMDIW"], "aa_seq": [None], "target foo": [1]}
@@ -750,4 +914,34 @@ class TestMutation:
         ]
 
 
+    def test_apply_all_mutations_parsing(self, monkeypatch):
+        """Mutation codes in the default format are parsed by Arrow, custom formats row by row"""
+        dataset = ds.Dataset.from_dict(
+            {
+                "aa_mut": ["C2X_E4Y", "wildtype", "F5T"],
+                "aa_seq": [None, "ABCDEFGH", None],
+                "target foo": [1, 2, 3],
+            }
+        )
+        parse_all_mutations = Mutation.parse_all_mutations
+
+        def fail(*args, **kwargs):
+            raise AssertionError("parsed row by row")
+
+        monkeypatch.setattr(Mutation, "parse_all_mutations", fail)
+        expected = ["ABXDYFGH", "ABCDEFGH", "ABCDETGH"]
+        assert Mutation.apply_all_mutations(dataset) == expected
+
+        # a custom extractor parses codes like "2:C>X"
+        monkeypatch.setattr(Mutation, "parse_all_mutations", parse_all_mutations)
+        dataset = dataset.map(lambda x: {"aa_mut": x["aa_mut"].replace("C2X", "2:C>X")})
+        mutated = Mutation.apply_all_mutations(
+            dataset,
+            valid=re.compile(r"^([0-9]+:[a-zA-Z]>[a-zA-Z]|[a-zA-Z][0-9]+[a-zA-Z])$"),
+            extractor=lambda c: (
+                (int(c[:-4]), c[-3], c[-1]) if ":" in c else (int(c[1:-1]), c[0], c[-1])
+            ),
+        )
+        assert mutated == expected
+
 TestMutation().test_generate_variant_mutation_combinations()
@@ -2,6 +2,7 @@ import pytest
 import pedata.mutation.mutation_converter as mc
 from collections import namedtuple
 from pedata.constants import Mut
+from pedata.mutation import MutationTable
 
 
 class TestMutationConverter:
@@ -80,3 +81,22 @@ class TestMutationConverter:
             "A13T_T24G",
             "A13T_T24G",
         ]
+
+    def test_convert_all_variant_mutations_to_str_table(self):
+        # A table of mutations is encoded like the list it was built from
+        mutation = [
+            [Mut(23, "T", "G"), Mut(12, "A", "T")],
+            [Mut(70, "T", "A")],
+        ]
+        assert mc.convert_all_variant_mutations_to_str(
+            MutationTable.from_mutations(mutation), offset=1
+        ) == mc.convert_all_variant_mutations_to_str(mutation, offset=1)
+
+        # A variant without mutations is rejected in both representations
+        mutation = [[Mut(12, "A", "T")], []]
+        with pytest.raises(TypeError):
+            mc.convert_all_variant_mutations_to_str(mutation)
+        with pytest.raises(TypeError):
+            mc.convert_all_variant_mutations_to_str(
+                MutationTable.from_mutations(mutation)
+            )
@@ -109,3 +109,44 @@ def test_extract_mutation_namedtuples_from_sequences7():
         ],
         [],  # No invalid variant sequence found
     )
+
+
+def test_extract_mutation_table_from_sequences():
+    # The table holds the same mutations as the namedtuple extraction
+    parent_sequence = "ATCGATCG"
+    variant_sequences = ["ATCGTTCG", "ATCGATCG", "GTTGATCA", "ATCG", "ATCGATCC"]
+    table, invalid = me.extract_mutation_table_from_sequences(
+        variant_sequences, parent_sequence, offset=1, batch_size=16
+    )
+    assert (
+        table.to_mutations(),
+        invalid,
+    ) == me.extract_mutation_namedtuples_from_sequences(
+        variant_sequences, parent_sequence, offset=1
+    )
+    assert invalid == ["ATCG"]
+
+    # Only invalid variants
+    table, invalid = me.extract_mutation_table_from_sequences(["AT"], parent_sequence)
+    assert len(table) == 0 and invalid == ["AT"]
+
+    with pytest.raises(ValueError):
+        me.extract_mutation_table_from_sequences([], parent_sequence)
+    with pytest.raises(ValueError):
+        me.extract_mutation_table_from_sequences(["ATCGATCÄ"], parent_sequence)
+
+
+def test_extract_mutation_str_from_sequences():
+    variant_sequences = ["AAAA", "ABBA", "BBAA"]
+    parent_sequence = "BBAA"
+    assert me.extract_mutation_str_from_sequences(
+        variant_sequences[:2], parent_sequence
+    ) == ["B1A_B2A", "B1A_A3B"]
+    # Non-ASCII sequences are compared one by one
+    assert me.extract_mutation_str_from_sequences(["ÄBAA"], parent_sequence) == ["B1Ä"]
+
+    # A variant equal to the parent has no mutation code, for any characters
+    with pytest.raises(TypeError):
+        me.extract_mutation_str_from_sequences(variant_sequences, parent_sequence)
+    with pytest.raises(TypeError):
+        me.extract_mutation_str_from_sequences(["ÄBAA", "BBAA"], parent_sequence)
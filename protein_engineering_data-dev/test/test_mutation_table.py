@@ -0,0 +1,109 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+from datasets import Dataset
+from pedata.constants import Mut
+from pedata.mutation import Mutation, MutationTable
+from pedata.mutation.mutation_converter import convert_all_variant_mutations_to_str
+
+MUTATIONS = [
+    [Mut(2, "C", "A"), Mut(0, "A", "T")],
+    [],
+    [Mut(4, "E", "K")],
+]
+PARENT = "ACCDEF"
+
+
+class TestMutationTable:
+    def test_round_trip(self):
+        table = MutationTable.from_mutations(MUTATIONS)
+        assert len(table) == 3 and table.num_mutations == 3
+        assert table.offsets.tolist() == [0, 2, 2, 3]
+        assert table.pos.dtype == np.int32 and table.src.dtype == np.uint8
+        assert table.to_mutations() == MUTATIONS
+        assert list(table) == MUTATIONS
+        assert table[-1] == MUTATIONS[-1]
+        assert table.variant_idx.tolist() == [0, 0, 2]
+
+        # a flat representation sorted by variant gives the same table
+        from_flat = MutationTable.from_variant_idx(
+            [0, 0, 2], [2, 0, 4], "CAE", "ATK", num_variants=3
+        )
+        assert from_flat.to_mutations() == MUTATIONS
+
+        # contiguous ranges of variants are tables again
+        assert table[1:].to_mutations() == MUTATIONS[1:]
+        assert len(table[2:1]) == 0
+        with pytest.raises(IndexError):
+            table[3]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            MutationTable([0, 2], [1], "A", "C")
+        with pytest.raises(ValueError):
+            MutationTable([1, 2], [1], "A", "C")
+        with pytest.raises(ValueError):
+            MutationTable([0, 1], [1], ["AB"], "C")
+        with pytest.raises(ValueError):
+            MutationTable.from_mutations([[Mut(1, "A", None)]])
+        with pytest.raises(ValueError):
+            MutationTable.from_variant_idx([1, 0], [1, 2], "AC", "CA")
+
+    def test_arrow(self):
+        table = MutationTable.from_mutations(MUTATIONS)
+        array = table.to_arrow()
+        assert len(array) == 3
+        assert array[0].as_py() == [
+            {"pos": 2, "src": ord("C"), "targ": ord("A")},
+            {"pos": 0, "src": ord("A"), "targ": ord("T")},
+        ]
+        assert MutationTable.from_arrow(array).to_mutations() == MUTATIONS
+
+        # sliced and chunked arrays are read correctly
+        chunked = pa.chunked_array([array.slice(0, 1), array.slice(1)])
+        assert MutationTable.from_arrow(chunked).to_mutations() == MUTATIONS
+        assert MutationTable.from_arrow(array.slice(1)).to_mutations() == MUTATIONS[1:]
+
+    def test_to_str(self):
+        table = MutationTable.from_mutations(MUTATIONS)
+        assert table.to_str() == ["C3A_A1T", "", "E5K"]
+        assert table.sort_by_pos().to_str(offset=-1) == ["A2T_C4A", "", "E6K"]
+        assert convert_all_variant_mutations_to_str(
+            MutationTable.from_mutations([MUTATIONS[0], MUTATIONS[2]]), offset=-1
+        ) == ["A2T_C4A", "E6K"]
+
+    def test_mutation_methods(self):
+        """Mutation methods accept a table like the equivalent list of mutations"""
+        table = MutationTable.from_mutations(MUTATIONS)
+        flat = Mutation.concat_mutations(MUTATIONS)
+        assert Mutation.concat_mutations(table) == flat
+        assert Mutation.get_parent_sketch_from_mutations(
+            table
+        ) == Mutation.get_parent_sketch_from_mutations(flat)
+        assert (
+            Mutation.estimate_offset(table, PARENT).to_dict()
+            == Mutation.estimate_offset(flat, PARENT).to_dict()
+        )
+        assert Mutation.apply_all_mutations(
+            table, PARENT, offset=0
+        ) == Mutation.apply_all_mutations(MUTATIONS, PARENT, offset=0)
+
+        with pytest.raises(ValueError):
+            Mutation.get_parent_sketch_from_mutations(
+                MutationTable.from_mutations([[Mut(1, "A", "C")], [Mut(1, "G", "C")]])
+            )
+        with pytest.raises(TypeError):
+            Mutation.get_parent_sketch_from_mutations(MutationTable([0], [], "", ""))
+
+    def test_dataset_offset(self):
+        """Offsets estimated from a dataset are unchanged"""
+        dataset = Dataset.from_dict(
+            {
+                "aa_mut": ["wildtype", "C4A_A2T", "E6K"],
+                "aa_seq": [PARENT, None, None],
+                "target foo": [1, 2, 3],
+            }
+        )
+        estimation = Mutation.estimate_offset(dataset, PARENT)
+        assert estimation["offset"][0] == -1
+        assert estimation["matching_ratio"][0] == 1.0
@@ -0,0 +1,214 @@
+import pickle
+
+import numpy as np
+import pytest
+from datasets import Dataset
+from pedata.tag_finder import (
+    _TAG_FILE,
+    _TAG_LIBRARY_FILE,
+    TagFinder,
+    TagIndex,
+    SequenceCleaner,
+    TagLibrary,
+    load_tag_library,
+)
+
+
+@pytest.fixture(scope="module")
+def tag_finder():
+    return TagFinder()
+
+
+def hit_summary(hits):
+    return [(h.name, h.start, h.end, h.identity, h.tag_aln, h.location) for h in hits]
+
+
+def search_one_by_one(tag_finder: TagFinder, sequence: str):
+    """Hits of the tags searched one by one, comparing each tag at every position of the sequence"""
+    hits = []
+    for tag in tag_finder._tags:
+        # fusion tags are only searched if at least 25 residues are left
+        if tag.length >= len(sequence) or (
+            tag.fusion and len(sequence) - tag.length < 25
+        ):
+            continue
+        for i in range(len(sequence) - tag.length + 1):
+            matches = [t == q for t, q in zip(tag.sequence, sequence[i:])].count(True)
+            identity = round(matches / tag.length * 100, 2)
+            if identity >= tag_finder.identity_cutoff:
+                hits.append(tag_finder._tag_hit(tag, sequence, i, identity))
+    return hits
+
+
+def test_tag_library(tmp_path):
+    tag_file = tmp_path / "tags.csv"
+    tag_file.write_text(
+        "name,sequence,method,origin,reference\n"
+        "His-Tag,HHHHHH,Ni-NTA,Synthetic peptide,https://pubmed\n"
+        'GST-Fusion,MSPILGYW,"Glutathione, affinity",Schistosoma japonicum,\n'
+    )
+    library = TagLibrary.compile(tag_file)
+    assert len(library) == 2
+    tag = library.tag(1)
+    assert (tag.name, tag.sequence, tag.method, tag.reference) == (
+        "GST-Fusion",
+        "MSPILGYW",
+        "Glutathione, affinity",
+        "",
+    )
+    assert [tag.fusion for tag in library.tags()] == [False, True]
+    assert library.index.fusion.tolist() == [False, True]
+
+    # the written library is memory-mapped
+    library_file = tmp_path / "tags.bin"
+    library.write(library_file)
+    loaded = load_tag_library(str(tag_file), str(library_file))
+    assert isinstance(loaded.buffer, np.memmap)
+    assert loaded.tag(0).name == "His-Tag"
+    assert pickle.loads(pickle.dumps(loaded)).tag(1).sequence == "MSPILGYW"
+
+    # libraries of another tag database or version are compiled again
+    tag_file.write_text(tag_file.read_text().replace("HHHHHH", "HHHHHHHH"))
+    load_tag_library.cache_clear()
+    assert load_tag_library(str(tag_file), str(library_file)).tag(0).length == 8
+    buffer = np.fromfile(library_file, dtype=np.uint8)
+    buffer[8] += 1
+    with pytest.raises(ValueError):
+        TagLibrary(buffer)
+
+    # the shipped library is compiled from the shipped tag database
+    assert load_tag_library(_TAG_FILE, _TAG_LIBRARY_FILE).source == (
+        TagLibrary.compile(_TAG_FILE).source
+    )
+    assert isinstance(load_tag_library().buffer, np.memmap)
+
+
+def test_tag_index_search():
+    index = TagIndex(["HHHHHH", "DYKDDDDK", "HHHHHH"], [False, False, False])
+    tag_idx, start, identity = index.search("MHHHHHHGDYKDDDEK", identity_cutoff=85.0)
+    assert tag_idx.tolist() == [0, 1, 2]
+    assert start.tolist() == [1, 8, 1]
+    assert identity == [100.0, 87.5, 100.0]
+
+    # tags are only found in longer sequences
+    assert len(index.search("HHHHHH", identity_cutoff=50.0)[0]) == 0
+
+    # fusion tags need at least 25 other residues
+    index = TagIndex(["HHHHHH"], [True])
+    assert len(index.search("H" * 30, identity_cutoff=90.0)[0]) == 0
+    assert len(index.search("H" * 31, identity_cutoff=90.0)[0]) == 26
+
+    # hits are reported per sequence, also when searching in small chunks
+    index = TagIndex(["HHHHHH", "DYKDDDDK"], [False, False])
+    sequences = ["MHHHHHHG", "", "GDYKDDDDKG", "HHHHHH", "HHHHHHHDYKDDDDK"]
+    for block_size in (2**22, 32):
+        seq_idx, tag_idx, start, identity = index.search_batch(
+            sequences, identity_cutoff=90.0, block_size=block_size
+        )
+        assert seq_idx.tolist() == [0, 2, 4, 4, 4]
+        assert tag_idx.tolist() == [0, 1, 0, 0, 1]
+        assert start.tolist() == [1, 1, 0, 1, 7]
+
+    # the pickled index finds the same hits
+    restored = pickle.loads(pickle.dumps(index))
+    assert restored.codes.tobytes() == index.codes.tobytes()
+    assert [a.tolist() for a in restored.search("MHHHHHHG", 50.0)[:2]] == [
+        a.tolist() for a in index.search("MHHHHHHG", 50.0)[:2]
+    ]
+
+
+@pytest.mark.parametrize("identity_cutoff", [90.0, 66.67, 40.0])
+def test_search_equals_one_by_one(tag_finder: TagFinder, identity_cutoff: float):
+    """Searching all tags at once gives the hits of searching them one by one"""
+    rng = np.random.default_rng(0)
+    alphabet = np.array(list("ACDEFGHIKLMNPQRSTVWY"))
+    tag_finder.identity_cutoff = identity_cutoff
+    for _ in range(10):
+        tags = [
+            tag_finder._tags[i].sequence for i in rng.choice(len(tag_finder._tags), 2)
+        ]
+        core = "".join(rng.choice(alphabet, rng.integers(5, 200)))
+        sequence = tags[0] + core + tags[1]
+        hits = [
+            tag_finder._tag_hit(tag_finder._tags[i], sequence, start, identity)
+            for i, start, identity in zip(
+                *tag_finder.tag_index.search(sequence, identity_cutoff, block_size=64)
+            )
+        ]
+        assert hit_summary(hits) == hit_summary(search_one_by_one(tag_finder, sequence))
+    tag_finder.identity_cutoff = 90.0
+
+
+def test_find_tags(tag_finder: TagFinder):
+    tags, termini = tag_finder.find_tags(sequence="GHHHHHHMYNAMEISCARL")
+    assert tags[0].sequence == "GHHHHHH"
+    assert termini == {"N-terminus": (0, 7), "C-terminus": (19, 19)}
+
+    # tags added later are searched as well
+    tag_finder = TagFinder()
+    tag_finder._add_tag("Test-Tag", "MYNAMEIS", "", "", "")
+    tags, _ = tag_finder.find_tags(sequence="GHHHHHHMYNAMEISCARL")
+    assert "Test-Tag" in [tag.name for tag in tags]
+
+
+def test_batch_equals_single(tag_finder: TagFinder):
+    """Batched tag search and stripping gives the results of single sequences"""
+    sequences = [
+        "GHHHHHHMYNAMEISCARL",
+        "",
+        "MKVLAAGIVGLLLASAGCDYKDDDDK",
+        "HHHHHHMKVLAAGIVGLLLAGLEHHHHHH",
+        "MKVLAAGIVG",
+    ]
+    batch = tag_finder.find_tags_batch(sequences)
+    for sequence, (tags, termini) in zip(sequences, batch):
+        single_tags, single_termini = tag_finder.find_tags(sequence)
+        assert hit_summary(tags) == hit_summary(single_tags)
+        assert termini == single_termini
+    assert tag_finder.strip_tags_batch(sequences) == [
+        tag_finder.strip_tags(sequence) for sequence in sequences
+    ]
+    assert tag_finder.get_strip_report_batch(sequences) == [
+        tag_finder.get_strip_report(sequence) for sequence in sequences
+    ]
+
+
+@pytest.mark.parametrize("num_proc", [1, 2])
+def test_clean_dataset(tag_finder: TagFinder, num_proc: int):
+    sequences = [
+        "GHHHHHHMYNAMEISCARL",
+        "MKVLAAGIVGLLLASAGCDYKDDDDK",
+        "MKVLAAGIVGLLLASAGC",
+    ]
+    dataset = Dataset.from_dict({"aa_seq": sequences})
+    cleaned = tag_finder.clean_dataset(
+        dataset, "aa_seq", num_proc=num_proc, convert_nucleotide=True, batch_size=2
+    )
+    assert cleaned["aa_seq"] == [
+        tag_finder.strip_tags(sequence)[0] for sequence in sequences
+    ]
+    assert cleaned["removed_tags"][2] == "N-term: None C-term: None"
+    assert cleaned["removed_tags"][0] != "N-term: None C-term: None"
+
+
+def test_sequence_cleaner_batches(tag_finder: TagFinder):
+    """Sequence types and JS distances of a batch are those of the single sequences"""
+    sequences = ["ATGGCCTAA", "AUGGCC", "MKVLAAG", "MKVXLAAG", "MKV*", "WWWWWWWW"]
+    seq_types = SequenceCleaner.get_sequence_types(sequences)
+    expected = ["DNA", "RNA", "Protein", "Ambiguous_Protein", "Unknown", "Protein"]
+    assert seq_types == expected
+    assert seq_types == [SequenceCleaner.get_sequence_type(s) for s in sequences]
+    assert SequenceCleaner.get_sequence_types([""]) == ["Unknown"]
+
+    distances = SequenceCleaner.js_distances(sequences[2:])
+    assert distances == pytest.approx(
+        [SequenceCleaner.js_distance(s) for s in sequences[2:]]
+    )
+    assert SequenceCleaner.js_distance("mkvlaag") == pytest.approx(distances[0])
+    assert SequenceCleaner.js_distance("MKVLXXAAG") == pytest.approx(distances[0])
+    assert distances[-1] > 0.6
+
+    cleaner = SequenceCleaner("aa_seq", "removed_tags", "artificial", tag_finder)
+    assert cleaner.convert_sequences(sequences[:3]) == ["MA", "MA", "MKVLAAG"]
+    assert (cleaner._dna_counter, cleaner._rna_counter) == (1, 1)
+    assert cleaner._protein_counter == 3
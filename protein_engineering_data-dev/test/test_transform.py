@@ -1,7 +1,22 @@
 import datasets as ds
 import pytest
 from Bio.Data import CodonTable
-from pedata.encoding import translate_dna_to_aa_seq
+import numpy as np
+from pedata.config.alphabets import padded_aa_alphabet
+from Bio import BiopythonWarning
+from Bio.Seq import Seq
+from pedata.encoding import (
+    NGramFeat,
+    SeqStrOneHot,
+    SeqStrTokens,
+    translate_dna,
+    translate_dna_to_aa_seq,
+)
+from pedata.encoding.transform import (
+    seq_strings_to_indices,
+    token_counts,
+    tokens_to_one_hot,
+)
 
 
 def test_translate_dna_to_aa_seq():
@@ -38,3 +53,101 @@ def test_translate_dna_to_aa_seq():
     result = translate_dna_to_aa_seq(dataset)
     expected_output = {"aa_seq": ["DL", "L", "KITP", "GQNAL"]}
     assert result["aa_seq"] == expected_output["aa_seq"]
+
+    # Test case 7: Translate batches in several processes
+    result = translate_dna_to_aa_seq(dataset, num_proc=2, batch_size=1)
+    assert result["aa_seq"] == expected_output["aa_seq"]
+
+
+def test_translate_dna():
+    # Test case 1: the vectorized translation equals Biopython, including ambiguous bases and RNA
+    sequences = ["", "GATCTG", "atgTAAtga", "AUGGCU", "CTNNNNTARYTRGCN", "TAN---"]
+    assert translate_dna(sequences) == [str(Seq(seq).translate()) for seq in sequences]
+    assert translate_dna(sequences[1:3]) == ["DL", "M**"]
+
+    # Test case 2: trailing partial codons are ignored with a warning
+    with pytest.warns(BiopythonWarning):
+        assert translate_dna(["GATCT", "GA"]) == ["D", ""]
+
+    # Test case 3: invalid codons and missing sequences
+    with pytest.raises(CodonTable.TranslationError):
+        translate_dna(["ATGMAP"])
+    with pytest.raises(ValueError):
+        translate_dna(["ATG", None])
+
+
+def test_seq_strings_to_indices():
+    # Test case 1: sequences are padded with the index of the padding character
+    result = seq_strings_to_indices(["MK", "MKV", ""], padded_aa_alphabet)
+    expected = [[padded_aa_alphabet.index(c) for c in s] for s in ["MK ", "MKV", "   "]]
+    np.testing.assert_array_equal(result, expected)
+    assert result.dtype == np.uint8
+
+    # Test case 2: unknown characters
+    with pytest.raises(ValueError):
+        seq_strings_to_indices(["MKB"], padded_aa_alphabet)
+    with pytest.raises(ValueError):
+        seq_strings_to_indices(["MKÄ"], padded_aa_alphabet)
+
+    # Test case 3: padding needed, but the padding character is not in the alphabet
+    with pytest.raises(ValueError):
+        seq_strings_to_indices(["MK", "M"], padded_aa_alphabet[1:])
+    assert seq_strings_to_indices(["MK", "KM"], padded_aa_alphabet[1:]).shape == (2, 2)
+
+    # Test case 4: padding to a given length, which must fit the longest sequence
+    result = seq_strings_to_indices(["MK", "M"], padded_aa_alphabet, length=4)
+    assert result.shape == (2, 4) and (result[:, 2:] == 0).all()
+    with pytest.raises(ValueError):
+        seq_strings_to_indices(["MKV"], padded_aa_alphabet, length=2)
+
+
+def test_seq_str_one_hot():
+    sequences = ["MLGTK", "MAG", "W*"]
+    num_letters = len(padded_aa_alphabet) - 1
+
+    # Test case 1: padded one hot encoding, the padding character is encoded as all zeros
+    padded = SeqStrOneHot(padded_aa_alphabet, output="padded").fit_transform(sequences)
+    assert padded.shape == (3, 5, num_letters) and padded.dtype == np.int8
+    np.testing.assert_array_equal(padded.sum(axis=(1, 2)), [5, 3, 2])
+    assert padded[2, 1, padded_aa_alphabet.index("*") - 1] == 1
+
+    # Test case 2: the flat and sparse encodings have the same layout
+    flat = SeqStrOneHot(padded_aa_alphabet).fit_transform(sequences)
+    np.testing.assert_array_equal(flat, padded.reshape(3, -1))
+    sparse = SeqStrOneHot(padded_aa_alphabet, output="sparse").fit_transform(sequences)
+    np.testing.assert_array_equal(sparse.toarray(), flat)
+
+    # Test case 3: padding to the longest sequence of a whole dataset
+    enc = SeqStrOneHot(padded_aa_alphabet, output="padded").fit(sequences)
+    pad_length = enc.max_num_tokens(sequences[1:], max_length=6)
+    assert enc.transform(sequences[1:], pad_length=pad_length).shape == (
+        2,
+        6,
+        num_letters,
+    )
+
+    # Test case 4: invalid characters and outputs
+    with pytest.raises(ValueError):
+        SeqStrOneHot(padded_aa_alphabet).fit(["MLB"])
+    with pytest.raises(ValueError):
+        SeqStrOneHot(padded_aa_alphabet, output="dense")
+
+
+def test_seq_str_tokens():
+    sequences = ["MLGTK", "MAG", "W*"]
+
+    # Test case 1: tokens are padded with 0
+    tokens = SeqStrTokens(padded_aa_alphabet).fit_transform(sequences)
+    assert tokens.shape == (3, 5) and tokens.dtype == np.uint8
+    np.testing.assert_array_equal((tokens != 0).sum(axis=1), [5, 3, 2])
+
+    # Test case 2: one hot encodings and 1-gram counts derived from tokens
+    np.testing.assert_array_equal(
+        tokens_to_one_hot(tokens, len(padded_aa_alphabet)),
+        SeqStrOneHot(padded_aa_alphabet).fit_transform(sequences),
+    )
+    ngram = NGramFeat(1, padded_aa_alphabet[1:])
+    ngram.fit(sequences)
+    np.testing.assert_array_equal(
+        token_counts(tokens, len(padded_aa_alphabet)), ngram.transform(sequences)
+    )
@@ -1,4 +1,5 @@
 import jax.numpy as jnp
+import numpy as np
 import pedata.encoding.transforms_graph as tg
 import datasets as ds
 import pytest
@@ -321,3 +322,151 @@ def test_atm_adj():
         assert jnp.array_equal(
             adj, expected_adj
         ), f"Expected {expected_adj}, but got {adj} in element {i}"
+
+
+def test_adj_lists_to_matrices():
+    """Matrices of many graphs built at once equal those built one graph at a time"""
+    adj_lists = [
+        np.array([[0, 1, 0], [2, 1, 3]]),
+        np.array([[0, 1], [0, 1]]),
+        np.zeros((2, 0), dtype=int),
+        np.array([[0], [1]]),
+    ]
+    num_nodes, num_edges = [4, 2, 1, 2], [3, 2, 0, 1]
+    adjmatrs = [
+        tg.adj_list_to_adjmatr(jnp.array(adj), n, e, directed=True)
+        for adj, n, e in zip(adj_lists, num_nodes, num_edges)
+    ]
+    padded = tg.adj_lists_to_adjmatrs(adj_lists, num_nodes, directed=True, pad_value=-1)
+    assert padded.shape == (4, 4, 4) and padded.dtype == np.float32
+    sparse = tg.adj_lists_to_adjmatrs(adj_lists, num_nodes, directed=True, output="csr")
+    assert sparse.shape == (9, 9) and sparse.nnz == 6
+    offset = 0
+    for i, (adjmatr, n) in enumerate(zip(adjmatrs, num_nodes)):
+        np.testing.assert_array_equal(padded[i, :n, :n], np.where(adjmatr, adjmatr, -1))
+        assert (padded[i, n:] == -1).all() and (padded[i, :, n:] == -1).all()
+        np.testing.assert_array_equal(
+            sparse[offset : offset + n, offset : offset + n].toarray(), adjmatr
+        )
+        offset += n
+
+    # the fill values of undirected edges are set like by `adj_list_to_adjmatr`
+    fill_values = [np.array([2.0, 3.0, 4.0]), np.array([5.0, 6.0])]
+    for adjmatr, adj, n, values in zip(
+        tg.adj_lists_to_adjmatrs(
+            adj_lists[:2], num_nodes[:2], fill_values=fill_values, output="list"
+        ),
+        adj_lists,
+        num_nodes,
+        fill_values,
+    ):
+        expected = tg.adj_list_to_adjmatr(
+            jnp.array(adj), n, len(values), jnp.array(values)
+        )
+        np.testing.assert_array_equal(adjmatr, expected)
+
+    # additional entries of the adjacency lists are padding
+    incidences = tg.adj_lists_to_incidences(
+        adj_lists, num_nodes, [2, 1, 0, 1], output="list"
+    )
+    assert [incidence.shape for incidence in incidences] == [
+        (4, 2),
+        (2, 1),
+        (1, 0),
+        (2, 1),
+    ]
+    for incidence, adj, n in zip(incidences, adj_lists, num_nodes):
+        e = incidence.shape[1]
+        expected = tg.adj_list_to_incidence(jnp.array(adj[:, :e]), n, e, directed=True)
+        directed = tg.adj_lists_to_incidences(
+            [adj], [n], [e], directed=True, output="coo"
+        )
+        np.testing.assert_array_equal(directed.toarray(), expected)
+        np.testing.assert_array_equal(
+            incidence, tg.adj_list_to_incidence(jnp.array(adj[:, :e]), n, e)
+        )
+
+    with pytest.raises(ValueError):
+        tg.adj_lists_to_adjmatrs(adj_lists, num_nodes, output="dense")
+    with pytest.raises(ValueError):
+        tg.adj_lists_to_adjmatrs(adj_lists, num_nodes, pad_value=-1, output="coo")
+    with pytest.raises(ValueError):
+        tg.adj_lists_to_incidences([np.array([0, 1])], [2])
+    with pytest.raises(ValueError):
+        tg.adj_lists_to_adjmatrs(adj_lists[:1], [4], fill_values=[np.ones(2)])
+
+
+def test_return_prob_feat():
+    """Return probabilities of graphs decomposed in buckets equal those of repeated walk steps"""
+    rng = np.random.default_rng(0)
+    adj_matrices = []
+    for num_nodes in [2, 5, 9, 9, 17]:
+        adj = np.triu(rng.random((num_nodes, num_nodes)) < 0.4, 1).astype(float)
+        adj[np.arange(num_nodes - 1), np.arange(1, num_nodes)] = 1
+        adj_matrices.append(adj + adj.T)
+    retprob = tg.return_prob_feat(10, {"atm_adj": adj_matrices})["atm_retprob100"]
+    for adj, probs in zip(adj_matrices, retprob):
+        walk = 0.5 * (np.eye(len(adj)) + adj / adj.sum(axis=1, keepdims=True))
+        power = np.eye(len(adj))
+        expected = []
+        for _ in range(10):
+            power = power @ walk
+            expected.append(np.diag(power))
+        np.testing.assert_allclose(probs, np.stack(expected, axis=1), atol=1e-12)
+
+    # isolated atoms stay where they are
+    adj = np.zeros((3, 3))
+    adj[0, 1] = adj[1, 0] = 1
+    probs = tg.return_probabilities([adj, np.zeros((1, 1))], 4, bucket_size=2)
+    np.testing.assert_allclose(probs[0][2], 1.0)
+    np.testing.assert_allclose(probs[1], np.ones((1, 4)))
+    np.testing.assert_allclose(probs[0][:2, 0], 0.5)
+
+
+def test_sparse_graph_features():
+    """Sparse matrix entries and return probabilities equal those of the dense matrices"""
+    dataset = (
+        ds.Dataset.from_dict(
+            {
+                "bnd_idcs": [
+                    np.array([[0, 1, 0], [2, 1, 3]]),
+                    np.array([[0, 1, 2], [1, 2, 3]]),
+                    np.array([[0], [1]]),
+                ]
+            }
+        )
+        .with_format("numpy")
+        .map(tg.bnd_count_atm_count, batched=True)
+    )
+    adj_sparse = tg.atm_adj_sparse(dataset)
+    incid_sparse = tg.atm_bnd_incid_sparse(dataset)
+    for dense, sparse, name in [
+        (tg.atm_adj(dataset)["atm_adj"], adj_sparse, "atm_adj"),
+        (tg.atm_bnd_incid(dataset)["atm_bnd_incid"], incid_sparse, "atm_bnd_incid"),
+    ]:
+        for matrix, idcs, vals in zip(
+            dense, sparse[f"{name}_idcs"], sparse[f"{name}_vals"]
+        ):
+            assert idcs.shape == (2, np.count_nonzero(matrix))
+            rebuilt = np.zeros_like(matrix)
+            rebuilt[idcs[0], idcs[1]] = vals
+            np.testing.assert_array_equal(rebuilt, matrix)
+
+    dense = tg.return_prob_feat(20, tg.atm_adj(dataset))["atm_retprob100"]
+    sparse = tg.return_prob_feat_sparse(
+        20, dict(adj_sparse, atm_count=dataset["atm_count"])
+    )["atm_retprob100"]
+    for expected, probs in zip(dense, sparse):
+        np.testing.assert_allclose(probs, expected, atol=1e-12)
+
+    # graphs are walked in small groups and chunks of start nodes
+    probs = tg.sparse_return_probabilities(
+        adj_sparse["atm_adj_idcs"],
+        adj_sparse["atm_adj_vals"],
+        dataset["atm_count"],
+        20,
+        chunk_size=3,
+        max_walk_entries=6,
+    )
+    for expected, p in zip(dense, probs):
+        np.testing.assert_allclose(p, expected, atol=1e-12)